@@ -0,0 +1,45 @@
+import argparse
+import random
+import time
+
+from merkle_tree import MerkleTree, NodeCache
+
+
+def build(leaves, cache=None):
+    start = time.perf_counter()
+    mt = MerkleTree(leaves, cache)
+    return mt, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merkle 节点缓存：少量叶子变化后重建的耗时与命中率")
+    parser.add_argument("--leaves", type=int, default=10**6, help="叶子数量")
+    parser.add_argument("--change", type=float, default=0.001, help="被修改的叶子比例")
+    parser.add_argument("--budget-mb", type=int, default=512, help="缓存内存预算 (MB)")
+    args = parser.parse_args()
+
+    N = args.leaves
+    leaves = [f"leaf{i}".encode() for i in range(N)]
+    cache = NodeCache(args.budget_mb * 1024 * 1024)
+
+    # 1. 首次构建（冷缓存）
+    mt1, t_cold = build(leaves, cache)
+    print(f"[首次构建] {N} 叶子: {t_cold:.2f} 秒, 缓存条目 {len(cache)} / 上限 {cache.max_entries}")
+
+    # 2. 修改 0.1% 的叶子，模拟第二天的快照
+    changed = random.sample(range(N), max(1, int(N * args.change)))
+    snapshot = leaves[:]
+    for i in changed:
+        snapshot[i] = f"leaf{i}-v2".encode()
+
+    # 3. 无缓存重建 vs 有缓存重建
+    mt_plain, t_plain = build(snapshot)
+    hits, misses = cache.hits, cache.misses
+    mt2, t_cached = build(snapshot, cache)
+    hit_rate = (cache.hits - hits) / ((cache.hits - hits) + (cache.misses - misses))
+
+    print(f"[修改 {len(changed)} 个叶子后重建]")
+    print(f"  无缓存: {t_plain:.2f} 秒")
+    print(f"  有缓存: {t_cached:.2f} 秒, 本次命中率 {hit_rate:.2%}, 累计命中率 {cache.hit_rate:.2%}, "
+          f"淘汰 {cache.evictions}")
+    print(f"  根一致: {mt2.get_root() == mt_plain.get_root()}")
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import time
+
+from sm3 import BACKENDS
+from merkle_tree import MerkleTree
+
+
+# ========================
+# Part 1: 计时工具
+# ========================
+
+SIZES = [0, 64, 1 << 10, 16 << 10, 1 << 20, 64 << 20]
+MERKLE_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+
+def cpu_ghz():
+    """从 /proc/cpuinfo 读取当前主频，读取失败时返回 None"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('cpu MHz'):
+                    return float(line.split(':')[1]) / 1000
+    except OSError:
+        pass
+    return None
+
+
+def time_calls(fn, arg, repeat, min_time_ns):
+    """至少调用 repeat 次且总时间不少于 min_time_ns，返回每次调用的耗时 (ns) 列表"""
+    samples = []
+    total = 0
+    while len(samples) < repeat or total < min_time_ns:
+        t0 = time.perf_counter_ns()
+        fn(arg)
+        dt = time.perf_counter_ns() - t0
+        samples.append(dt)
+        total += dt
+    return samples
+
+
+def hash_functions():
+    """待测的哈希实现：各 SM3 后端 + hashlib 基线"""
+    funcs = {f"sm3-{name}": b.digest for name, b in BACKENDS.items()}
+    funcs["sha256-hashlib"] = lambda m: hashlib.sha256(m).digest()
+    try:
+        hashlib.new('sm3')
+        funcs["sm3-openssl"] = lambda m: hashlib.new('sm3', m).digest()
+    except ValueError:
+        pass
+    return funcs
+
+
+# ========================
+# Part 2: 哈希吞吐量与延迟
+# ========================
+
+def bench_hash(sizes, repeat, min_time_ns, budget_s, ghz):
+    rows = []
+    for name, fn in hash_functions().items():
+        ns_per_byte = None
+        for size in sizes:
+            # 根据较小消息测得的速度预估，超过时间预算的组合直接跳过
+            if ns_per_byte is not None and ns_per_byte * size * repeat > budget_s * 1e9:
+                print(f"  {name:16s} {size:>10d} B  跳过（预计超过 {budget_s} 秒）")
+                continue
+            msg = os.urandom(size)
+            samples = time_calls(fn, msg, repeat, min_time_ns)
+            median = statistics.median(samples)
+            row = {
+                'kind': 'hash',
+                'impl': name,
+                'size': size,
+                'calls': len(samples),
+                'ns_min': min(samples),
+                'ns_median': median,
+                'mb_per_s': size / median * 1e9 / 1024 / 1024 if size else None,
+                'cycles_per_byte': median * ghz / size if size and ghz else None,
+            }
+            rows.append(row)
+            if size:
+                ns_per_byte = median / size
+            cpb = f"{row['cycles_per_byte']:.1f} cpb" if row['cycles_per_byte'] else ""
+            mbs = f"{row['mb_per_s']:.3f} MB/s" if row['mb_per_s'] else ""
+            print(f"  {name:16s} {size:>10d} B  {median / 1e3:12.1f} us/次  {mbs:>14s}  {cpb}")
+    return rows
+
+
+# ========================
+# Part 3: Merkle 树构建 / 证明 / 验证
+# ========================
+
+def bench_merkle(sizes, queries, budget_s):
+    rows = []
+    s_per_leaf = None
+    for n in sizes:
+        if s_per_leaf is not None and s_per_leaf * n > budget_s:
+            print(f"  Merkle {n:>9d} 叶子  跳过（预计超过 {budget_s} 秒）")
+            continue
+        leaves = [f"leaf{i}".encode() for i in range(n)]
+        t0 = time.perf_counter_ns()
+        mt = MerkleTree(leaves)
+        build_ns = time.perf_counter_ns() - t0
+        s_per_leaf = build_ns / 1e9 / n
+
+        root = mt.get_root()
+        idx = [random.randrange(n) for _ in range(queries)]
+        t0 = time.perf_counter_ns()
+        proofs = [mt.get_proof(i) for i in idx]
+        proof_ns = time.perf_counter_ns() - t0
+        t0 = time.perf_counter_ns()
+        ok = all(MerkleTree.verify_proof(leaves[i], p, root, i) for i, p in zip(idx, proofs))
+        verify_ns = time.perf_counter_ns() - t0
+
+        row = {
+            'kind': 'merkle',
+            'leaves': n,
+            'build_s': build_ns / 1e9,
+            'build_leaves_per_s': n / build_ns * 1e9,
+            'proof_per_s': queries / proof_ns * 1e9,
+            'verify_per_s': queries / verify_ns * 1e9,
+            'verified': ok,
+        }
+        rows.append(row)
+        print(f"  Merkle {n:>9d} 叶子  构建 {row['build_s']:8.2f} 秒  "
+              f"证明 {row['proof_per_s']:10.0f} 次/秒  验证 {row['verify_per_s']:8.0f} 次/秒  {ok}")
+        del mt, leaves, proofs
+    return rows
+
+
+# ========================
+# 命令行
+# ========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SM3 各后端与 Merkle 树性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="消息长度 (字节)")
+    parser.add_argument("--merkle", type=int, nargs="*", default=MERKLE_SIZES, help="Merkle 叶子数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个组合至少调用次数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每个组合至少计时秒数")
+    parser.add_argument("--budget", type=float, default=60, help="单个组合的预计耗时上限 (秒)")
+    parser.add_argument("--queries", type=int, default=1000, help="Merkle 证明/验证次数")
+    parser.add_argument("--cpu-ghz", type=float, default=None, help="CPU 主频，默认读取 /proc/cpuinfo")
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    parser.add_argument("--csv", help="结果写入 CSV 文件")
+    args = parser.parse_args()
+
+    ghz = args.cpu_ghz or cpu_ghz()
+    print(f"[环境] Python {platform.python_version()}, CPU {ghz or '未知'} GHz")
+
+    print("[哈希] 单次调用延迟与吞吐量")
+    rows = bench_hash(sorted(args.sizes), args.repeat, int(args.min_time * 1e9), args.budget, ghz)
+    print("[Merkle] 构建 / 证明 / 验证")
+    rows += bench_merkle(sorted(args.merkle), args.queries, args.budget)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'cpu_ghz': ghz, 'results': rows}, f, indent=1)
+        print("[结果已保存]", args.json)
+    if args.csv:
+        fields = []
+        for row in rows:
+            fields += [k for k in row if k not in fields]
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        print("[结果已保存]", args.csv)
@@ -0,0 +1,196 @@
+import argparse
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from merkle_tree import MerkleTree
+from sm3 import sm3_digest, sm3_hash
+
+
+# ========================
+# Part 1: 分块哈希（在工作进程中执行）
+# ========================
+
+CHUNK_SIZE = 1 << 20   # 默认 1 MiB 一块
+TASK_CHUNKS = 8        # 每个任务处理的块数
+MANIFEST_VERSION = 1
+
+
+def chunk_count(size, chunk_size):
+    """空文件也按一个空块处理，保证每个文件都有根"""
+    return max(1, (size + chunk_size - 1) // chunk_size)
+
+
+def hash_chunks(path, chunk_size, first, count):
+    """计算文件中第 first 块起的 count 个块的 SM3，返回 bytes 列表"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return [sm3_digest(b'')]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            out = []
+            for i in range(first, first + count):
+                out.append(sm3_digest(mm[i * chunk_size:(i + 1) * chunk_size]))
+            return out
+
+
+def file_root(chunk_hashes):
+    """单个文件的根：以各块哈希为叶子的 Merkle 树"""
+    return MerkleTree(chunk_hashes).get_root()
+
+
+def directory_root(files):
+    """目录根：叶子为按路径排序的 路径 || 0x00 || 文件根"""
+    leaves = [p.encode() + b'\x00' + bytes.fromhex(files[p]['root']) for p in sorted(files)]
+    if not leaves:
+        return sm3_hash(b'')
+    return MerkleTree(leaves).get_root()
+
+
+# ========================
+# Part 2: 目录扫描
+# ========================
+
+def walk_files(root):
+    """返回 {相对路径: os.stat_result}，路径统一用 '/' 分隔"""
+    found = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            if not os.path.isfile(full) or os.path.islink(full):
+                continue
+            rel = os.path.relpath(full, root).replace(os.sep, '/')
+            found[rel] = os.stat(full)
+    return found
+
+
+def hash_files(root, paths, sizes, chunk_size, workers=None):
+    """并行计算 paths 中每个文件的全部块哈希，返回 {路径: [块哈希]}"""
+    if not paths:
+        return {}  # 没有需要重算的文件，不必启动进程池
+    results = {p: [None] * chunk_count(sizes[p], chunk_size) for p in paths}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for p in paths:
+            n = len(results[p])
+            for first in range(0, n, TASK_CHUNKS):
+                count = min(TASK_CHUNKS, n - first)
+                fut = pool.submit(hash_chunks, os.path.join(root, p), chunk_size, first, count)
+                futures.append((p, first, fut))
+        for p, first, fut in futures:
+            digests = fut.result()
+            results[p][first:first + len(digests)] = digests
+    return results
+
+
+def scan(root, old_manifest=None, chunk_size=CHUNK_SIZE, workers=None, full=False):
+    """生成新清单。size 与 mtime 均未变化的文件直接沿用旧清单中的结果，不重新读取。
+    返回 (manifest, 重新计算的文件列表)"""
+    stats = walk_files(root)
+    old_files = {}
+    if old_manifest and old_manifest.get('chunk_size') == chunk_size and not full:
+        old_files = old_manifest['files']
+
+    files = {}
+    todo = []
+    for p, st in stats.items():
+        old = old_files.get(p)
+        if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+            files[p] = old
+        else:
+            todo.append(p)
+
+    hashed = hash_files(root, todo, {p: stats[p].st_size for p in todo}, chunk_size, workers)
+    for p in todo:
+        chunks = hashed[p]
+        files[p] = {
+            'size': stats[p].st_size,
+            'mtime_ns': stats[p].st_mtime_ns,
+            'root': file_root(chunks),
+            'chunks': [c.hex() for c in chunks],
+        }
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'chunk_size': chunk_size,
+        'root': directory_root(files),
+        'files': {p: files[p] for p in sorted(files)},
+    }
+    return manifest, sorted(todo)
+
+
+def diff_manifests(old, new):
+    """比较两份清单，返回 (新增, 删除, 内容改变) 三个路径列表"""
+    old_files, new_files = old['files'], new['files']
+    added = sorted(set(new_files) - set(old_files))
+    removed = sorted(set(old_files) - set(new_files))
+    modified = sorted(p for p in set(old_files) & set(new_files)
+                      if old_files[p]['root'] != new_files[p]['root'])
+    return added, removed, modified
+
+
+def changed_chunks(old_entry, new_entry):
+    """内容改变的文件中，哪些块与原来不同"""
+    old_c, new_c = old_entry['chunks'], new_entry['chunks']
+    return [i for i in range(max(len(old_c), len(new_c)))
+            if i >= len(old_c) or i >= len(new_c) or old_c[i] != new_c[i]]
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"{path}: 不支持的清单版本")
+    return manifest
+
+
+def save_manifest(manifest, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+# ========================
+# 命令行
+# ========================
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="基于 SM3 与 Merkle 树的目录完整性扫描")
+    parser.add_argument("command", choices=["scan", "verify"],
+                        help="scan: 生成/增量更新清单; verify: 与清单比对")
+    parser.add_argument("directory")
+    parser.add_argument("-m", "--manifest", required=True, help="清单文件路径 (JSON)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认 CPU 核数")
+    parser.add_argument("--full", action="store_true", help="忽略 size/mtime，全部重新计算")
+    args = parser.parse_args()
+
+    old = load_manifest(args.manifest) if os.path.exists(args.manifest) else None
+    if args.command == "verify" and old is None:
+        parser.error(f"{args.manifest} 不存在，请先执行 scan")
+    chunk_size = old['chunk_size'] if args.command == "verify" else args.chunk_size
+
+    t1 = time.time()
+    new, rehashed = scan(args.directory, old, chunk_size, args.workers, args.full)
+    t2 = time.time()
+    print(f"[扫描] {len(new['files'])} 个文件, 重新计算 {len(rehashed)} 个, 耗时 {t2 - t1:.2f} 秒")
+    print("[目录根]", new['root'])
+
+    if args.command == "scan":
+        save_manifest(new, args.manifest)
+        print("[清单已保存]", args.manifest)
+    else:
+        added, removed, modified = diff_manifests(old, new)
+        for p in added:
+            print("  新增:", p)
+        for p in removed:
+            print("  删除:", p)
+        for p in modified:
+            print("  修改:", p, "块", changed_chunks(old['files'][p], new['files'][p]))
+        ok = new['root'] == old['root']
+        print("[完整性验证结果]", ok)
+        raise SystemExit(0 if ok else 1)
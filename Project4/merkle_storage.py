@@ -0,0 +1,219 @@
+import mmap
+import os
+import struct
+
+from merkle_tree import MerkleTree
+from sm3 import sm3_digest_many
+
+
+# ========================
+# Part 1: 磁盘格式
+# ========================
+#
+# 每一层一个文件 level_XXX.bin：
+#   32 字节头部 | count 个 32 字节哈希（同层节点按下标顺序紧密排列）
+# 头部: magic(8) | version(2) | level(2) | num_levels(2) | 保留(2) | count(8) | 保留(8)
+
+MAGIC = b'SM3MKLV1'
+VERSION = 1
+HASH_SIZE = 32
+HEADER = struct.Struct(">8sHHH2xQ8x")
+WRITE_BATCH = 4096  # 每次写盘的节点数
+
+
+def level_path(directory, level):
+    return os.path.join(directory, f"level_{level:03d}.bin")
+
+
+def num_levels_for(count):
+    """count 个叶子的树共有多少层（含叶子层与根）"""
+    return (count - 1).bit_length() + 1
+
+
+def _write_header(f, level, num_levels, count):
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, level, num_levels, count))
+
+
+# ========================
+# Part 2: 写入
+# ========================
+
+def save_tree(tree, directory):
+    """把内存中的 MerkleTree 按层写入 directory"""
+    os.makedirs(directory, exist_ok=True)
+    num_levels = len(tree.levels)
+    for lv, level in enumerate(tree.levels):
+        with open(level_path(directory, lv), 'wb') as f:
+            _write_header(f, lv, num_levels, len(level))
+            for i in range(0, len(level), WRITE_BATCH):
+                f.write(b''.join(level[i:i + WRITE_BATCH]))
+
+
+def build_tree_on_disk(leaves, directory):
+    """流式构建：叶子可以是任意可迭代对象，内存中只保留一个写缓冲区。
+    上一层通过 mmap 读取，逐层生成下一层，适合内存放不下的大树。"""
+    os.makedirs(directory, exist_ok=True)
+
+    # 叶子层：先写占位头部，写完后回填 count
+    count = 0
+    with open(level_path(directory, 0), 'wb') as f:
+        _write_header(f, 0, 0, 0)
+        buf = []
+        for leaf in leaves:
+            buf.append(leaf)
+            if len(buf) == WRITE_BATCH:
+                f.write(b''.join(sm3_digest_many(buf)))
+                count += len(buf)
+                buf = []
+        f.write(b''.join(sm3_digest_many(buf)))
+        count += len(buf)
+        if count == 0:
+            raise ValueError("Merkle 树至少需要一个叶子")
+        num_levels = num_levels_for(count)
+        _write_header(f, 0, num_levels, count)
+
+    # 内部节点层：与 MerkleTree.build_tree 相同，奇数个节点时最后一个与自身配对
+    for lv in range(1, num_levels):
+        prev = MmapLevel(level_path(directory, lv - 1))
+        try:
+            prev_count = len(prev)
+            new_count = (prev_count + 1) // 2
+            with open(level_path(directory, lv), 'wb') as f:
+                _write_header(f, lv, num_levels, new_count)
+                buf = []
+                for i in range(0, prev_count, 2):
+                    left = prev[i]
+                    right = prev[i + 1] if i + 1 < prev_count else left
+                    buf.append(left + right)
+                    if len(buf) == WRITE_BATCH:
+                        f.write(b''.join(sm3_digest_many(buf)))
+                        buf = []
+                f.write(b''.join(sm3_digest_many(buf)))
+        finally:
+            prev.close()
+
+
+# ========================
+# Part 3: mmap 读取
+# ========================
+
+class MmapLevel:
+    """单层文件的只读 mmap 视图，按下标取 32 字节哈希"""
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: 空文件")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: 文件短于头部")
+        magic, version, self.level, self.num_levels, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: 不是 Merkle 层文件")
+        if len(self._mm) != HEADER.size + self.count * HASH_SIZE:
+            self.close()
+            raise ValueError(f"{path}: 文件长度与头部不符")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        off = HEADER.size + i * HASH_SIZE
+        return self._mm[off:off + HASH_SIZE]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+class MmapMerkleTree:
+    """打开 save_tree / build_tree_on_disk 写出的目录。
+    打开时只读取各层头部，get_proof 只访问 O(log n) 个磁盘页。"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.levels = []
+        try:
+            first = MmapLevel(level_path(directory, 0))
+            self.levels.append(first)
+            for lv in range(1, first.num_levels):
+                level = MmapLevel(level_path(directory, lv))
+                if level.level != lv or level.num_levels != first.num_levels:
+                    level.close()
+                    raise ValueError(f"{level.path}: 层号不一致")
+                self.levels.append(level)
+        except Exception:
+            self.close()
+            raise
+        if len(self.levels[-1]) != 1:
+            self.close()
+            raise ValueError(f"{directory}: 根层节点数不为 1")
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for level in self.levels:
+            level.close()
+        self.levels = []
+
+    def get_root(self):
+        return self.levels[-1][0].hex()
+
+    def get_proof(self, index):
+        """与 MerkleTree.get_proof 输出相同，可直接交给 MerkleTree.verify_proof"""
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            # 奇数层的最后一个节点与自身配对
+            proof.append(level[sibling] if sibling < len(level) else level[index])
+            index >>= 1
+        return proof
+
+
+# ========================
+# 测试示例
+# ========================
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    N = 10**4
+    leaves = [f"leaf{i}".encode() for i in range(N)]
+    mt = MerkleTree(leaves)
+
+    with tempfile.TemporaryDirectory() as d:
+        save_tree(mt, os.path.join(d, "saved"))
+        t1 = time.time()
+        build_tree_on_disk(iter(leaves), os.path.join(d, "streamed"))
+        t2 = time.time()
+        print(f"[流式构建] {N} 叶子写盘耗时 {t2 - t1:.2f} 秒")
+
+        for name in ("saved", "streamed"):
+            t1 = time.perf_counter()
+            with MmapMerkleTree(os.path.join(d, name)) as disk:
+                t2 = time.perf_counter()
+                root = disk.get_root()
+                proof = disk.get_proof(1234)
+                print(f"[{name}] 打开耗时 {(t2 - t1) * 1e3:.2f} ms, 根一致: {root == mt.get_root()}")
+                print(f"[{name}] 证明一致: {proof == mt.get_proof(1234)}, 验证:",
+                      MerkleTree.verify_proof(leaves[1234], proof, root, 1234))
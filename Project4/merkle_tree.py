@@ -1,135 +1,69 @@
-import struct
-import math
 import random
-import hashlib
+import sys
+from bisect import bisect_left
+from collections import OrderedDict
 
-
-# ========================
-# Part 1: 基础版 SM3 实现
-# ========================
-
-IV = [
-    0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
-    0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E
-]
-
-T_j = [0x79CC4519] * 16 + [0x7A879D8A] * 48
-
-def _rotl(x, n):
-    return ((x << n) & 0xFFFFFFFF) | ((x & 0xFFFFFFFF) >> (32 - n))
-
-def _P0(x):
-    return x ^ _rotl(x, 9) ^ _rotl(x, 17)
-
-def _P1(x):
-    return x ^ _rotl(x, 15) ^ _rotl(x, 23)
-
-def _FFj(x, y, z, j):
-    return (x ^ y ^ z) if j <= 15 else ((x & y) | (x & z) | (y & z))
-
-def _GGj(x, y, z, j):
-    return (x ^ y ^ z) if j <= 15 else ((x & y) | (~x & z))
-
-def sm3_pad(msg: bytes):
-    l = len(msg) * 8
-    msg += b'\x80'
-    msg += b'\x00' * ((56 - (len(msg) % 64)) % 64)
-    msg += struct.pack(">Q", l)
-    return msg
-
-def sm3_msg_extend(B):
-    W = list(struct.unpack(">16I", B))
-    for j in range(16, 68):
-        W.append(_P1(W[j-16] ^ W[j-9] ^ _rotl(W[j-3], 15)) ^ _rotl(W[j-13], 7) ^ W[j-6])
-    W_ = [(W[j] ^ W[j+4]) & 0xFFFFFFFF for j in range(64)]
-    return W, W_
-
-def sm3_cf(V, B):
-    A, B_, C, D, E, F, G, H = V
-    W, W_ = sm3_msg_extend(B)
-    for j in range(64):
-        SS1 = _rotl((_rotl(A, 12) + E + _rotl(T_j[j], j % 32)) & 0xFFFFFFFF, 7)
-        SS2 = SS1 ^ _rotl(A, 12)
-        TT1 = (_FFj(A, B_, C, j) + D + SS2 + W_[j]) & 0xFFFFFFFF
-        TT2 = (_GGj(E, F, G, j) + H + SS1 + W[j]) & 0xFFFFFFFF
-        D = C
-        C = _rotl(B_, 9)
-        B_ = A
-        A = TT1
-        H = G
-        G = _rotl(F, 19)
-        F = E
-        E = _P0(TT2)
-    return [(v ^ x) & 0xFFFFFFFF for v, x in zip(V, [A, B_, C, D, E, F, G, H])]
-
-def sm3_hash(msg: bytes):
-    msg = sm3_pad(msg)
-    V = IV[:]
-    for i in range(0, len(msg), 64):
-        V = sm3_cf(V, msg[i:i+64])
-    return ''.join(f'{x:08x}' for x in V)
-
-
-# ========================
-# Part 2: 优化版 SM3（Python 算法优化）
-# ========================
-
-def sm3_hash_fast(msg: bytes):
-    """减少局部变量创建 & 避免不必要的列表"""
-    msg = sm3_pad(msg)
-    V = IV[:]
-    for i in range(0, len(msg), 64):
-        W = list(struct.unpack(">16I", msg[i:i+64]))
-        for j in range(16, 68):
-            p1 = W[j-16] ^ W[j-9] ^ _rotl(W[j-3], 15)
-            p1 = p1 ^ _rotl(p1, 15) ^ _rotl(p1, 23)
-            W.append((p1 ^ _rotl(W[j-13], 7) ^ W[j-6]) & 0xFFFFFFFF)
-        W_ = [(W[j] ^ W[j+4]) & 0xFFFFFFFF for j in range(64)]
-        A, B_, C, D, E, F, G, H = V
-        for j in range(64):
-            SS1 = _rotl((_rotl(A, 12) + E + _rotl(T_j[j], j % 32)) & 0xFFFFFFFF, 7)
-            SS2 = SS1 ^ _rotl(A, 12)
-            TT1 = (_FFj(A, B_, C, j) + D + SS2 + W_[j]) & 0xFFFFFFFF
-            TT2 = (_GGj(E, F, G, j) + H + SS1 + W[j]) & 0xFFFFFFFF
-            D, C, B_, A = C, _rotl(B_, 9), A, TT1
-            H, G, F, E = G, _rotl(F, 19), E, _P0(TT2)
-        V = [(v ^ x) & 0xFFFFFFFF for v, x in zip(V, [A, B_, C, D, E, F, G, H])]
-    return ''.join(f'{x:08x}' for x in V)
+from sm3 import sm3_digest, sm3_digest_many
 
 
 # ========================
-# Part 3: 长度扩展攻击
+# Part 1: Merkle Tree
 # ========================
 
-def sm3_len_ext_attack(orig_hash, orig_len, append_msg):
-    """orig_hash: 已知的哈希 (hex)
-       orig_len: 原消息长度 (字节)
-       append_msg: 想追加的数据 (bytes)
-    """
-    # 还原中间状态
-    state = [int(orig_hash[i:i+8], 16) for i in range(0, 64, 8)]
+def level_sizes(n):
+    """n 个叶子时自底向上每层的节点数"""
+    sizes = [n]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+class NodeCache:
+    """内部节点缓存：以 64 字节的 (左子 || 右子) 为键，值为父节点哈希。
+    多棵共享子树的 Merkle 树可共用一个缓存；超出内存预算时按 LRU 淘汰。"""
+
+    # 每个条目的估算内存：键、值两个 bytes 对象加上 OrderedDict 的链表/哈希表开销
+    ENTRY_COST = sys.getsizeof(b'\x00' * 64) + sys.getsizeof(b'\x00' * 32) + 112
+
+    def __init__(self, memory_budget=64 * 1024 * 1024):
+        self.max_entries = max(1, memory_budget // self.ENTRY_COST)
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def hash_pairs(self, pairs):
+        """计算一层的父节点：先查缓存，未命中的部分批量计算后写回"""
+        data = self._data
+        out = [data.get(p) for p in pairs]
+        missing = [i for i, d in enumerate(out) if d is None]
+        for i, d in enumerate(out):
+            if d is not None:
+                data.move_to_end(pairs[i])
+        self.hits += len(pairs) - len(missing)
+        self.misses += len(missing)
+        for i, d in zip(missing, sm3_digest_many([pairs[i] for i in missing])):
+            out[i] = d
+            data[pairs[i]] = d
+        overflow = len(data) - self.max_entries
+        for _ in range(max(0, overflow)):
+            data.popitem(last=False)
+        self.evictions += max(0, overflow)
+        return out
 
-    # 构造 padding（针对原消息）
-    glue_padding = sm3_pad(b'A' * orig_len)[orig_len:]
-
-    # 计算新哈希
-    new_msg_len = orig_len + len(glue_padding) + len(append_msg)
-    append_padded = append_msg
-    append_padded = sm3_pad(append_padded)
-    V = state[:]
-    for i in range(0, len(append_padded), 64):
-        V = sm3_cf(V, append_padded[i:i+64])
-    new_hash = ''.join(f'{x:08x}' for x in V)
-    return new_hash, glue_padding
-
-
-# ========================
-# Part 4: Merkle Tree
-# ========================
 
 class MerkleTree:
-    def __init__(self, leaves):
-        self.leaves = [bytes.fromhex(sm3_hash(l)) for l in leaves]
+    def __init__(self, leaves, cache=None):
+        self.cache = cache
+        self.leaves = sm3_digest_many(list(leaves))
         self.levels = []
         self.build_tree()
 
@@ -137,14 +71,12 @@ class MerkleTree:
         level = self.leaves
         self.levels.append(level)
         while len(level) > 1:
-            new_level = []
-            for i in range(0, len(level), 2):
-                if i+1 < len(level):
-                    combined = level[i] + level[i+1]
-                else:
-                    combined = level[i] + level[i]
-                new_level.append(bytes.fromhex(sm3_hash(combined)))
-            level = new_level
+            combined = [level[i] + (level[i + 1] if i + 1 < len(level) else level[i])
+                        for i in range(0, len(level), 2)]
+            if self.cache is not None:
+                level = self.cache.hash_pairs(combined)
+            else:
+                level = sm3_digest_many(combined)
             self.levels.append(level)
 
     def get_root(self):
@@ -154,22 +86,170 @@ class MerkleTree:
         proof = []
         for level in self.levels[:-1]:
             sibling = index ^ 1
-            if sibling < len(level):
-                proof.append(level[sibling])
+            # 奇数层的最后一个节点与自身配对
+            proof.append(level[sibling] if sibling < len(level) else level[index])
             index >>= 1
         return proof
 
+    def get_multiproof(self, indices):
+        """多叶子存在性证明：只给出验证方无法自行算出的兄弟节点。
+        返回按层、层内按下标升序排列的哈希列表。"""
+        known = sorted(set(indices))
+        if not known or known[0] < 0 or known[-1] >= len(self.leaves):
+            raise IndexError("indices 超出范围")
+        proof = []
+        for level in self.levels[:-1]:
+            known_set = set(known)
+            for pos in known:
+                sibling = pos ^ 1
+                if sibling < len(level) and sibling not in known_set:
+                    proof.append(level[sibling])
+            known = sorted({p >> 1 for p in known})
+        return proof
+
     @staticmethod
     def verify_proof(leaf, proof, root, index):
-        h = bytes.fromhex(sm3_hash(leaf))
+        h = sm3_digest(leaf)
         for p in proof:
             if index % 2 == 0:
-                h = bytes.fromhex(sm3_hash(h + p))
+                h = sm3_digest(h + p)
             else:
-                h = bytes.fromhex(sm3_hash(p + h))
+                h = sm3_digest(p + h)
             index >>= 1
         return h.hex() == root
 
+    @staticmethod
+    def verify_multiproof(leaves, indices, proof, root, n):
+        """验证 get_multiproof 的输出。
+        leaves 与 indices 一一对应，n 为树的叶子总数。
+        每个内部节点只计算一次，同一层的哈希一次批量完成。"""
+        if len(leaves) != len(indices) or not indices:
+            return False
+        pairs = sorted(zip(indices, leaves))
+        if pairs[0][0] < 0 or pairs[-1][0] >= n:
+            return False
+        if any(pairs[i][0] == pairs[i + 1][0] for i in range(len(pairs) - 1)):
+            return False
+        positions = [p for p, _ in pairs]
+        hashes = sm3_digest_many([l for _, l in pairs])
+        it = iter(proof)
+        try:
+            for size in level_sizes(n)[:-1]:
+                nodes = dict(zip(positions, hashes))
+                parents, combined = [], []
+                for pos in positions:
+                    if pos & 1 and pos - 1 in nodes:
+                        continue  # 已在左兄弟处合并
+                    if pos & 1:
+                        combined.append(next(it) + nodes[pos])
+                    elif pos + 1 in nodes:
+                        combined.append(nodes[pos] + nodes[pos + 1])
+                    elif pos + 1 >= size:
+                        combined.append(nodes[pos] + nodes[pos])
+                    else:
+                        combined.append(nodes[pos] + next(it))
+                    parents.append(pos >> 1)
+                positions = parents
+                hashes = sm3_digest_many(combined)
+        except StopIteration:
+            return False
+        if next(it, None) is not None:
+            return False
+        return hashes[0].hex() == root
+
+
+# ========================
+# Part 2: 排序 Merkle Tree（不存在性证明）
+# ========================
+
+class SortedMerkleTree(MerkleTree):
+    """叶子排序去重后再建树：排序后的第 i 个叶子就是树中第 i 个位置，
+    查找相邻叶子只需一次二分，不再需要额外的下标查找。"""
+
+    def __init__(self, leaves, cache=None):
+        self.sorted_leaves = sorted(set(leaves))
+        super().__init__(self.sorted_leaves, cache)
+
+    def _neighbours(self, element):
+        """返回 element 应插入的位置；element 已存在时返回 None"""
+        i = bisect_left(self.sorted_leaves, element)
+        if i < len(self.sorted_leaves) and self.sorted_leaves[i] == element:
+            return None
+        return i
+
+    def get_non_inclusion_proof(self, element):
+        """返回 (前驱叶子, 证明, 下标), (后继叶子, 证明, 下标)；element 存在时返回 None"""
+        i = self._neighbours(element)
+        if i is None:
+            return None
+        prev = next_ = (None, None, None)
+        if i > 0:
+            prev = (self.sorted_leaves[i - 1], self.get_proof(i - 1), i - 1)
+        if i < len(self.sorted_leaves):
+            next_ = (self.sorted_leaves[i], self.get_proof(i), i)
+        return prev, next_
+
+    @staticmethod
+    def _check_bounds(element, prev_leaf, prev_idx, next_leaf, next_idx, n):
+        """前驱、后继必须在树中相邻，且 element 严格位于两者之间"""
+        if prev_leaf is None and next_leaf is None:
+            return False
+        if prev_leaf is None:
+            return next_idx == 0 and element < next_leaf
+        if next_leaf is None:
+            return prev_idx == n - 1 and prev_leaf < element
+        return next_idx == prev_idx + 1 and prev_leaf < element < next_leaf
+
+    @staticmethod
+    def verify_non_inclusion_proof(element, prev_proof, next_proof, root, n):
+        """n 为叶子总数，用于检查首尾边界"""
+        prev_leaf, prev_pf, prev_idx = prev_proof
+        next_leaf, next_pf, next_idx = next_proof
+        if not SortedMerkleTree._check_bounds(element, prev_leaf, prev_idx, next_leaf, next_idx, n):
+            return False
+        if prev_leaf is not None and not MerkleTree.verify_proof(prev_leaf, prev_pf, root, prev_idx):
+            return False
+        if next_leaf is not None and not MerkleTree.verify_proof(next_leaf, next_pf, root, next_idx):
+            return False
+        return True
+
+    def get_non_inclusion_proofs(self, elements):
+        """批量不存在性证明。
+        返回 (bounds, indices, leaves, proof)：
+            bounds[i] 为 elements[i] 的 (前驱下标, 后继下标)，元素存在时为 None，
+            indices/leaves 为用到的全部相邻叶子，proof 为它们的合并证明。"""
+        n = len(self.sorted_leaves)
+        bounds = []
+        needed = set()
+        for e in elements:
+            i = self._neighbours(e)
+            if i is None:
+                bounds.append(None)
+                continue
+            b = (i - 1 if i > 0 else None, i if i < n else None)
+            needed.update(j for j in b if j is not None)
+            bounds.append(b)
+        indices = sorted(needed)
+        leaves = [self.sorted_leaves[j] for j in indices]
+        proof = self.get_multiproof(indices) if indices else []
+        return bounds, indices, leaves, proof
+
+    @staticmethod
+    def verify_non_inclusion_proofs(elements, bounds, indices, leaves, proof, root, n):
+        """返回每个元素的验证结果列表；合并证明只验证一次"""
+        if not indices or not MerkleTree.verify_multiproof(leaves, indices, proof, root, n):
+            return [False] * len(elements)
+        leaf_at = dict(zip(indices, leaves))
+        results = []
+        for e, b in zip(elements, bounds):
+            if b is None:
+                results.append(False)
+                continue
+            prev_idx, next_idx = b
+            results.append(SortedMerkleTree._check_bounds(
+                e, leaf_at.get(prev_idx), prev_idx, leaf_at.get(next_idx), next_idx, n))
+        return results
+
 
 # ========================
 # 测试示例
@@ -178,10 +258,37 @@ if __name__ == "__main__":
 
     msg = b"abc"
 
-    # Part 4: Merkle Tree
+    # Part 1: Merkle Tree
     leaves = [f"leaf{i}".encode() for i in range(10**5)]
     mt = MerkleTree(leaves)
     root = mt.get_root()
     proof = mt.get_proof(1234)
     print("Merkle Root:", root)
     print("验证:", MerkleTree.verify_proof(b"leaf1234", proof, root, 1234))
+
+    # 多叶子证明 vs k 个单独证明
+    import time
+    for k in (16, 256, 1024):
+        idx = sorted(random.sample(range(len(leaves)), k))
+        single = [mt.get_proof(i) for i in idx]
+        multi = mt.get_multiproof(idx)
+        t1 = time.perf_counter()
+        ok1 = all(MerkleTree.verify_proof(leaves[i], p, root, i) for i, p in zip(idx, single))
+        t2 = time.perf_counter()
+        ok2 = MerkleTree.verify_multiproof([leaves[i] for i in idx], idx, multi, root, len(leaves))
+        t3 = time.perf_counter()
+        print(f"[k={k}] 单独证明 {sum(map(len, single)) * 32} 字节 / {t2 - t1:.3f} 秒 {ok1}; "
+              f"多叶子证明 {len(multi) * 32} 字节 / {t3 - t2:.3f} 秒 {ok2}")
+
+    # 排序 Merkle Tree 不存在性证明
+    smt = SortedMerkleTree(leaves)
+    sroot = smt.get_root()
+    prev_pf, next_pf = smt.get_non_inclusion_proof(b"no_such_leaf")
+    print("不存在性验证:", SortedMerkleTree.verify_non_inclusion_proof(
+        b"no_such_leaf", prev_pf, next_pf, sroot, len(leaves)))
+    queries = [f"absent{i}".encode() for i in range(1000)]
+    t1 = time.perf_counter()
+    batch = smt.get_non_inclusion_proofs(queries)
+    results = SortedMerkleTree.verify_non_inclusion_proofs(queries, *batch, sroot, len(leaves))
+    t2 = time.perf_counter()
+    print(f"批量不存在性验证: {sum(results)}/{len(queries)} 通过, 耗时 {t2 - t1:.3f} 秒")
@@ -0,0 +1,84 @@
+"""SM3 公共实现，Project4 中所有脚本都从这里导入。
+
+三种后端：
+    reference  基础版，逐步对照 GM/T 0004-2012
+    optimized  优化版标量实现
+    numpy      多缓冲 NumPy 实现，一次计算大量消息（需要安装 NumPy）
+默认为 auto：单条用 optimized，批量足够大时用 numpy。
+"""
+from collections import namedtuple
+
+from .reference import IV, T_j, sm3_pad, sm3_cf
+from .reference import sm3_hash as sm3_hash_ref
+from .optimized import sm3_cf_fast, sm3_digest_fast, sm3_hash_fast, padding, compress, finish
+from .hasher import SM3
+
+try:
+    from . import multibuffer
+except ImportError:  # 未安装 NumPy
+    multibuffer = None
+
+
+Backend = namedtuple("Backend", "name digest digest_many")
+
+BACKENDS = {
+    "reference": Backend(
+        "reference",
+        lambda m: bytes.fromhex(sm3_hash_ref(m)),
+        lambda msgs: [bytes.fromhex(sm3_hash_ref(m)) for m in msgs]),
+    "optimized": Backend(
+        "optimized",
+        sm3_digest_fast,
+        lambda msgs: [sm3_digest_fast(m) for m in msgs]),
+}
+if multibuffer is not None:
+    BACKENDS["numpy"] = Backend(
+        "numpy",
+        lambda m: multibuffer.sm3_hash_many([m])[0],
+        multibuffer.sm3_hash_many)
+
+BATCH_MIN = 16  # 批量少于该数量时标量实现更快
+
+# 默认的 "auto"：单条消息用优化版，批量不少于 BATCH_MIN 条时用多缓冲实现
+AUTO = Backend("auto", sm3_digest_fast, BACKENDS["optimized"].digest_many)
+
+_default = AUTO
+
+
+def get_backend(name):
+    if name == "auto":
+        return AUTO
+    if name not in BACKENDS:
+        raise ValueError(f"未知的 SM3 后端: {name}，可选 {sorted(BACKENDS) + ['auto']}")
+    return BACKENDS[name]
+
+
+def set_backend(name):
+    """切换 sm3_hash / sm3_digest / sm3_digest_many 使用的后端，"auto" 恢复默认"""
+    global _default
+    _default = get_backend(name)
+
+
+def use_multibuffer(count):
+    """当前后端下 count 条消息的批量计算是否走多缓冲实现：
+    只有选中 numpy 后端，或 auto 且数量足够时才走"""
+    if multibuffer is None:
+        return False
+    if _default is AUTO:
+        return count >= BATCH_MIN
+    return _default.name == "numpy"
+
+
+def sm3_digest(msg):
+    return _default.digest(msg)
+
+
+def sm3_hash(msg):
+    return _default.digest(msg).hex()
+
+
+def sm3_digest_many(msgs):
+    """批量计算，返回 bytes 摘要列表。批量足够大（或选中 numpy 后端）时使用多缓冲实现。"""
+    if use_multibuffer(len(msgs)):
+        return multibuffer.sm3_hash_many(msgs)
+    return _default.digest_many(msgs)
@@ -0,0 +1,40 @@
+from .optimized import IV, compress, finish
+
+
+class SM3:
+    """hashlib 风格的增量 SM3：update / copy / digest / hexdigest。
+    copy() 复制的是链接变量和未满一组的缓冲区，可以把公共前缀
+    （如 HMAC 的 ipad 分组、SM2 的 ZA）只吸收一次，再为每条消息复制后继续。"""
+
+    name = 'sm3'
+    digest_size = 32
+    block_size = 64
+
+    def __init__(self, data=b''):
+        self._V = IV[:]
+        self._buf = b''
+        self._count = 0  # 已压缩的字节数
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        buf = self._buf + bytes(data)
+        full = len(buf) - len(buf) % 64
+        if full:
+            self._V = compress(self._V, buf[:full])
+            self._count += full
+        self._buf = buf[full:]
+        return self
+
+    def copy(self):
+        other = SM3.__new__(SM3)
+        other._V = self._V[:]
+        other._buf = self._buf
+        other._count = self._count
+        return other
+
+    def digest(self):
+        return finish(self._V, self._buf, self._count)
+
+    def hexdigest(self):
+        return self.digest().hex()
@@ -0,0 +1,89 @@
+import struct
+
+import numpy as np
+
+from .reference import IV, T_j, _rotl
+
+
+# ========================
+# 多缓冲 SM3（NumPy 向量化）
+# ========================
+# 每一行是一条独立消息的状态，所有消息同时执行 64 轮压缩，
+# 适合大量等长短消息（Merkle 节点、KDF 计数器块等）。
+
+IV_NP = np.array(IV, dtype=np.uint32)
+T_ROT = [np.uint32(_rotl(T_j[j], j % 32)) for j in range(64)]
+
+
+def rotl(x, n):
+    """循环左移（uint32 数组）"""
+    return (x << n) | (x >> (32 - n))
+
+
+def sm3_cf_np(V, B):
+    """批量压缩函数
+    V: (n, 8) uint32 链接变量
+    B: (n, 16) uint32 消息分组（已按大端转成字）
+    返回新的 (n, 8) 链接变量
+    """
+    W = [B[:, j] for j in range(16)]
+    for j in range(16, 68):
+        x = W[j - 16] ^ W[j - 9] ^ rotl(W[j - 3], 15)
+        W.append(x ^ rotl(x, 15) ^ rotl(x, 23) ^ rotl(W[j - 13], 7) ^ W[j - 6])
+
+    A, B_, C, D, E, F, G, H = (V[:, i] for i in range(8))
+    for j in range(64):
+        a12 = rotl(A, 12)
+        SS1 = rotl(a12 + E + T_ROT[j], 7)
+        SS2 = SS1 ^ a12
+        if j < 16:
+            ff = A ^ B_ ^ C
+            gg = E ^ F ^ G
+        else:
+            ff = (A & B_) | (A & C) | (B_ & C)
+            gg = (E & F) | (~E & G)
+        TT1 = ff + D + SS2 + (W[j] ^ W[j + 4])
+        TT2 = gg + H + SS1 + W[j]
+        D, C, B_, A = C, rotl(B_, 9), A, TT1
+        H, G, F, E = G, rotl(F, 19), E, TT2 ^ rotl(TT2, 9) ^ rotl(TT2, 17)
+    return V ^ np.stack([A, B_, C, D, E, F, G, H], axis=1)
+
+
+def pad_many(msgs, prefix_len=0):
+    """对一组等长消息做 SM3 填充，返回 (n, blocks*16) uint32 字矩阵。
+    prefix_len: 已经被压缩过的前缀字节数（只影响长度字段），用于从中间状态继续计算。"""
+    L = len(msgs[0])
+    total = prefix_len + L
+    pad = b'\x80' + b'\x00' * ((55 - total) % 64) + struct.pack(">Q", total * 8)
+    buf = b''.join(m + pad for m in msgs)
+    words = np.frombuffer(buf, dtype='>u4').astype(np.uint32)
+    return words.reshape(len(msgs), -1)
+
+
+def sm3_compress_many(V, words):
+    """从状态 V (n, 8) 出发，依次压缩 words (n, blocks*16) 中的每个分组"""
+    for i in range(0, words.shape[1], 16):
+        V = sm3_cf_np(V, words[:, i:i + 16])
+    return V
+
+
+def state_to_digests(V):
+    """(n, 8) 状态 -> n 个 32 字节摘要"""
+    raw = V.astype('>u4').tobytes()
+    return [raw[i:i + 32] for i in range(0, len(raw), 32)]
+
+
+def sm3_hash_many(msgs):
+    """批量 SM3，返回 bytes 摘要列表（顺序与输入一致）。
+    不同长度的消息按长度分组，每组一次向量化计算。"""
+    out = [None] * len(msgs)
+    groups = {}
+    for i, m in enumerate(msgs):
+        groups.setdefault(len(m), []).append(i)
+    for idx in groups.values():
+        words = pad_many([msgs[i] for i in idx])
+        V = np.tile(IV_NP, (len(idx), 1))
+        for i, d in zip(idx, state_to_digests(sm3_compress_many(V, words))):
+            out[i] = d
+    return out
+
@@ -0,0 +1,87 @@
+import struct
+
+from .reference import IV, T_j, _rotl
+
+
+# ========================
+# 优化版 SM3（标量）
+# ========================
+# 与基础版相比：
+#   - 轮常数 T_j <<< j 预先算好
+#   - 循环移位、P0/P1、FF/GG 全部内联，不再有函数调用
+#   - 前 16 轮与后 48 轮拆成两个循环，去掉每轮的 j <= 15 判断
+#   - 直接输出 bytes 摘要，Merkle 等调用方不必再做 hex 往返
+
+M = 0xFFFFFFFF
+T_ROT = [_rotl(T_j[j], j % 32) for j in range(64)]
+_unpack = struct.Struct(">16I").unpack
+_pack = struct.Struct(">8I").pack
+
+
+def sm3_cf_fast(V, B):
+    W = list(_unpack(B))
+    for j in range(16, 68):
+        x = W[j - 16] ^ W[j - 9]
+        w3 = W[j - 3]
+        x ^= ((w3 << 15) | (w3 >> 17)) & M
+        w13 = W[j - 13]
+        W.append(x ^ (((x << 15) | (x >> 17)) & M) ^ (((x << 23) | (x >> 9)) & M)
+                 ^ (((w13 << 7) | (w13 >> 25)) & M) ^ W[j - 6])
+
+    A, B_, C, D, E, F, G, H = V
+    T = T_ROT
+    for j in range(16):
+        a12 = ((A << 12) | (A >> 20)) & M
+        SS1 = (a12 + E + T[j]) & M
+        SS1 = ((SS1 << 7) | (SS1 >> 25)) & M
+        TT1 = ((A ^ B_ ^ C) + D + (SS1 ^ a12) + (W[j] ^ W[j + 4])) & M
+        TT2 = ((E ^ F ^ G) + H + SS1 + W[j]) & M
+        D = C
+        C = ((B_ << 9) | (B_ >> 23)) & M
+        B_ = A
+        A = TT1
+        H = G
+        G = ((F << 19) | (F >> 13)) & M
+        F = E
+        E = TT2 ^ (((TT2 << 9) | (TT2 >> 23)) & M) ^ (((TT2 << 17) | (TT2 >> 15)) & M)
+    for j in range(16, 64):
+        a12 = ((A << 12) | (A >> 20)) & M
+        SS1 = (a12 + E + T[j]) & M
+        SS1 = ((SS1 << 7) | (SS1 >> 25)) & M
+        TT1 = (((A & B_) | (A & C) | (B_ & C)) + D + (SS1 ^ a12) + (W[j] ^ W[j + 4])) & M
+        TT2 = (((E & F) | ((E ^ M) & G)) + H + SS1 + W[j]) & M
+        D = C
+        C = ((B_ << 9) | (B_ >> 23)) & M
+        B_ = A
+        A = TT1
+        H = G
+        G = ((F << 19) | (F >> 13)) & M
+        F = E
+        E = TT2 ^ (((TT2 << 9) | (TT2 >> 23)) & M) ^ (((TT2 << 17) | (TT2 >> 15)) & M)
+    return [V[0] ^ A, V[1] ^ B_, V[2] ^ C, V[3] ^ D, V[4] ^ E, V[5] ^ F, V[6] ^ G, V[7] ^ H]
+
+
+def padding(total_len):
+    """消息总长为 total_len 字节时追加的填充"""
+    return b'\x80' + b'\x00' * ((55 - total_len) % 64) + struct.pack(">Q", total_len * 8)
+
+
+def compress(V, data):
+    """依次压缩 data 中的完整分组（len(data) 须为 64 的倍数）"""
+    for i in range(0, len(data), 64):
+        V = sm3_cf_fast(V, data[i:i + 64])
+    return V
+
+
+def finish(V, data, prefix_len=0):
+    """从状态 V 出发处理剩余数据并填充，prefix_len 为 V 已吸收的字节数，返回 bytes 摘要"""
+    data = data + padding(prefix_len + len(data))
+    return _pack(*compress(V, data))
+
+
+def sm3_digest_fast(msg: bytes):
+    return finish(IV, msg)
+
+
+def sm3_hash_fast(msg: bytes):
+    return sm3_digest_fast(msg).hex()
@@ -1,174 +1,100 @@
-import struct
-import math
-import random
-import hashlib
+from sm3 import sm3_hash, padding, finish, multibuffer, use_multibuffer
+
+if multibuffer is not None:
+    import numpy as np
 
 
 # ========================
-# Part 1: 基础版 SM3 实现
+# Part 1: 长度扩展攻击
 # ========================
 
-IV = [
-    0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
-    0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E
-]
-
-T_j = [0x79CC4519] * 16 + [0x7A879D8A] * 48
-
-def _rotl(x, n):
-    return ((x << n) & 0xFFFFFFFF) | ((x & 0xFFFFFFFF) >> (32 - n))
-
-def _P0(x):
-    return x ^ _rotl(x, 9) ^ _rotl(x, 17)
-
-def _P1(x):
-    return x ^ _rotl(x, 15) ^ _rotl(x, 23)
-
-def _FFj(x, y, z, j):
-    return (x ^ y ^ z) if j <= 15 else ((x & y) | (x & z) | (y & z))
-
-def _GGj(x, y, z, j):
-    return (x ^ y ^ z) if j <= 15 else ((x & y) | (~x & z))
-
-def sm3_pad(msg: bytes):
-    l = len(msg) * 8
-    msg += b'\x80'
-    msg += b'\x00' * ((56 - (len(msg) % 64)) % 64)
-    msg += struct.pack(">Q", l)
-    return msg
-
-def sm3_msg_extend(B):
-    W = list(struct.unpack(">16I", B))
-    for j in range(16, 68):
-        W.append(_P1(W[j-16] ^ W[j-9] ^ _rotl(W[j-3], 15)) ^ _rotl(W[j-13], 7) ^ W[j-6])
-    W_ = [(W[j] ^ W[j+4]) & 0xFFFFFFFF for j in range(64)]
-    return W, W_
-
-def sm3_cf(V, B):
-    A, B_, C, D, E, F, G, H = V
-    W, W_ = sm3_msg_extend(B)
-    for j in range(64):
-        SS1 = _rotl((_rotl(A, 12) + E + _rotl(T_j[j], j % 32)) & 0xFFFFFFFF, 7)
-        SS2 = SS1 ^ _rotl(A, 12)
-        TT1 = (_FFj(A, B_, C, j) + D + SS2 + W_[j]) & 0xFFFFFFFF
-        TT2 = (_GGj(E, F, G, j) + H + SS1 + W[j]) & 0xFFFFFFFF
-        D = C
-        C = _rotl(B_, 9)
-        B_ = A
-        A = TT1
-        H = G
-        G = _rotl(F, 19)
-        F = E
-        E = _P0(TT2)
-    return [(v ^ x) & 0xFFFFFFFF for v, x in zip(V, [A, B_, C, D, E, F, G, H])]
-
-def sm3_hash(msg: bytes):
-    msg = sm3_pad(msg)
-    V = IV[:]
-    for i in range(0, len(msg), 64):
-        V = sm3_cf(V, msg[i:i+64])
-    return ''.join(f'{x:08x}' for x in V)
+def glue_padding(orig_len):
+    """原消息长度为 orig_len 字节时的填充，直接按公式生成"""
+    return padding(orig_len)
 
 
-# ========================
-# Part 2: 优化版 SM3（Python 算法优化）
-# ========================
+def _state_from_hash(orig_hash):
+    return [int(orig_hash[i:i+8], 16) for i in range(0, 64, 8)]
 
-def sm3_hash_fast(msg: bytes):
-    """减少局部变量创建 & 避免不必要的列表"""
-    msg = sm3_pad(msg)
-    V = IV[:]
-    for i in range(0, len(msg), 64):
-        W = list(struct.unpack(">16I", msg[i:i+64]))
-        for j in range(16, 68):
-            p1 = W[j-16] ^ W[j-9] ^ _rotl(W[j-3], 15)
-            p1 = p1 ^ _rotl(p1, 15) ^ _rotl(p1, 23)
-            W.append((p1 ^ _rotl(W[j-13], 7) ^ W[j-6]) & 0xFFFFFFFF)
-        W_ = [(W[j] ^ W[j+4]) & 0xFFFFFFFF for j in range(64)]
-        A, B_, C, D, E, F, G, H = V
-        for j in range(64):
-            SS1 = _rotl((_rotl(A, 12) + E + _rotl(T_j[j], j % 32)) & 0xFFFFFFFF, 7)
-            SS2 = SS1 ^ _rotl(A, 12)
-            TT1 = (_FFj(A, B_, C, j) + D + SS2 + W_[j]) & 0xFFFFFFFF
-            TT2 = (_GGj(E, F, G, j) + H + SS1 + W[j]) & 0xFFFFFFFF
-            D, C, B_, A = C, _rotl(B_, 9), A, TT1
-            H, G, F, E = G, _rotl(F, 19), E, _P0(TT2)
-        V = [(v ^ x) & 0xFFFFFFFF for v, x in zip(V, [A, B_, C, D, E, F, G, H])]
-    return ''.join(f'{x:08x}' for x in V)
 
+def _extend(state, append_msg, prefix_len):
+    """从中间状态继续压缩 append_msg，长度字段按 prefix_len + len(append_msg) 计算"""
+    return finish(state, append_msg, prefix_len).hex()
 
-# ========================
-# Part 3: 长度扩展攻击
-# ========================
 
 def sm3_len_ext_attack(orig_hash, orig_len, append_msg):
     """orig_hash: 已知的哈希 (hex)
        orig_len: 原消息长度 (字节)
        append_msg: 想追加的数据 (bytes)
+       返回的新哈希等于 sm3(原消息 || glue_padding || append_msg)
     """
     # 还原中间状态
-    state = [int(orig_hash[i:i+8], 16) for i in range(0, 64, 8)]
+    state = _state_from_hash(orig_hash)
 
     # 构造 padding（针对原消息）
-    glue_padding = sm3_pad(b'A' * orig_len)[orig_len:]
+    glue = glue_padding(orig_len)
 
-    # 计算新哈希
-    new_msg_len = orig_len + len(glue_padding) + len(append_msg)
-    append_padded = append_msg
-    append_padded = sm3_pad(append_padded)
-    V = state[:]
-    for i in range(0, len(append_padded), 64):
-        V = sm3_cf(V, append_padded[i:i+64])
-    new_hash = ''.join(f'{x:08x}' for x in V)
-    return new_hash, glue_padding
+    # 计算新哈希：长度字段必须包含原消息和 glue padding
+    new_hash = _extend(state, append_msg, orig_len + len(glue))
+    return new_hash, glue
 
 
 # ========================
-# Part 4: Merkle Tree
+# Part 2: 批量长度扩展伪造
 # ========================
 
-class MerkleTree:
-    def __init__(self, leaves):
-        self.leaves = [bytes.fromhex(sm3_hash(l)) for l in leaves]
-        self.levels = []
-        self.build_tree()
-
-    def build_tree(self):
-        level = self.leaves
-        self.levels.append(level)
-        while len(level) > 1:
-            new_level = []
-            for i in range(0, len(level), 2):
-                if i+1 < len(level):
-                    combined = level[i] + level[i+1]
-                else:
-                    combined = level[i] + level[i]
-                new_level.append(bytes.fromhex(sm3_hash(combined)))
-            level = new_level
-            self.levels.append(level)
-
-    def get_root(self):
-        return self.levels[-1][0].hex()
-
-    def get_proof(self, index):
-        proof = []
-        for level in self.levels[:-1]:
-            sibling = index ^ 1
-            if sibling < len(level):
-                proof.append(level[sibling])
-            index >>= 1
-        return proof
-
-    @staticmethod
-    def verify_proof(leaf, proof, root, index):
-        h = bytes.fromhex(sm3_hash(leaf))
-        for p in proof:
-            if index % 2 == 0:
-                h = bytes.fromhex(sm3_hash(h + p))
-            else:
-                h = bytes.fromhex(sm3_hash(p + h))
-            index >>= 1
-        return h.hex() == root
+BATCH_SIZE = 4096  # 每次向量化计算的后缀数
+
+
+def _extend_many(state, suffixes, prefix_len):
+    """同一中间状态、同一前缀长度下批量伪造，返回 hex 哈希列表"""
+    if not use_multibuffer(len(suffixes)):
+        return [_extend(state, s, prefix_len) for s in suffixes]
+    out = [None] * len(suffixes)
+    groups = {}
+    for i, s in enumerate(suffixes):
+        groups.setdefault(len(s), []).append(i)
+    for idx in groups.values():
+        words = multibuffer.pad_many([suffixes[i] for i in idx], prefix_len)
+        V = np.tile(np.array(state, dtype=np.uint32), (len(idx), 1))
+        for i, d in zip(idx, multibuffer.state_to_digests(multibuffer.sm3_compress_many(V, words))):
+            out[i] = d.hex()
+    return out
+
+
+def iter_len_ext_candidates(orig_hash, lengths, suffixes):
+    """对所有 (原消息长度, 后缀) 组合生成伪造结果，逐条产出
+    (orig_len, suffix, glue_padding, new_hash)。
+    新哈希只取决于 原消息+glue 的总长度（64 的倍数）和后缀，
+    因此总长度相同的所有 orig_len 共用一次计算。"""
+    state = _state_from_hash(orig_hash)
+    by_prefix = {}
+    for L in lengths:
+        by_prefix.setdefault(L + len(glue_padding(L)), []).append(L)
+    suffixes = list(suffixes)
+    for prefix_len, lens in sorted(by_prefix.items()):
+        glues = [(L, glue_padding(L)) for L in lens]
+        for i in range(0, len(suffixes), BATCH_SIZE):
+            batch = suffixes[i:i + BATCH_SIZE]
+            hashes = _extend_many(state, batch, prefix_len)
+            for L, glue in glues:
+                for s, h in zip(batch, hashes):
+                    yield L, s, glue, h
+
+
+def sm3_len_ext_batch(orig_hash, lengths, suffixes, sink):
+    """批量伪造并流式输出。
+    sink 为可调用对象时逐条调用 sink(orig_len, suffix, glue, new_hash)；
+    为文件对象时每条写一行: orig_len<TAB>suffix(hex)<TAB>glue(hex)<TAB>new_hash
+    返回输出的条数。"""
+    count = 0
+    for L, s, glue, h in iter_len_ext_candidates(orig_hash, lengths, suffixes):
+        if callable(sink):
+            sink(L, s, glue, h)
+        else:
+            sink.write(f"{L}\t{s.hex()}\t{glue.hex()}\t{h}\n")
+        count += 1
+    return count
 
 
 # ========================
@@ -178,10 +104,27 @@ if __name__ == "__main__":
 
     msg = b"abc"
 
-    # Part 3: 长度扩展攻击
+    # Part 1: 长度扩展攻击
     orig = b"test"
     h = sm3_hash(orig)
     new_hash, pad = sm3_len_ext_attack(h, len(orig), b"admin=true")
     print("原始哈希:", h)
     print("长度扩展攻击新哈希:", new_hash)
+    print("验证:", new_hash == sm3_hash(orig + pad + b"admin=true"))
+
+    # 批量伪造：密钥长度未知（1~64 字节），尝试多个后缀
+    import io
+    import time
+    secret = b"k" * 23
+    mac = sm3_hash(secret + orig)
+    suffixes = [f"&role=admin&id={i}".encode() for i in range(1000)]
+    out = io.StringIO()
+    t1 = time.time()
+    n = sm3_len_ext_batch(mac, range(len(orig) + 1, len(orig) + 65), suffixes, out)
+    t2 = time.time()
+    print(f"批量伪造: {n} 个候选, 耗时 {t2 - t1:.2f} 秒")
+    hit = [line for line in out.getvalue().splitlines() if line.startswith(f"{len(secret + orig)}\t")][0]
+    L, s, glue, forged = hit.split("\t")
+    print("正确长度的候选验证:",
+          forged == sm3_hash(secret + orig + bytes.fromhex(glue) + bytes.fromhex(s)))
 
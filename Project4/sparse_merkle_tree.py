@@ -0,0 +1,158 @@
+from sm3 import sm3_digest, sm3_digest_many
+
+
+# ========================
+# Part 1: 参数与空子树哈希
+# ========================
+#
+# 256 层稀疏 Merkle 树：键 key 的位置是 sm3(key) 的 256 比特（高位在前），
+# 叶子哈希为 sm3(value)，空叶子为全 0。
+# EMPTY[h] 为高度 h 的空子树哈希，EMPTY[256] 即空树的根。
+
+DEPTH = 256
+HASH_SIZE = 32
+_h = sm3_digest
+
+EMPTY = [b'\x00' * HASH_SIZE]
+for _ in range(DEPTH):
+    EMPTY.append(_h(EMPTY[-1] + EMPTY[-1]))
+
+
+def key_path(key):
+    """键在树中的叶子位置（256 比特整数）"""
+    return int.from_bytes(_h(key), 'big')
+
+
+# ========================
+# Part 2: Sparse Merkle Tree
+# ========================
+
+class SparseMerkleTree:
+    """键值承诺。nodes 只保存非空节点：(高度, 前缀) -> 哈希，
+    高度为 h 的节点前缀为 path >> h。"""
+
+    def __init__(self, items=None):
+        self.nodes = {}
+        self.values = {}
+        if items:
+            self.update(items)
+
+    def _node(self, height, prefix):
+        return self.nodes.get((height, prefix), EMPTY[height])
+
+    def get_root(self):
+        return self._node(DEPTH, 0).hex()
+
+    def get(self, key):
+        return self.values.get(key_path(key))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key_path(key) in self.values
+
+    def insert(self, key, value):
+        self.update({key: value})
+
+    def delete(self, key):
+        self.update({key: None})
+
+    def update(self, items):
+        """批量插入/修改/删除，value 为 None 表示删除。
+        共享的内部节点在每层只重新计算一次，同层哈希批量完成。"""
+        if hasattr(items, 'items'):
+            items = items.items()
+        dirty = set()
+        for key, value in items:
+            path = key_path(key)
+            if value is None:
+                self.values.pop(path, None)
+                self.nodes.pop((0, path), None)
+            else:
+                self.values[path] = value
+                self.nodes[(0, path)] = _h(value)
+            dirty.add(path)
+
+        for height in range(1, DEPTH + 1):
+            parents = sorted({p >> 1 for p in dirty})
+            empty = EMPTY[height - 1]
+            todo, combined = [], []
+            for p in parents:
+                left = self._node(height - 1, p << 1)
+                right = self._node(height - 1, (p << 1) | 1)
+                if left == empty and right == empty:
+                    self.nodes.pop((height, p), None)
+                else:
+                    todo.append(p)
+                    combined.append(left + right)
+            for p, d in zip(todo, sm3_digest_many(combined)):
+                self.nodes[(height, p)] = d
+            dirty = parents
+
+    def get_proof(self, key):
+        """压缩证明 (value, bitmap, siblings)：
+        bitmap 第 h 位为 1 表示高度 h 的兄弟节点非空，siblings 只包含这些非空兄弟（自底向上）。
+        value 为 None 时即不存在性证明。"""
+        path = key_path(key)
+        bitmap = 0
+        siblings = []
+        for height in range(DEPTH):
+            sibling = self.nodes.get((height, (path >> height) ^ 1))
+            if sibling is not None:
+                bitmap |= 1 << height
+                siblings.append(sibling)
+        return self.values.get(path), bitmap, siblings
+
+    @staticmethod
+    def verify_proof(key, proof, root):
+        """proof 为 get_proof 的返回值，value 为 None 时验证 key 不存在"""
+        value, bitmap, siblings = proof
+        if bitmap >> DEPTH or len(siblings) != bin(bitmap).count('1'):
+            return False
+        path = key_path(key)
+        h = EMPTY[0] if value is None else _h(value)
+        it = iter(siblings)
+        for height in range(DEPTH):
+            if bitmap >> height & 1:
+                sibling = next(it)
+            elif h == EMPTY[height]:
+                h = EMPTY[height + 1]  # 空 + 空，无需计算
+                continue
+            else:
+                sibling = EMPTY[height]
+            h = _h(sibling + h) if path >> height & 1 else _h(h + sibling)
+        return h.hex() == root
+
+
+# ========================
+# 测试示例
+# ========================
+if __name__ == "__main__":
+    import time
+
+    smt = SparseMerkleTree()
+    print("[空树根]", smt.get_root())
+
+    N = 1000
+    items = {f"key{i}".encode(): f"value{i}".encode() for i in range(N)}
+    t1 = time.time()
+    smt.update(items)
+    t2 = time.time()
+    print(f"[批量插入] {N} 个键耗时 {t2 - t1:.2f} 秒, 根: {smt.get_root()}")
+
+    t1 = time.time()
+    smt.insert(b"key_new", b"v")
+    t2 = time.time()
+    print(f"[单个插入] 耗时 {(t2 - t1) * 1e3:.1f} ms")
+
+    root = smt.get_root()
+    proof = smt.get_proof(b"key42")
+    print(f"[存在性证明] {len(proof[2])} 个兄弟节点, 验证:",
+          SparseMerkleTree.verify_proof(b"key42", proof, root))
+    proof = smt.get_proof(b"no_such_key")
+    print(f"[不存在性证明] {len(proof[2])} 个兄弟节点, 验证:",
+          SparseMerkleTree.verify_proof(b"no_such_key", proof, root))
+
+    smt.delete(b"key_new")
+    print("[删除后根与删除前一致]", smt.get_root() == SparseMerkleTree(items).get_root())
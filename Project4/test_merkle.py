@@ -0,0 +1,216 @@
+import os
+import tempfile
+
+import file_integrity
+from merkle_storage import MmapLevel, MmapMerkleTree, build_tree_on_disk, save_tree
+from merkle_tree import MerkleTree, NodeCache, SortedMerkleTree
+from sparse_merkle_tree import EMPTY, SparseMerkleTree
+from sm3 import sm3_digest
+
+# 奇数个叶子（每层最后一个节点与自身配对），5001 跨越 WRITE_BATCH 写盘批次
+ODD_SIZES = [1, 3, 5, 7, 13, 101, 5001]
+
+
+def make_leaves(n, tag="leaf"):
+    return [f"{tag}{i}".encode() for i in range(n)]
+
+
+def sample_indices(n):
+    return sorted({0, 1 % n, n // 2, n - 2 if n > 1 else 0, n - 1} | set(range(0, n, max(1, n // 16))))
+
+
+def test_mmap_storage():
+    """save_tree 与 build_tree_on_disk 写出的目录经 mmap 打开后，根与证明与内存树一致"""
+    for n in ODD_SIZES:
+        leaves = make_leaves(n)
+        mt = MerkleTree(leaves)
+        root = mt.get_root()
+        with tempfile.TemporaryDirectory() as saved, tempfile.TemporaryDirectory() as streamed:
+            save_tree(mt, saved)
+            build_tree_on_disk(iter(leaves), streamed)
+            for directory in (saved, streamed):
+                with MmapMerkleTree(directory) as disk:
+                    assert len(disk) == n and disk.get_root() == root, (n, directory)
+                    for i in sample_indices(n):
+                        proof = disk.get_proof(i)
+                        assert proof == mt.get_proof(i), (n, i)
+                        assert MerkleTree.verify_proof(leaves[i], proof, root, i)
+                    try:
+                        disk.get_proof(n)
+                        assert False, "越界下标应被拒绝"
+                    except IndexError:
+                        pass
+
+    # 截断的层文件（含短于头部的）在打开时以 ValueError 拒绝，且不留下打开的文件
+    with tempfile.TemporaryDirectory() as directory:
+        build_tree_on_disk(make_leaves(7), directory)
+        path = os.path.join(directory, "level_000.bin")
+        size = os.path.getsize(path)
+        for length in (size - 1, 10, 0):
+            with open(path, "r+b") as f:
+                f.truncate(length)
+            try:
+                MmapMerkleTree(directory)
+                assert False, "损坏的层文件应被拒绝"
+            except ValueError:
+                pass
+            try:
+                MmapLevel(path)
+                assert False, "损坏的层文件应被拒绝"
+            except ValueError:
+                pass
+
+
+def test_multiproof():
+    """多叶子证明通过验证，篡改叶子、证明节点、下标或证明长度都会被拒绝"""
+    for n in ODD_SIZES[:-1]:
+        leaves = make_leaves(n)
+        mt = MerkleTree(leaves)
+        root = mt.get_root()
+        for indices in ([0], [n - 1], sample_indices(n), list(range(n))):
+            proof = mt.get_multiproof(indices)
+            chosen = [leaves[i] for i in indices]
+            assert MerkleTree.verify_multiproof(chosen, indices, proof, root, n), (n, indices)
+            assert not MerkleTree.verify_multiproof([b"x" + chosen[0]] + chosen[1:], indices, proof, root, n)
+            if proof:
+                bad = bytes([proof[0][0] ^ 1]) + proof[0][1:]
+                assert not MerkleTree.verify_multiproof(chosen, indices, [bad] + proof[1:], root, n)
+                assert not MerkleTree.verify_multiproof(chosen, indices, proof[:-1], root, n)
+            assert not MerkleTree.verify_multiproof(chosen, indices, proof + [b"\x00" * 32], root, n)
+        if n > 2:
+            proof = mt.get_multiproof([0])
+            assert not MerkleTree.verify_multiproof([leaves[0]], [1], proof, root, n)
+            assert not MerkleTree.verify_multiproof([leaves[0], leaves[0]], [0, 0], proof, root, n)
+
+
+def test_sorted_non_inclusion():
+    """排序树的不存在性证明：单个与批量结果一致，存在的元素和伪造的相邻关系不能通过"""
+    leaves = make_leaves(13, "k") + [b"k3"]  # 含重复叶子
+    st = SortedMerkleTree(leaves)
+    n, root = len(st.sorted_leaves), st.get_root()
+    assert n == 13
+    absent = [b"a", b"k", b"k10x", b"k3a", b"zz"]  # 首部之前、中间、尾部之后
+    for e in absent:
+        prev, next_ = st.get_non_inclusion_proof(e)
+        assert SortedMerkleTree.verify_non_inclusion_proof(e, prev, next_, root, n), e
+        # 证明不能挪用到落在其他区间的元素上
+        assert not SortedMerkleTree.verify_non_inclusion_proof(b"k5a" if e != b"k5a" else b"a",
+                                                               prev, next_, root, n)
+    assert st.get_non_inclusion_proof(b"k3") is None
+
+    # 跳过中间叶子的两个真实证明拼成的“相邻”关系被拒绝
+    i = st.sorted_leaves.index(b"k3")
+    prev = (st.sorted_leaves[i - 1], st.get_proof(i - 1), i - 1)
+    next_ = (st.sorted_leaves[i + 1], st.get_proof(i + 1), i + 1)
+    assert not SortedMerkleTree.verify_non_inclusion_proof(b"k3", prev, next_, root, n)
+
+    bounds, indices, chosen, proof = st.get_non_inclusion_proofs(absent + [b"k3"])
+    results = SortedMerkleTree.verify_non_inclusion_proofs(absent + [b"k3"], bounds, indices, chosen,
+                                                           proof, root, n)
+    assert results == [True] * len(absent) + [False]
+    bad = [b"x" + chosen[0]] + chosen[1:]
+    assert SortedMerkleTree.verify_non_inclusion_proofs(absent, bounds, indices, bad, proof, root, n) == \
+        [False] * len(absent)
+
+
+def test_sparse_merkle():
+    """稀疏树：根与插入顺序无关、删除后恢复，存在/不存在证明通过，篡改后的证明被拒绝"""
+    items = {f"key{i}".encode(): f"value{i}".encode() for i in range(8)}
+    smt = SparseMerkleTree(items)
+    one_by_one = SparseMerkleTree()
+    for k in reversed(list(items)):
+        one_by_one.insert(k, items[k])
+    root = smt.get_root()
+    assert one_by_one.get_root() == root and len(smt) == 8
+
+    for key in (b"key0", b"key5", b"missing", b"key8"):
+        proof = smt.get_proof(key)
+        assert proof[0] == items.get(key)
+        assert SparseMerkleTree.verify_proof(key, proof, root), key
+        value, bitmap, siblings = proof
+        # 篡改值、把存在性证明当作不存在性证明、改兄弟节点、改位图
+        assert not SparseMerkleTree.verify_proof(key, (b"forged", bitmap, siblings), root)
+        if value is not None:
+            assert not SparseMerkleTree.verify_proof(key, (None, bitmap, siblings), root)
+        bad = [bytes([siblings[0][0] ^ 1]) + siblings[0][1:]] + siblings[1:]
+        assert not SparseMerkleTree.verify_proof(key, (value, bitmap, bad), root)
+        assert not SparseMerkleTree.verify_proof(key, (value, bitmap ^ (1 << 255), siblings), root)
+        assert not SparseMerkleTree.verify_proof(key, (value, bitmap, siblings[:-1]), root)
+        # 证明不能用于其他键
+        assert not SparseMerkleTree.verify_proof(b"other", proof, root)
+
+    smt.insert(b"extra", b"x")
+    assert smt.get_root() != root
+    smt.delete(b"extra")
+    assert smt.get_root() == root
+    smt.update({k: None for k in items})
+    assert smt.get_root() == EMPTY[-1].hex() and not smt.nodes
+
+
+def test_node_cache():
+    """带缓存建树结果与不带缓存一致；只改一个叶子后大部分节点命中；超出预算时按 LRU 淘汰"""
+    leaves = make_leaves(101)
+    cache = NodeCache()
+    assert MerkleTree(leaves, cache).get_root() == MerkleTree(leaves).get_root()
+    internal = len(cache)
+    assert cache.hits == 0 and cache.misses == internal
+
+    changed = leaves[:]
+    changed[50] = b"changed"
+    hits, misses = cache.hits, cache.misses
+    assert MerkleTree(changed, cache).get_root() == MerkleTree(changed).get_root()
+    # 每层只有被修改叶子的祖先需要重算
+    assert cache.misses - misses == len(MerkleTree(changed).levels) - 1
+    assert cache.hits - hits == internal - (cache.misses - misses)
+
+    small = NodeCache(memory_budget=NodeCache.ENTRY_COST * 10)
+    assert small.max_entries == 10
+    assert MerkleTree(leaves, small).get_root() == MerkleTree(leaves).get_root()
+    assert len(small) == 10 and small.evictions == internal - 10
+
+
+def test_file_integrity():
+    """目录扫描：文件根等于分块哈希的 Merkle 根；未变化时不重算，修改、新增、删除都能检出"""
+    chunk = 1024
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "sub"))
+        contents = {"a.bin": os.urandom(5 * chunk + 7), "sub/b.bin": os.urandom(chunk), "empty": b""}
+        for p, data in contents.items():
+            with open(os.path.join(root, p), "wb") as f:
+                f.write(data)
+        m1, todo = file_integrity.scan(root, chunk_size=chunk, workers=2)
+        assert todo == sorted(contents)
+        for p, data in contents.items():
+            chunks = [sm3_digest(data[i:i + chunk]) for i in range(0, len(data), chunk)] or [sm3_digest(b"")]
+            assert m1["files"][p]["root"] == MerkleTree(chunks).get_root(), p
+
+        with tempfile.TemporaryDirectory() as out:
+            manifest_path = os.path.join(out, "manifest.json")
+            file_integrity.save_manifest(m1, manifest_path)
+            assert file_integrity.load_manifest(manifest_path) == m1
+
+        m2, todo = file_integrity.scan(root, m1, chunk_size=chunk)
+        assert todo == [] and m2 == m1
+
+        # 原地修改第 3 块（长度不变，mtime 改变），新增一个文件，删除一个文件
+        path = os.path.join(root, "a.bin")
+        with open(path, "r+b") as f:
+            f.seek(3 * chunk)
+            f.write(b"\xff")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with open(os.path.join(root, "c.bin"), "wb") as f:
+            f.write(b"new")
+        os.remove(os.path.join(root, "empty"))
+        m3, todo = file_integrity.scan(root, m1, chunk_size=chunk, workers=2)
+        assert todo == ["a.bin", "c.bin"] and m3["root"] != m1["root"]
+        assert file_integrity.diff_manifests(m1, m3) == (["c.bin"], ["empty"], ["a.bin"])
+        assert file_integrity.changed_chunks(m1["files"]["a.bin"], m3["files"]["a.bin"]) == [3]
+
+
+if __name__ == "__main__":
+    for test in (test_mmap_storage, test_multiproof, test_sorted_non_inclusion,
+                 test_sparse_merkle, test_node_cache,
+                 test_file_integrity):
+        test()
+        print(f"[{test.__name__}] 通过")
@@ -0,0 +1,162 @@
+import io
+import os
+import struct
+import time
+import bench_sm3
+import sm3
+from merkle_tree import MerkleTree
+from sm3 import BACKENDS, SM3, sm3_digest, sm3_digest_many, sm3_hash
+from sm3_hmac import HMAC_SM3, hmac_sm3, sm3_kdf
+from sm3_len_ext_attack import sm3_len_ext_attack, sm3_len_ext_batch
+
+# GM/T 0004-2012 附录 A 示例
+VECTORS = [
+    (b"abc", "66c7f0f462eeedd9d1f2d46bdc10e4e24167c4875cf2f7a2297da02b8f4ba8e0"),
+    (b"abcd" * 16, "debe9ff92275b8a138604889c18e5a4d6fdb70e5387e5765293dcba39c0c5732"),
+]
+
+def test_vectors():
+    for name, backend in BACKENDS.items():
+        for msg, expected in VECTORS:
+            assert backend.digest(msg).hex() == expected, name
+
+def test_equivalence():
+    """各后端、增量接口、批量接口在不同长度（跨越分组边界）下结果一致"""
+    msgs = [os.urandom(n) for n in list(range(0, 130)) + [1000, 4096]]
+    ref = BACKENDS["reference"].digest_many(msgs)
+    for name, backend in BACKENDS.items():
+        assert backend.digest_many(msgs) == ref, name
+    assert sm3_digest_many(msgs) == ref
+    for m, d in zip(msgs, ref):
+        h = SM3()
+        for i in range(0, len(m), 7):
+            h.update(m[i:i + 7])
+        assert h.digest() == d
+        assert h.copy().digest() == d
+
+def test_set_backend():
+    """set_backend 决定批量接口（Merkle 建树、KDF、批量长度扩展）是否走多缓冲实现"""
+    leaves = [f"leaf{i}".encode() for i in range(100)]
+    root = MerkleTree(leaves).get_root()
+    kdf = sm3_kdf(b"z", 1000)
+    mb = sm3.multibuffer
+    calls = []
+    if mb is not None:
+        originals = mb.sm3_hash_many, mb.sm3_compress_many
+        mb.sm3_hash_many = lambda *a: calls.append("hash") or originals[0](*a)
+        mb.sm3_compress_many = lambda *a: calls.append("compress") or originals[1](*a)
+    try:
+        for name in list(BACKENDS) + ["auto"]:
+            sm3.set_backend(name)
+            calls.clear()
+            assert MerkleTree(leaves).get_root() == root, name
+            assert sm3_kdf(b"z", 1000) == kdf, name
+            assert sm3_len_ext_attack(sm3_hash(b"abc"), 3, b"x")[0] == \
+                BACKENDS["optimized"].digest(b"abc" + sm3.padding(3) + b"x").hex()
+            assert bool(calls) == (mb is not None and name in ("numpy", "auto")), (name, calls)
+        try:
+            sm3.set_backend("sha256")
+            assert False, "未知后端应被拒绝"
+        except ValueError:
+            pass
+    finally:
+        sm3.set_backend("auto")
+        if mb is not None:
+            mb.sm3_hash_many, mb.sm3_compress_many = originals
+
+# HMAC-SM3 向量，由 OpenSSL 3.0 的 hmac.new(key, msg, "sm3") 独立计算；
+# 依次覆盖短密钥、恰好 32 字节密钥 + 64 字节消息、超过分组长度需先哈希的密钥、空密钥空消息
+HMAC_VECTORS = [
+    (b"secret-key", b"abc", "f94ec71757e8e66d782e15d6f15a69733a98dba5d2583b20caaafca1c4d9f0db"),
+    (bytes(range(1, 33)), b"abcd" * 16, "d27f13a69be209923ca693683e382b3c4d87a8d54ed9a52bea35494f8284a93d"),
+    (b"\x0b" * 80, b"Hi There", "b483a90d1b57d1e504ea27b7f4da2579179f7e9fbdebe0f09767d70d12e6dbcf"),
+    (b"", b"", "0d23f72ba15e9c189a879aefc70996b06091de6e64d31b7a84004356dd915261"),
+]
+
+def test_hmac_kdf():
+    for key, msg, expected in HMAC_VECTORS:
+        h = HMAC_SM3(key)
+        assert h.hexmac(msg) == expected and hmac_sm3(key, msg).hex() == expected
+        assert h.verify(msg, bytes.fromhex(expected))
+        assert not h.verify(msg + b"!", bytes.fromhex(expected))
+    # 与不缓存中间状态的 RFC 2104 直接构造比较，覆盖消息跨越分组边界
+    key = os.urandom(40)
+    pad = key.ljust(64, b"\x00")
+    for n in (0, 1, 55, 64, 200):
+        msg = os.urandom(n)
+        inner = sm3_digest(bytes(k ^ 0x36 for k in pad) + msg)
+        assert hmac_sm3(key, msg) == sm3_digest(bytes(k ^ 0x5C for k in pad) + inner)
+    # KDF 与逐个计数器直接计算一致（n >= 16 时走批量路径）
+    for z in (b"", os.urandom(20), os.urandom(64), os.urandom(100)):
+        for klen in (0, 1, 32, 33, 1000):
+            naive = b"".join(sm3_digest(z + struct.pack(">I", ct)) for ct in range(1, klen // 32 + 2))
+            assert sm3_kdf(z, klen) == naive[:klen], (len(z), klen)
+
+def test_length_extension():
+    """伪造的哈希等于 sm3(secret || glue || 后缀)；批量接口与逐个调用一致"""
+    secrets = [os.urandom(n) for n in (0, 1, 55, 56, 63, 64, 100)]
+    suffixes = [b"", b"admin=true", os.urandom(64), os.urandom(130)]
+    for secret in secrets:
+        h = sm3_hash(secret)
+        for suffix in suffixes:
+            forged, glue = sm3_len_ext_attack(h, len(secret), suffix)
+            assert (len(secret) + len(glue)) % 64 == 0
+            assert forged == sm3_hash(secret + glue + suffix), (len(secret), len(suffix))
+
+    secret = os.urandom(20)
+    h = sm3_hash(secret)
+    lengths = list(range(2, 60, 3))  # 含真实长度 20，跨越 55 / 56 的填充边界
+    out = []
+    count = sm3_len_ext_batch(h, lengths, suffixes, lambda *row: out.append(row))
+    assert count == len(out) == len(lengths) * len(suffixes)
+    for L, suffix, glue, forged in out:
+        assert (forged, glue) == sm3_len_ext_attack(h, L, suffix)
+    assert sorted((L, s) for L, s, _, _ in out) == sorted((L, s) for L in lengths for s in suffixes)
+    assert all(f == sm3_hash(secret + g + s) for L, s, g, f in out if L == len(secret))
+    f = io.StringIO()
+    assert sm3_len_ext_batch(h, lengths, suffixes, f) == count and f.getvalue().count("\n") == count
+
+def test_bench_suite():
+    """性能测试套件的冒烟测试：各实现都有结果行，超出时间预算的组合被跳过而不是执行"""
+    rows = bench_sm3.bench_hash([0, 64, 1 << 30], repeat=1, min_time_ns=0, budget_s=0.5, ghz=3.0)
+    names = bench_sm3.hash_functions()
+    assert {r['impl'] for r in rows} == set(names)
+    assert all(r['size'] in (0, 64) and r['calls'] >= 1 for r in rows)
+    assert all(r['cycles_per_byte'] > 0 for r in rows if r['size'])
+    rows = bench_sm3.bench_merkle([101, 10**9], queries=20, budget_s=5)
+    assert len(rows) == 1 and rows[0]['leaves'] == 101 and rows[0]['verified']
+
+def bench_single(backend, msg, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        backend.digest(msg)
+    return time.time() - start
+
+def bench_many(backend, msgs):
+    start = time.time()
+    backend.digest_many(msgs)
+    return time.time() - start
+
+if __name__ == "__main__":
+    test_vectors()
+    test_equivalence()
+    print("[一致性] 所有后端结果一致:", sorted(BACKENDS))
+    test_set_backend()
+    print("[后端切换] set_backend 同时控制批量接口")
+    test_hmac_kdf()
+    print("[HMAC-SM3 / KDF] 与已知向量及直接构造一致")
+    test_length_extension()
+    print("[长度扩展] 伪造结果与直接计算一致")
+
+    # 1. 单条长消息
+    msg = b"\x00" * 64 * 1024
+    for name, backend in BACKENDS.items():
+        repeat = 1 if name == "numpy" else 4
+        t = bench_single(backend, msg, repeat)
+        print(f"[{name}] 64KB 单条消息: {t / repeat:.4f} 秒, 速度: {len(msg) * repeat / t / 1024 / 1024:.3f} MB/s")
+
+    # 2. 大量短消息（Merkle 节点大小）
+    msgs = [os.urandom(64) for _ in range(10000)]
+    for name, backend in BACKENDS.items():
+        t = bench_many(backend, msgs)
+        print(f"[{name}] {len(msgs)} 条 64B 消息: {t:.4f} 秒, {len(msgs) / t:.0f} 次/秒")
@@ -0,0 +1,312 @@
+import argparse
+import hashlib
+import json
+import platform
+import secrets
+import statistics
+import sys
+import time
+
+from sm2_core import SM2, SCALAR_MULT_BACKENDS
+from sm2_hash import DEFAULT_USER_ID, compute_e
+from sm2_encoding import encode_point
+from sm2_nonce_scan import recover_keys
+from sm2_pitfalls import recover_key_from_k, recover_key_from_reused_k
+
+try:
+    import ecdsa
+except ImportError:  # 基线对比需要 Project6 用到的 ecdsa 包，未安装时跳过
+    ecdsa = None
+
+
+# ========================
+# Part 1: 计时工具
+# ========================
+
+def measure(fn, min_time, per_call=1):
+    """重复调用 fn 至少 min_time 秒（至少 3 次），返回每秒操作数与单次调用耗时的分位数 (us)。
+    per_call 为每次调用包含的操作数（批量接口），ops_per_sec 按操作数计"""
+    samples = []
+    t0 = time.perf_counter()
+    while True:
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time and len(samples) >= 3:
+            break
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        'ops_per_sec': len(samples) * per_call / elapsed,
+        'p50_us': q[49] / 1e3,
+        'p90_us': q[89] / 1e3,
+        'p99_us': q[98] / 1e3,
+        'calls': len(samples),
+    }
+
+
+# ========================
+# Part 2: 密钥生成 / 签名 / 验签
+# ========================
+
+BULK = 256  # 批量密钥生成 / 签名每次调用的数量
+
+
+def bench_backend(backend, min_time):
+    sm2 = SM2(backend)
+    d, P = sm2.generate_keypair()
+    msg = "benchmark message"
+    sig = sm2.sign(d, msg)
+    assert sm2.verify(P, msg, sig)
+    return {
+        'keygen': measure(sm2.generate_keypair, min_time),
+        'sign': measure(lambda: sm2.sign(d, msg), min_time),
+        'verify': measure(lambda: sm2.verify(P, msg, sig), min_time),
+        'keygen_bulk': measure(lambda: sm2.generate_keypairs(BULK), min_time, BULK),
+        'sign_bulk': measure(lambda: sm2.sign_batch(d, [msg] * BULK), min_time, BULK),
+    }
+
+
+# ========================
+# Part 3: 单次标量乘法 k·G 与时间差异
+# ========================
+
+def scalar_mult_methods(curve):
+    G = (curve.Gx, curve.Gy)
+    return {
+        'affine': lambda k: curve.scalar_mult_affine(k, G),
+        'wnaf': lambda k: curve.jacobian.scalar_mult(k, G),
+        'fixed-base': curve.base_table.mult,
+        'ladder': lambda k: curve.ladder.scalar_mult(k, G),
+    }
+
+
+def bench_scalar_mult(rounds):
+    """每种方法的 k·G 中位耗时，以及低/高汉明重量标量的耗时差（体现与 k 相关的时间差异）"""
+    curve = SM2().curve
+    n = curve.n
+    low = [(1 << 255) | (1 << secrets.randbelow(255)) for _ in range(rounds)]   # 只有 2 个 1
+    high = [((1 << 256) - 1) % n ^ (1 << secrets.randbelow(200)) for _ in range(rounds)]
+    rows = {}
+    for name, fn in scalar_mult_methods(curve).items():
+        times = {}
+        for label, ks in (('random', [secrets.randbelow(n) for _ in range(rounds)]),
+                          ('low', low), ('high', high)):
+            samples = []
+            for k in ks:
+                t0 = time.perf_counter_ns()
+                fn(k)
+                samples.append(time.perf_counter_ns() - t0)
+            times[label] = statistics.median(samples) / 1e3
+        rows[name] = times
+    return rows
+
+
+# ========================
+# Part 4: 每次签名的哈希开销
+# ========================
+
+def bench_hashing(min_time):
+    """计算 e 的三种方式，返回每次的耗时 (us)"""
+    sm2 = SM2()
+    _, P = sm2.generate_keypair()
+    msg = b"benchmark message"
+    uid = DEFAULT_USER_ID.encode()
+
+    def sha256_simplified():  # 原实现：ZA 只是 sha256(user_id)
+        za = hashlib.sha256(uid).digest()
+        return int.from_bytes(hashlib.sha256(za + msg).digest(), 'big')
+
+    cases = {
+        'sha256 简化 ZA（原实现）': sha256_simplified,
+        'SM3 每次重算 ZA': lambda: compute_e(sm2.curve, uid, P, msg),
+        'SM3 缓存 ZA 状态': lambda: sm2.za_cache.e(uid, P, msg),
+    }
+    return {name: 1e6 / measure(fn, min_time)['ops_per_sec'] for name, fn in cases.items()}
+
+
+# ========================
+# Part 5: 批量验签
+# ========================
+
+BATCH_SIZES = [1, 8, 64, 512]
+
+
+def bench_verify_batch(backend, sizes, keys, min_time):
+    """不同批大小下的每秒验签数；签名轮流来自 keys 个公钥"""
+    sm2 = SM2(backend)
+    pairs = [sm2.generate_keypair() for _ in range(keys)]
+    items = []
+    for i in range(max(sizes)):
+        d, P = pairs[i % keys]
+        msg = f"batch message {i}"
+        items.append((P, msg, sm2.sign(d, msg)))
+    assert all(sm2.verify_batch(items))
+    rows = {}
+    for size in sizes:
+        batch = items[:size]
+        rows[size] = measure(lambda: sm2.verify_batch(batch), min_time, size)
+    return rows
+
+
+# ========================
+# Part 6: k 重用时的私钥恢复
+# ========================
+
+def bench_recovery(min_time, pairs=256):
+    """sm2_pitfalls 中的单次恢复公式，以及 sm2_nonce_scan 对 pairs 组重用签名的批量恢复（含 d·G 校验）"""
+    sm2 = SM2()
+    n = sm2.curve.n
+    groups = []
+    for d, P in sm2.generate_keypairs(pairs):
+        k = secrets.randbelow(n - 1) + 1
+        x1 = sm2.curve.base_mult(k)[0]
+        sig1, sig2 = [sm2.sign(d, m, public_key=P, nonces=lambda: (k, x1)) for m in ("a", "b")]
+        groups.append([(encode_point(P), 0, *sig1), (encode_point(P), 0, *sig2)])  # 恢复时不用 e
+    assert recover_key_from_k(n, k, sig1) == d
+    assert recover_key_from_reused_k(n, sig1, sig2) == d
+    assert len(recover_keys(sm2.curve, groups)) == pairs
+    return {
+        'known_k': measure(lambda: recover_key_from_k(n, k, sig1), min_time),
+        'reused_k_pair': measure(lambda: recover_key_from_reused_k(n, sig1, sig2), min_time),
+        'reused_k_batch': measure(lambda: recover_keys(sm2.curve, groups), min_time, pairs),
+    }
+
+
+# ========================
+# Part 7: ecdsa (secp256k1) 基线
+# ========================
+
+def bench_ecdsa(min_time):
+    """Project6 所用 ecdsa 包在 secp256k1 上的密钥生成 / 签名 / 验签（SHA-256），未安装时返回 None"""
+    if ecdsa is None:
+        return None
+    msg = b"benchmark message"
+    sk = ecdsa.SigningKey.generate(curve=ecdsa.SECP256k1)
+    vk = sk.get_verifying_key()
+    sig = sk.sign(msg, hashfunc=hashlib.sha256)
+    assert vk.verify(sig, msg, hashfunc=hashlib.sha256)
+    vk.precompute()
+    return {
+        'keygen': measure(lambda: ecdsa.SigningKey.generate(curve=ecdsa.SECP256k1).get_verifying_key(),
+                          min_time),
+        'sign': measure(lambda: sk.sign(msg, hashfunc=hashlib.sha256), min_time),
+        'verify': measure(lambda: vk.verify(sig, msg, hashfunc=hashlib.sha256), min_time),
+    }
+
+
+# ========================
+# Part 8: JSON 结果与两次运行的对比
+# ========================
+
+def metadata(args):
+    return {
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'ecdsa': getattr(ecdsa, "__version__", None),
+        'args': vars(args),
+    }
+
+
+def flatten_rates(tree, prefix=""):
+    """把结果中的每个 ops_per_sec 展平为 {"路径": 值}，用于两次运行逐项对比"""
+    rates = {}
+    for key, value in tree.items():
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            if 'ops_per_sec' in value:
+                rates[path] = value['ops_per_sec']
+            else:
+                rates.update(flatten_rates(value, path))
+    return rates
+
+
+def compare(old, new):
+    """返回 [(路径, 旧值, 新值, 新/旧)]，只包含两次都测到的项"""
+    old_rates, new_rates = flatten_rates(old), flatten_rates(new)
+    return [(path, old_rates[path], rate, rate / old_rates[path])
+            for path, rate in new_rates.items() if old_rates.get(path)]
+
+
+# ========================
+# 命令行
+# ========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SM2 性能测试：各标量乘法后端、批量验签、私钥恢复与 ecdsa 基线")
+    parser.add_argument("--backends", nargs="+", default=list(SCALAR_MULT_BACKENDS),
+                        choices=SCALAR_MULT_BACKENDS)
+    parser.add_argument("--min-time", type=float, default=1.0, help="每项至少计时秒数")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=BATCH_SIZES, help="批量验签的批大小")
+    parser.add_argument("--keys", type=int, default=16, help="批量验签涉及的公钥数")
+    parser.add_argument("--rounds", type=int, default=30, help="k·G 计时的标量个数")
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果逐项对比")
+    args = parser.parse_args()
+
+    results = {'meta': metadata(args), 'backends': {}}
+    print(f"{'后端':8s} {'操作':12s} {'次/秒':>10s} {'p50 us':>10s} {'p90 us':>10s} {'p99 us':>10s}")
+
+    def show(group, rows):
+        for op, m in rows.items():
+            print(f"{group:8s} {op:12s} {m['ops_per_sec']:10.1f} {m['p50_us']:10.1f} "
+                  f"{m['p90_us']:10.1f} {m['p99_us']:10.1f}")
+
+    for backend in args.backends:
+        results['backends'][backend] = bench_backend(backend, args.min_time)
+        show(backend, results['backends'][backend])
+
+    results['baseline'] = {'ecdsa-secp256k1': bench_ecdsa(args.min_time)}
+    if results['baseline']['ecdsa-secp256k1'] is None:
+        print("[基线] 未安装 ecdsa 包，跳过 secp256k1 对比")
+    else:
+        show("ecdsa", results['baseline']['ecdsa-secp256k1'])
+
+    base = results['backends'].get("affine")
+    for backend, r in results['backends'].items():
+        if base and backend != "affine":
+            print(f"[{backend} 相对 affine] " + ", ".join(
+                f"{op} {r[op]['ops_per_sec'] / base[op]['ops_per_sec']:.1f}x" for op in ('keygen', 'sign', 'verify')))
+    ecdsa_rows = results['baseline']['ecdsa-secp256k1']
+    if ecdsa_rows and "wnaf" in results['backends']:
+        r = results['backends']["wnaf"]
+        print("[wnaf 相对 ecdsa] " + ", ".join(
+            f"{op} {r[op]['ops_per_sec'] / ecdsa_rows[op]['ops_per_sec']:.1f}x" for op in ('keygen', 'sign', 'verify')))
+
+    results['scalar_mult_us'] = bench_scalar_mult(args.rounds)
+    print("[k·G] 中位耗时 (us)，low/high 为低/高汉明重量的标量")
+    for name, t in results['scalar_mult_us'].items():
+        spread = (t['high'] - t['low']) / t['random'] * 100
+        print(f"  {name:10s} 随机 {t['random']:9.1f}  low {t['low']:9.1f}  high {t['high']:9.1f}  "
+              f"差异 {spread:+6.1f}%")
+
+    results['hashing_us'] = bench_hashing(args.min_time)
+    print("[哈希] 每次签名计算 e 的耗时 (us)")
+    for name, us in results['hashing_us'].items():
+        print(f"  {name:24s} {us:9.1f}")
+
+    if args.batch_sizes:
+        results['verify_batch'] = {}
+        print(f"[批量验签] {args.keys} 个公钥，每秒验签数 (每批 p99 耗时 ms)")
+        for backend in args.backends:
+            rows = results['verify_batch'][backend] = bench_verify_batch(
+                backend, sorted(args.batch_sizes), args.keys, args.min_time)
+            line = "  ".join(f"批 {size}: {m['ops_per_sec']:8.1f} ({m['p99_us'] / 1e3:.1f})"
+                             for size, m in rows.items())
+            print(f"  {backend:8s} {line}  (单次 verify: {results['backends'][backend]['verify']['ops_per_sec']:.1f})")
+
+    results['recovery'] = bench_recovery(args.min_time)
+    print("[k 重用恢复私钥]")
+    show("", results['recovery'])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
+        print("[结果已保存]", args.json)
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"[对比] {args.compare} ({old['meta']['time']}) -> 本次，次/秒之比")
+        for path, before, after, ratio in compare(old, results):
+            print(f"  {path:40s} {before:10.1f} -> {after:10.1f}  {ratio:5.2f}x")
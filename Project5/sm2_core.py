@@ -1,13 +1,56 @@
 # sm2/sm2_core.py
-import hashlib
 import secrets
-from typing import Tuple
+from collections import OrderedDict
+from typing import List, Tuple
+
+from sm2_encoding import int_to_bytes
+from sm2_fixed_base import FixedBaseTable
+from sm2_hash import DEFAULT_USER_ID, ZACache, compute_za
+from sm2_jacobian import JacobianEngine, JacobianPoint, batch_inverse
+from sm2_ladder import LadderEngine
+
+# 标量乘法后端：affine 为原始仿射坐标 double-and-add，wnaf 为 Jacobian 坐标 + wNAF，
+# ladder 与 wnaf 相同，但涉及私密标量的运算（密钥生成、签名的 k·G）默认走常数时间阶梯
+SCALAR_MULT_BACKENDS = ("affine", "wnaf", "ladder")
+
+G_WINDOW = 7    # 验签时 G 的 wNAF 窗口（32 个点，只建一次）
+KEY_WINDOW = 5  # 公钥的 wNAF 窗口（8 个点，按公钥缓存）
+
+
+class KeyTableCache:
+    """公钥 -> 仿射奇数倍点表 的 LRU 缓存，经常验签的公钥不必每次重建表"""
+
+    def __init__(self, jacobian: JacobianEngine, max_keys: int = 1024, window: int = KEY_WINDOW):
+        self.jacobian = jacobian
+        self.max_keys = max_keys
+        self.window = window
+        self._tables = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, public_key: Tuple[int, int]):
+        table = self._tables.get(public_key)
+        if table is not None:
+            self.hits += 1
+            self._tables.move_to_end(public_key)
+            return table
+        self.misses += 1
+        table = self.jacobian.odd_multiples_affine(public_key, self.window)
+        self._tables[public_key] = table
+        if len(self._tables) > self.max_keys:
+            self._tables.popitem(last=False)
+        return table
+
+    def __len__(self):
+        return len(self._tables)
 
 
 class SM2Curve:
     """SM2椭圆曲线参数及基本运算"""
 
-    def __init__(self):
+    def __init__(self, backend: str = "wnaf", table_path: str = None):
+        if backend not in SCALAR_MULT_BACKENDS:
+            raise ValueError(f"未知的标量乘法后端: {backend}，可选 {SCALAR_MULT_BACKENDS}")
+        self.backend = backend
         # SM2推荐参数
         self.p = 0x8542D69E4C044F18E8B92435BF6FF7DE457283915C45517D722EDB8B08F1DFC3
         self.a = 0x787968B4FA32C3FD2417842E73BBFEFF2F3C848B6831D7E0EC65228B3937E498
@@ -15,6 +58,29 @@ class SM2Curve:
         self.n = 0x8542D69E4C044F18E8B92435BF6FF7DD297720630485628D5AE74EE7C32E79B7
         self.Gx = 0x421DEBD61B62EAB6746434EBC3CC315E32220B3BADD50BDC4C4E6C147FEDD43D
         self.Gy = 0x0680512BCBB42C07D47349D2153B70C4E5D7FDFCBFA36EA1A85841B9E46E09A2
+        self.jacobian = JacobianEngine(self)
+        self.ladder = LadderEngine(self)
+        self.table_path = table_path  # 基点表缓存文件，None 表示只在内存中构建
+        self._base_table = None
+        self._g_odd = None
+        self.key_tables = KeyTableCache(self.jacobian)
+
+    @property
+    def base_table(self) -> FixedBaseTable:
+        """基点 G 的固定基表，第一次使用时构建（或从 table_path 读取）"""
+        if self._base_table is None:
+            if self.table_path:
+                self._base_table = FixedBaseTable.load_or_build(self, self.table_path)
+            else:
+                self._base_table = FixedBaseTable(self)
+        return self._base_table
+
+    def is_on_curve(self, P: Tuple[int, int]) -> bool:
+        """P 是否为曲线上的有限点（坐标须在 [0, p) 内）"""
+        x, y = P
+        if not (0 <= x < self.p and 0 <= y < self.p) or P == (0, 0):
+            return False
+        return (y * y - x * x * x - self.a * x - self.b) % self.p == 0
 
     def point_add(self, P: Tuple[int, int], Q: Tuple[int, int]) -> Tuple[int, int]:
         """椭圆曲线点加法"""
@@ -34,7 +100,46 @@ class SM2Curve:
         y3 = (lam * (P[0] - x3) - P[1]) % self.p
         return (x3, y3)
 
-    def scalar_mult(self, k: int, P: Tuple[int, int]) -> Tuple[int, int]:
+    def _constant_time(self, constant_time) -> bool:
+        return self.backend == "ladder" if constant_time is None else constant_time
+
+    def scalar_mult(self, k: int, P: Tuple[int, int], constant_time: bool = None) -> Tuple[int, int]:
+        """椭圆曲线标量乘法，按 backend 选择实现；constant_time 可按次覆盖（None 表示随后端）"""
+        if self._constant_time(constant_time):
+            return (0, 0) if P == (0, 0) else self.ladder.scalar_mult(k, P)
+        if self.backend == "affine":
+            return self.scalar_mult_affine(k, P)
+        return self.jacobian.scalar_mult(k, P)
+
+    def base_mult(self, k: int, constant_time: bool = None) -> Tuple[int, int]:
+        """k·G，Jacobian 后端下查固定基表，常数时间模式下走 Montgomery 阶梯"""
+        if self._constant_time(constant_time):
+            return self.ladder.scalar_mult(k, (self.Gx, self.Gy))
+        if self.backend == "affine":
+            return self.scalar_mult_affine(k, (self.Gx, self.Gy))
+        return self.base_table.mult(k)
+
+    def base_mult_add(self, s: int, t: int, Q: Tuple[int, int]) -> Tuple[int, int]:
+        """计算 s·G + t·Q（验签用）。Jacobian 后端下用 Straus 交错法：
+        G 与 Q 的 wNAF 共用同一串倍点，Q 的奇数倍点表按公钥缓存，最后只做一次模逆"""
+        if self.backend == "affine":
+            return self.point_add(self.scalar_mult_affine(s, (self.Gx, self.Gy)),
+                                  self.scalar_mult_affine(t, Q))
+        return self.jacobian.to_affine(self.base_mult_add_jacobian(s, t, Q))
+
+    def base_mult_add_jacobian(self, s: int, t: int, Q: Tuple[int, int], table=None) -> JacobianPoint:
+        """base_mult_add 的 Jacobian 坐标版本，不做模逆；table 为 Q 的奇数倍点表，缺省时查 LRU"""
+        J = self.jacobian
+        if self._g_odd is None:
+            self._g_odd = J.odd_multiples_affine((self.Gx, self.Gy), G_WINDOW)
+        if table is None:
+            table = self.key_tables.get(Q)
+        return J.joint_mult([
+            (s, G_WINDOW, self._g_odd),
+            (t, self.key_tables.window, table),
+        ])
+
+    def scalar_mult_affine(self, k: int, P: Tuple[int, int]) -> Tuple[int, int]:
         """椭圆曲线标量乘法（double-and-add算法）"""
         result = (0, 0)  # 无穷远点
         addend = P
@@ -50,72 +155,170 @@ class SM2Curve:
 class SM2:
     """SM2数字签名算法实现"""
 
-    def __init__(self):
-        self.curve = SM2Curve()
-        self.hash_func = hashlib.sha256  # 实际应用应使用SM3
+    def __init__(self, backend: str = "wnaf", table_path: str = None):
+        self.curve = SM2Curve(backend, table_path)
+        self.za_cache = ZACache(self.curve)  # (user_id, 公钥) -> 已吸收 ZA 的 SM3 状态
+        self._public_keys = OrderedDict()    # 签名时由私钥求公钥（计算 ZA 用）的小缓存
 
-    def generate_keypair(self) -> Tuple[int, Tuple[int, int]]:
+    def generate_keypair(self, constant_time: bool = None) -> Tuple[int, Tuple[int, int]]:
         """生成SM2密钥对"""
         private_key = secrets.randbelow(self.curve.n - 1) + 1
-        public_key = self.curve.scalar_mult(private_key, (self.curve.Gx, self.curve.Gy))
+        public_key = self.curve.base_mult(private_key, constant_time)
         return private_key, public_key
 
-    def sign(self, private_key: int, message: str, user_id: str = "default") -> Tuple[int, int]:
-        """SM2签名"""
-        # 简化版ZA计算
-        ZA = hashlib.sha256(user_id.encode()).digest()
-        e = int.from_bytes(hashlib.sha256(ZA + message.encode()).digest(), 'big') % self.curve.n
+    def generate_keypairs(self, count: int) -> List[Tuple[int, Tuple[int, int]]]:
+        """批量生成密钥对，所有公钥一次批量转换为仿射坐标"""
+        n = self.curve.n
+        private_keys = [secrets.randbelow(n - 1) + 1 for _ in range(count)]
+        if self.curve.backend != "wnaf":
+            return [(d, self.curve.base_mult(d)) for d in private_keys]
+        table = self.curve.base_table
+        public_keys = self.curve.jacobian.batch_to_affine(
+            [table.mult_jacobian(d) for d in private_keys])
+        return list(zip(private_keys, public_keys))
+
+    def _hash_e(self, user_id, public_key: Tuple[int, int], message) -> int:
+        """e = SM3(ZA || M) mod n，ZA 所在的 SM3 状态按身份缓存"""
+        return self.za_cache.e(user_id, public_key, message) % self.curve.n
+
+    def public_key_of(self, private_key: int, constant_time: bool = None) -> Tuple[int, int]:
+        public_key = self._public_keys.get(private_key)
+        if public_key is None:
+            public_key = self.curve.base_mult(private_key, constant_time)
+            self._public_keys[private_key] = public_key
+            if len(self._public_keys) > 256:
+                self._public_keys.popitem(last=False)
+        return public_key
+
+    def sign(self, private_key: int, message, user_id=DEFAULT_USER_ID,
+             constant_time: bool = None, public_key: Tuple[int, int] = None,
+             nonces=None, canonical: bool = False) -> Tuple[int, int]:
+        """SM2签名。message / user_id 可为 str 或 bytes；public_key 缺省时由私钥求出（带缓存）。
+        constant_time 为 True 时 k·G 使用 Montgomery 阶梯，
+        (1 + d)^-1 用固定指数的费马小定理求逆；None 表示随后端。
+        nonces 为可选的无参函数，每次调用返回一对 (k, x1)，x1 为 k·G 的横坐标
+        （如 sm2_nonce.NoncePool.get），缺省时现场随机生成 k 并计算 k·G。
+        canonical 为 True 时只输出 s <= n/2 的签名（low-s），否则换一个 k 重签"""
+        if public_key is None:
+            public_key = self.public_key_of(private_key, constant_time)
+        e = self._hash_e(user_id, public_key, message)
+        n = self.curve.n
+        if self.curve._constant_time(constant_time):
+            d_inv = pow(1 + private_key, n - 2, n)
+        else:
+            d_inv = pow(1 + private_key, -1, n)
 
         while True:
-            k = secrets.randbelow(self.curve.n - 1) + 1
-            x1, y1 = self.curve.scalar_mult(k, (self.curve.Gx, self.curve.Gy))
-            r = (e + x1) % self.curve.n
-            if r == 0 or r + k == self.curve.n:
+            if nonces is None:
+                k = secrets.randbelow(n - 1) + 1
+                x1, y1 = self.curve.base_mult(k, constant_time)
+            else:
+                k, x1 = nonces()
+            r = (e + x1) % n
+            if r == 0 or r + k == n:
                 continue
 
-            s = (pow(1 + private_key, -1, self.curve.n) * (k - r * private_key)) % self.curve.n
-            if s != 0:
+            s = (d_inv * (k - r * private_key)) % n
+            if s != 0 and not (canonical and s > n // 2):
                 return (r, s)
 
-    def verify(self, public_key: Tuple[int, int], message: str, signature: Tuple[int, int],
-               user_id: str = "default") -> bool:
-        """SM2验证"""
+    def sign_batch(self, private_key: int, messages: list, user_id=DEFAULT_USER_ID,
+                   canonical: bool = False) -> List[Tuple[int, int]]:
+        """用同一私钥批量签名：所有 k·G 一次批量转换为仿射坐标，(1 + d)^-1 只算一次。
+        r = 0、r + k = n、s = 0（以及 canonical 时 s > n/2）的项换新的 k，整批重算"""
+        if self.curve.backend != "wnaf":
+            return [self.sign(private_key, m, user_id, canonical=canonical) for m in messages]
+        n = self.curve.n
+        table = self.curve.base_table
+        d_inv = pow(1 + private_key, -1, n)
+        public_key = self.public_key_of(private_key)
+        es = [self._hash_e(user_id, public_key, m) for m in messages]
+        signatures = [None] * len(messages)
+        pending = list(range(len(messages)))
+        while pending:
+            ks = [secrets.randbelow(n - 1) + 1 for _ in pending]
+            points = self.curve.jacobian.batch_to_affine([table.mult_jacobian(k) for k in ks])
+            retry = []
+            for i, k, (x1, _) in zip(pending, ks, points):
+                r = (es[i] + x1) % n
+                s = d_inv * (k - r * private_key) % n
+                if r == 0 or r + k == n or s == 0 or (canonical and s > n // 2):
+                    retry.append(i)
+                else:
+                    signatures[i] = (r, s)
+            pending = retry
+        return signatures
+
+    def verify(self, public_key: Tuple[int, int], message, signature: Tuple[int, int],
+               user_id=DEFAULT_USER_ID, strict: bool = False) -> bool:
+        """SM2验证。strict 为 True 时只接受 s <= n/2 的规范签名"""
         r, s = signature
-        if not (1 <= r < self.curve.n and 1 <= s < self.curve.n):
+        s_max = self.curve.n // 2 if strict else self.curve.n - 1
+        if not (1 <= r < self.curve.n and 1 <= s <= s_max):
             return False
 
-        ZA = hashlib.sha256(user_id.encode()).digest()
-        e = int.from_bytes(hashlib.sha256(ZA + message.encode()).digest(), 'big') % self.curve.n
+        e = self._hash_e(user_id, public_key, message)
 
         t = (r + s) % self.curve.n
         if t == 0:
             return False
 
-        x1, y1 = self.curve.point_add(
-            self.curve.scalar_mult(s, (self.curve.Gx, self.curve.Gy)),
-            self.curve.scalar_mult(t, public_key)
-        )
+        x1, y1 = self.curve.base_mult_add(s, t, public_key)
 
         R = (e + x1) % self.curve.n
         return R == r
 
-    # 添加到 sm2_core.py 的 SM2 类中
+    def verify_batch(self, items, strict: bool = False) -> List[bool]:
+        """批量验签。items 为 (公钥, 消息, 签名) 或 (公钥, 消息, 签名, user_id) 序列，返回逐项结果。
+        strict 为 True 时 s > n/2 的非规范签名在哈希之前就判为无效。
+
+        同一公钥的签名归为一组，组内共用一张预计算表；各项的 s·G + t·P 先保持 Jacobian 坐标，
+        再用 Montgomery 技巧一次模逆统一求出 x1。结果为无穷远点（Z = 0）的项无法参与批量求逆，
+        在此之前就单独判为无效，不影响同批其他签名。"""
+        curve = self.curve
+        n, p = curve.n, curve.p
+        s_max = n // 2 if strict else n - 1
+        results = [False] * len(items)
+        groups = {}
+        for i, item in enumerate(items):
+            public_key, message, (r, s) = item[:3]
+            user_id = item[3] if len(item) > 3 else DEFAULT_USER_ID
+            if not (1 <= r < n and 1 <= s <= s_max):
+                continue
+            t = (r + s) % n
+            if t == 0:
+                continue
+            groups.setdefault(public_key, []).append(
+                (i, r, s, t, self._hash_e(user_id, public_key, message)))
+
+        if curve.backend == "affine":
+            for public_key, group in groups.items():
+                for i, r, s, t, e in group:
+                    results[i] = (e + curve.base_mult_add(s, t, public_key)[0]) % n == r
+            return results
+
+        pending = []
+        for public_key, group in groups.items():
+            table = curve.key_tables.get(public_key)
+            for i, r, s, t, e in group:
+                X, _, Z = curve.base_mult_add_jacobian(s, t, public_key, table)
+                if Z != 0:
+                    pending.append((i, r, e, X, Z))
+
+        z_invs = batch_inverse([Z for *_, Z in pending], p)
+        for (i, r, e, X, _), z_inv in zip(pending, z_invs):
+            x1 = X * z_inv * z_inv % p
+            results[i] = (e + x1) % n == r
+        return results
+
     def compute_ZA(self, user_id: str, pub_key: tuple) -> bytes:
-        """计算SM2签名所需的ZA"""
-        entl = len(user_id).to_bytes(2, 'big')
-        a_bytes = self.int_to_bytes(self.curve.a)
-        b_bytes = self.int_to_bytes(self.curve.b)
-        gx_bytes = self.int_to_bytes(self.curve.Gx)
-        gy_bytes = self.int_to_bytes(self.curve.Gy)
-        x_bytes = self.int_to_bytes(pub_key[0])
-        y_bytes = self.int_to_bytes(pub_key[1])
-        return hashlib.sha256(entl + user_id.encode() + a_bytes + b_bytes +
-                              gx_bytes + gy_bytes + x_bytes + y_bytes).digest()
+        """计算SM2签名所需的ZA（GM/T 0003.2，SM3，定长编码）"""
+        return compute_za(self.curve, user_id, pub_key)
 
     # 同时添加辅助方法
     def int_to_bytes(self, x: int) -> bytes:
-        """整数转换为字节"""
-        return x.to_bytes((x.bit_length() + 7) // 8, 'big')
+        """整数转换为 32 字节定长大端编码"""
+        return int_to_bytes(x)
 
 # 在sm2_core.py文件末尾添加：
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+# sm2/sm2_encoding.py
+from typing import List, Tuple
+
+from sm2_hash import COORD
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时批量解码退回逐项检查
+    np = None
+
+RAW_SIG_SIZE = 2 * COORD         # r || s，各 32 字节大端
+COMPRESSED_SIZE = 1 + COORD      # 02/03 || x
+UNCOMPRESSED_SIZE = 1 + 2 * COORD  # 04 || x || y
+
+
+# ========================
+# Part 1: 定长整数与签名
+# ========================
+
+def int_to_bytes(x: int, length: int = COORD) -> bytes:
+    """定长大端编码：曲线上的整数一律 32 字节，拼接后不会产生歧义"""
+    return x.to_bytes(length, "big")
+
+
+def signature_to_raw(signature: Tuple[int, int]) -> bytes:
+    r, s = signature
+    return int_to_bytes(r) + int_to_bytes(s)
+
+
+def signature_from_raw(data: bytes) -> Tuple[int, int]:
+    if len(data) != RAW_SIG_SIZE:
+        raise ValueError("签名长度错误")
+    return int.from_bytes(data[:COORD], "big"), int.from_bytes(data[COORD:], "big")
+
+
+def _der_integer(x: int) -> bytes:
+    body = x.to_bytes(x.bit_length() // 8 + 1, "big")  # 最高位为 1 时前面补 0x00
+    return b"\x02" + bytes([len(body)]) + body
+
+
+def signature_to_der(signature: Tuple[int, int]) -> bytes:
+    """DER 编码 SEQUENCE { r INTEGER, s INTEGER }（GM/T 0009 的签名格式），最长 72 字节"""
+    body = b"".join(_der_integer(v) for v in signature)
+    return b"\x30" + bytes([len(body)]) + body
+
+
+def signature_from_der(data: bytes) -> Tuple[int, int]:
+    """严格解析 DER 签名：只接受短格式长度、最短整数编码、无多余字节，否则抛出 ValueError"""
+    if len(data) < 8 or data[0] != 0x30 or data[1] != len(data) - 2:
+        raise ValueError("DER 签名格式错误")
+    values, pos = [], 2
+    for _ in range(2):
+        if pos + 2 > len(data) or data[pos] != 0x02:
+            raise ValueError("DER 签名格式错误")
+        size = data[pos + 1]
+        body = data[pos + 2:pos + 2 + size]
+        if not 1 <= size <= COORD + 1 or len(body) != size:
+            raise ValueError("DER 整数长度错误")
+        if body[0] & 0x80 or (size > 1 and body[0] == 0 and not body[1] & 0x80):
+            raise ValueError("DER 整数不是最短的非负编码")
+        values.append(int.from_bytes(body, "big"))
+        pos += 2 + size
+    if pos != len(data):
+        raise ValueError("DER 签名末尾有多余字节")
+    return values[0], values[1]
+
+
+# ========================
+# Part 2: SEC1 风格公钥编码与点压缩
+# ========================
+
+def sqrt_mod(curve, a: int) -> int:
+    """模 p 平方根。SM2 的 p ≡ 3 (mod 4)，a 的平方根为 a^((p+1)/4)，a 不是二次剩余时抛出 ValueError"""
+    p = curve.p
+    y = pow(a, (p + 1) // 4, p)
+    if y * y % p != a % p:
+        raise ValueError("x 对应的点不在曲线上")
+    return y
+
+
+def encode_point(P: Tuple[int, int], compressed: bool = True) -> bytes:
+    """压缩格式 02/03 || x（按 y 的奇偶），未压缩格式 04 || x || y"""
+    x, y = P
+    if compressed:
+        return bytes([2 | (y & 1)]) + int_to_bytes(x)
+    return b"\x04" + int_to_bytes(x) + int_to_bytes(y)
+
+
+def decompress_point(curve, prefix: int, x: int) -> Tuple[int, int]:
+    if not 0 <= x < curve.p:
+        raise ValueError("x 超出范围")
+    y = sqrt_mod(curve, (x * x * x + curve.a * x + curve.b) % curve.p)
+    if y & 1 != prefix & 1:
+        if y == 0:
+            raise ValueError("y = 0 时前缀只能为 02")
+        y = curve.p - y
+    return x, y
+
+
+def decode_point(curve, data: bytes) -> Tuple[int, int]:
+    """解析压缩或未压缩公钥并检查点在曲线上，格式不符时抛出 ValueError"""
+    if len(data) == COMPRESSED_SIZE and data[0] in (2, 3):
+        P = decompress_point(curve, data[0], int.from_bytes(data[1:], "big"))
+    elif len(data) == UNCOMPRESSED_SIZE and data[0] == 4:
+        P = int.from_bytes(data[1:1 + COORD], "big"), int.from_bytes(data[1 + COORD:], "big")
+    else:
+        raise ValueError("公钥编码格式错误")
+    if not curve.is_on_curve(P):
+        raise ValueError("公钥不在曲线上")
+    return P
+
+
+# ========================
+# Part 3: 批量解码
+# ========================
+
+def _records(buffer, size: int, name: str) -> memoryview:
+    view = memoryview(buffer).cast("B")
+    if len(view) % size:
+        raise ValueError(f"{name}缓冲区长度不是 {size} 的整数倍")
+    return view
+
+
+def encode_signatures(signatures) -> bytes:
+    return b"".join(signature_to_raw(sig) for sig in signatures)
+
+
+def decode_signatures(buffer) -> List[Tuple[int, int]]:
+    """把连续存放的定长签名 (r || s) 解析为 (r, s) 列表，直接在缓冲区上切片，不复制"""
+    view = _records(buffer, RAW_SIG_SIZE, "签名")
+    from_bytes = int.from_bytes
+    return [(from_bytes(view[i:i + COORD], "big"), from_bytes(view[i + COORD:i + RAW_SIG_SIZE], "big"))
+            for i in range(0, len(view), RAW_SIG_SIZE)]
+
+
+def _limbs(x: int):
+    """32 字节整数拆成 4 个 64 位分量（高位在前）"""
+    return [(x >> (64 * (3 - j))) & 0xFFFFFFFFFFFFFFFF for j in range(4)]
+
+
+def _compare(a, bound: int):
+    """按 4 个分量做向量化的字典序比较，返回 (a < bound, a == bound)"""
+    less = np.zeros(len(a), dtype=bool)
+    equal = np.ones(len(a), dtype=bool)
+    for j, limb in enumerate(_limbs(bound)):
+        less |= equal & (a[:, j] < np.uint64(limb))
+        equal &= a[:, j] == np.uint64(limb)
+    return less, equal
+
+
+def canonical_mask(buffer, n: int, low_s: bool = True):
+    """逐条判断连续存放的定长签名 (r || s) 是否规范：1 <= r < n，1 <= s <= n/2（low_s 为 False 时 s < n）。
+
+    只做字节比较，不涉及哈希与点运算，可在批量验签之前先滤掉格式不合规的签名。
+    NumPy 下把每条签名看作 8 个大端 64 位分量整体比较，返回布尔数组；否则返回 bool 列表"""
+    view = _records(buffer, RAW_SIG_SIZE, "签名")
+    s_max = n // 2 if low_s else n - 1
+    if np is None:
+        return [1 <= r < n and 1 <= s <= s_max for r, s in decode_signatures(view)]
+    limbs = np.frombuffer(view, dtype=">u8").reshape(-1, 8)
+    r, s = limbs[:, :4], limbs[:, 4:]
+    r_less, _ = _compare(r, n)
+    s_less, s_equal = _compare(s, s_max)
+    return r.any(axis=1) & r_less & s.any(axis=1) & (s_less | s_equal)
+
+
+def encode_public_keys(points, compressed: bool = True) -> bytes:
+    return b"".join(encode_point(P, compressed) for P in points)
+
+
+def _check_prefixes(view: memoryview, size: int, allowed: Tuple[int, ...]):
+    """一次检查所有记录的前缀字节（NumPy 向量化）"""
+    if np is not None:
+        prefixes = np.frombuffer(view, dtype=np.uint8)[::size]
+        ok = np.isin(prefixes, allowed)
+        if not ok.all():
+            raise ValueError(f"第 {int(np.argmin(ok))} 个公钥的前缀错误")
+        return
+    for i in range(0, len(view), size):
+        if view[i] not in allowed:
+            raise ValueError(f"第 {i // size} 个公钥的前缀错误")
+
+
+def decode_public_keys(curve, buffer, compressed: bool = True) -> List[Tuple[int, int]]:
+    """批量解析连续存放的公钥（全部压缩或全部未压缩），每个点都检查在曲线上"""
+    if not compressed:
+        view = _records(buffer, UNCOMPRESSED_SIZE, "公钥")
+        _check_prefixes(view, UNCOMPRESSED_SIZE, (4,))
+        from_bytes = int.from_bytes
+        points = [(from_bytes(view[i + 1:i + 1 + COORD], "big"),
+                   from_bytes(view[i + 1 + COORD:i + UNCOMPRESSED_SIZE], "big"))
+                  for i in range(0, len(view), UNCOMPRESSED_SIZE)]
+        for i, P in enumerate(points):
+            if not curve.is_on_curve(P):
+                raise ValueError(f"第 {i} 个公钥不在曲线上")
+        return points
+    view = _records(buffer, COMPRESSED_SIZE, "公钥")
+    _check_prefixes(view, COMPRESSED_SIZE, (2, 3))
+    return [decompress_point(curve, view[i], int.from_bytes(view[i + 1:i + COMPRESSED_SIZE], "big"))
+            for i in range(0, len(view), COMPRESSED_SIZE)]
+
+
+class PublicKeyStore:
+    """按压缩格式保存大量公钥：整块缓冲区（每个 33 字节）加按需解压。
+
+    加载时只检查长度与前缀，不做任何模幂；store[i] 第一次访问时才开平方根解压
+    （并检查在曲线上），结果缓存在 max_cached 个条目的字典里。
+    相比未压缩编码（65 字节）或 (x, y) 元组，常驻内存约为一半甚至更少。"""
+
+    def __init__(self, curve, buffer, max_cached: int = 4096):
+        self.curve = curve
+        self._view = _records(buffer, COMPRESSED_SIZE, "公钥")
+        _check_prefixes(self._view, COMPRESSED_SIZE, (2, 3))
+        self.max_cached = max_cached
+        self._cache = {}
+
+    @classmethod
+    def from_points(cls, curve, points, max_cached: int = 4096) -> "PublicKeyStore":
+        return cls(curve, encode_public_keys(points), max_cached)
+
+    def __len__(self):
+        return len(self._view) // COMPRESSED_SIZE
+
+    def raw(self, i: int) -> bytes:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._view[i * COMPRESSED_SIZE:(i + 1) * COMPRESSED_SIZE].tobytes()
+
+    def x(self, i: int) -> int:
+        """只取横坐标，不需要解压"""
+        return int.from_bytes(self.raw(i)[1:], "big")
+
+    def __getitem__(self, i: int) -> Tuple[int, int]:
+        if i < 0:
+            i += len(self)
+        P = self._cache.get(i)
+        if P is None:
+            data = self.raw(i)
+            try:
+                P = decompress_point(self.curve, data[0], int.from_bytes(data[1:], "big"))
+            except ValueError as exc:
+                raise ValueError(f"第 {i} 个公钥: {exc}") from None
+            if len(self._cache) >= self.max_cached:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[i] = P
+        return P
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tobytes(self) -> bytes:
+        return self._view.tobytes()
+
+
+# ========================
+# 测试示例 + 性能测试
+# ========================
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    from sm2_core import SM2
+
+    parser = argparse.ArgumentParser(description="SM2 公钥 / 签名编码与批量解码")
+    parser.add_argument("--keys", type=int, default=2000, help="公钥与签名数量")
+    args = parser.parse_args()
+
+    sm2 = SM2()
+    curve = sm2.curve
+    d, P = sm2.generate_keypair()
+    sig = sm2.sign(d, "hello")
+    print("[压缩公钥]", encode_point(P).hex())
+    print("[解压一致]", decode_point(curve, encode_point(P)) == P)
+    print("[DER 签名]", signature_to_der(sig).hex())
+    print("[DER 往返]", signature_from_der(signature_to_der(sig)) == sig)
+
+    points = [P for _, P in sm2.generate_keypairs(args.keys)]
+    sigs = sm2.sign_batch(d, [f"m{i}" for i in range(args.keys)])
+    compressed, uncompressed = encode_public_keys(points), encode_public_keys(points, False)
+    raw_sigs = encode_signatures(sigs)
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - t0) * 1e3
+
+    tuples_size = sys.getsizeof(points) + sum(
+        sys.getsizeof(Q) + sys.getsizeof(Q[0]) + sys.getsizeof(Q[1]) for Q in points)
+    store, t_store = timed(lambda: PublicKeyStore(curve, compressed))
+    eager, t_eager = timed(lambda: decode_public_keys(curve, compressed))
+    plain, t_plain = timed(lambda: decode_public_keys(curve, uncompressed, compressed=False))
+    decoded_sigs, t_sigs = timed(lambda: decode_signatures(raw_sigs))
+    mask, t_mask = timed(lambda: canonical_mask(raw_sigs, curve.n))
+    assert eager == plain == points and decoded_sigs == sigs
+    print(f"{args.keys} 个公钥: 元组 {tuples_size} B, 未压缩 {len(uncompressed)} B, 压缩 {len(compressed)} B")
+    print(f"  PublicKeyStore 加载 {t_store:.2f} ms（按需解压）")
+    print(f"  压缩格式全部解压 {t_eager:.1f} ms ({t_eager * 1e3 / args.keys:.1f} us/个)")
+    print(f"  未压缩格式解析 {t_plain:.1f} ms ({t_plain * 1e3 / args.keys:.1f} us/个)")
+    print(f"{args.keys} 个签名解析 {t_sigs:.2f} ms ({t_sigs * 1e3 / args.keys:.2f} us/个)")
+    print(f"{args.keys} 个签名规范性检查 {t_mask:.2f} ms ({t_mask * 1e3 / args.keys:.2f} us/个), "
+          f"low-s 签名 {int(sum(mask))} 个")
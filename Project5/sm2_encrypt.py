@@ -0,0 +1,119 @@
+# sm2/sm2_encrypt.py
+import hmac
+import secrets
+from typing import Tuple
+
+from sm2_core import SM2
+from sm2_hash import COORD, SM3
+from sm3_hmac import sm3_kdf
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时退回整数异或
+    np = None
+
+C1_SIZE = 1 + 2 * COORD  # 未压缩点 04 || x1 || y1
+C3_SIZE = 32
+
+
+def xor_bytes(data: bytes, stream: bytes) -> bytes:
+    """按字节异或，整段向量化完成，没有逐字节循环"""
+    if np is not None:
+        return (np.frombuffer(data, dtype=np.uint8) ^ np.frombuffer(stream, dtype=np.uint8)).tobytes()
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+
+def _keystream(x2: int, y2: int, klen: int) -> bytes:
+    """t = KDF(x2 || y2, klen)，计数器分组由 sm3_kdf 批量多缓冲计算"""
+    return sm3_kdf(x2.to_bytes(COORD, "big") + y2.to_bytes(COORD, "big"), klen)
+
+
+def _c3(x2: int, message: bytes, y2: int) -> bytes:
+    return SM3(x2.to_bytes(COORD, "big") + message + y2.to_bytes(COORD, "big")).digest()
+
+
+def _encrypt_with_k(curve, public_key: Tuple[int, int], message: bytes, k: int,
+                    constant_time: bool = None):
+    """用给定的 k 加密，t 全 0 时返回 None"""
+    x1, y1 = curve.base_mult(k, constant_time)
+    x2, y2 = curve.scalar_mult(k, public_key, constant_time)
+    t = _keystream(x2, y2, len(message))
+    if message and t.count(0) == len(t):
+        return None
+    c1 = b"\x04" + x1.to_bytes(COORD, "big") + y1.to_bytes(COORD, "big")
+    return c1 + _c3(x2, message, y2) + xor_bytes(message, t)
+
+
+def encrypt(sm2: SM2, public_key: Tuple[int, int], message: bytes,
+            constant_time: bool = None) -> bytes:
+    """GM/T 0003.4 公钥加密，输出 C1 || C3 || C2。
+    C1 = k·G，(x2, y2) = k·P，C2 = M ⊕ KDF(x2 || y2, len(M))，C3 = SM3(x2 || M || y2)"""
+    curve = sm2.curve
+    if not curve.is_on_curve(public_key):
+        raise ValueError("公钥不在曲线上")
+    message = bytes(message)
+    while True:
+        k = secrets.randbelow(curve.n - 1) + 1
+        ciphertext = _encrypt_with_k(curve, public_key, message, k, constant_time)
+        if ciphertext is not None:  # t 全 0 时重新选 k
+            return ciphertext
+
+
+def decrypt(sm2: SM2, private_key: int, ciphertext: bytes, constant_time: bool = None) -> bytes:
+    """解密 C1 || C3 || C2，C1 不在曲线上、t 全 0 或 C3 校验失败时抛出 ValueError"""
+    curve = sm2.curve
+    if len(ciphertext) < C1_SIZE + C3_SIZE or ciphertext[0] != 4:
+        raise ValueError("密文格式错误")
+    x1 = int.from_bytes(ciphertext[1:1 + COORD], "big")
+    y1 = int.from_bytes(ciphertext[1 + COORD:C1_SIZE], "big")
+    if not curve.is_on_curve((x1, y1)):
+        raise ValueError("C1 不在曲线上")
+    c3 = ciphertext[C1_SIZE:C1_SIZE + C3_SIZE]
+    c2 = ciphertext[C1_SIZE + C3_SIZE:]
+
+    x2, y2 = curve.scalar_mult(private_key, (x1, y1), constant_time)
+    t = _keystream(x2, y2, len(c2))
+    if c2 and t.count(0) == len(t):
+        raise ValueError("KDF 输出全 0")
+    message = xor_bytes(c2, t)
+    if not hmac.compare_digest(_c3(x2, message, y2), c3):
+        raise ValueError("C3 校验失败")
+    return message
+
+
+# ========================
+# 测试示例 + 性能测试
+# ========================
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description="SM2 公钥加密 / 解密吞吐量")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[32, 1 << 10, 32 << 10, 1 << 20], help="明文长度 (字节)")
+    args = parser.parse_args()
+
+    sm2 = SM2()
+    d, P = sm2.generate_keypair()
+    msg = "encryption standard".encode()
+    c = encrypt(sm2, P, msg)
+    print("[密文]", c.hex())
+    print("[解密结果]", decrypt(sm2, d, c) == msg)
+    try:
+        decrypt(sm2, d, c[:-1] + bytes([c[-1] ^ 1]))
+    except ValueError as e:
+        print("[篡改密文]", e)
+
+    print(f"{'明文长度':>10s} {'加密 ms':>10s} {'解密 ms':>10s} {'KDF ms':>10s} {'加密 MB/s':>10s}")
+    for size in args.sizes:
+        m = os.urandom(size)
+        t0 = time.perf_counter()
+        c = encrypt(sm2, P, m)
+        t1 = time.perf_counter()
+        assert decrypt(sm2, d, c) == m
+        t2 = time.perf_counter()
+        _keystream(1, 2, size)
+        t3 = time.perf_counter()
+        print(f"{size:10d} {(t1 - t0) * 1e3:10.1f} {(t2 - t1) * 1e3:10.1f} "
+              f"{(t3 - t2) * 1e3:10.1f} {size / (t1 - t0) / 1024 / 1024:10.3f}")
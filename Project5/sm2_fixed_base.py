@@ -0,0 +1,121 @@
+# sm2/sm2_fixed_base.py
+import os
+import struct
+from typing import List, Tuple
+
+from sm2_jacobian import INFINITY, JacobianPoint
+
+# 缓存文件格式：头部 + 按行排列的仿射点 (x || y，各 32 字节大端)
+MAGIC = b"SM2FBT01"
+HEADER = struct.Struct(">8sBH32s")  # magic, 窗口宽度, 窗口数, 曲线 Gx
+COORD = 32
+
+
+class FixedBaseTable:
+    """基点 G 的固定基窗口表。
+
+    table[i][j - 1] = j · 2^(w·i) · G（仿射坐标），k·G 拆成 w 比特一段，
+    每段查表做一次混合点加，完全不需要倍点。"""
+
+    def __init__(self, curve, window: int = 4, table: List[List[Tuple[int, int]]] = None):
+        self.curve = curve
+        self.window = window
+        self.windows = (curve.n.bit_length() + window - 1) // window
+        self.table = table if table is not None else self._build()
+
+    def _build(self) -> List[List[Tuple[int, int]]]:
+        J = self.curve.jacobian
+        base = J.to_jacobian((self.curve.Gx, self.curve.Gy))
+        points = []
+        for _ in range(self.windows):
+            row = [base]
+            for _ in range((1 << self.window) - 2):
+                row.append(J.add(row[-1], base))
+            base = J.add(row[-1], base)  # 2^w · base
+            points += row
+        # 整张表一次批量转换为仿射坐标
+        points = J.batch_to_affine(points)
+        per_row = (1 << self.window) - 1
+        return [points[i:i + per_row] for i in range(0, len(points), per_row)]
+
+    def mult_jacobian(self, k: int) -> JacobianPoint:
+        k %= self.curve.n
+        add_mixed = self.curve.jacobian.add_mixed
+        w, mask = self.window, (1 << self.window) - 1
+        R = INFINITY
+        for row in self.table:
+            d = k & mask
+            if d:
+                R = add_mixed(R, row[d - 1])
+            k >>= w
+        return R
+
+    def mult(self, k: int) -> Tuple[int, int]:
+        return self.curve.jacobian.to_affine(self.mult_jacobian(k))
+
+    # ========================
+    # 序列化
+    # ========================
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.window, self.windows,
+                                self.curve.Gx.to_bytes(COORD, "big")))
+            for row in self.table:
+                for x, y in row:
+                    f.write(x.to_bytes(COORD, "big") + y.to_bytes(COORD, "big"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, curve, path: str) -> "FixedBaseTable":
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, window, windows, gx = HEADER.unpack_from(data)
+        per_row = (1 << window) - 1
+        if magic != MAGIC or gx != curve.Gx.to_bytes(COORD, "big"):
+            raise ValueError(f"{path}: 不是该曲线的基点表")
+        if len(data) != HEADER.size + windows * per_row * 2 * COORD:
+            raise ValueError(f"{path}: 文件长度不正确")
+        table = []
+        off = HEADER.size
+        for _ in range(windows):
+            row = []
+            for _ in range(per_row):
+                row.append((int.from_bytes(data[off:off + COORD], "big"),
+                            int.from_bytes(data[off + COORD:off + 2 * COORD], "big")))
+                off += 2 * COORD
+            table.append(row)
+        fbt = cls(curve, window, table)
+        if fbt.windows != windows or table[0][0] != (curve.Gx, curve.Gy) or not fbt.is_consistent():
+            raise ValueError(f"{path}: 基点表内容与曲线不符")
+        return fbt
+
+    def is_consistent(self) -> bool:
+        """逐点检查表的结构：每个点都在曲线上，row[j] = row[j - 1] + row[0]，
+        下一行首点 = 本行末点 + 本行首点（即 2^w · row[0]）。首行首点为 G 时整张表即正确"""
+        curve = self.curve
+        prev = None
+        for row in self.table:
+            if not all(curve.is_on_curve(P) for P in row):
+                return False
+            if prev is not None and row[0] != curve.point_add(prev[-1], prev[0]):
+                return False
+            for j in range(1, len(row)):
+                if row[j] != curve.point_add(row[j - 1], row[0]):
+                    return False
+            prev = row
+        return True
+
+    @classmethod
+    def load_or_build(cls, curve, path: str, window: int = 4) -> "FixedBaseTable":
+        """优先读取缓存文件，文件不存在或无效时重新构建并写回"""
+        try:
+            fbt = cls.load(curve, path)
+            if fbt.window == window:
+                return fbt
+        except (OSError, ValueError, struct.error):
+            pass
+        fbt = cls(curve, window)
+        fbt.save(path)
+        return fbt
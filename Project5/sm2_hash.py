@@ -0,0 +1,81 @@
+# sm2/sm2_hash.py
+from collections import OrderedDict
+from typing import Tuple, Union
+
+# 复用 Project4 中的 SM3 实现，运行前需把 ../Project4 加入 PYTHONPATH（见 README 与 pytest.ini）
+from sm3 import SM3
+
+COORD = 32  # 曲线参数与坐标统一编码为 32 字节大端
+DEFAULT_USER_ID = "1234567812345678"  # GM/T 0009 规定的默认用户标识
+
+
+def to_bytes(data: Union[str, bytes]) -> bytes:
+    """字符串按 UTF-8 编码，bytes / bytearray / memoryview 原样转换，其他类型报错"""
+    if isinstance(data, str):
+        return data.encode()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    raise TypeError(f"消息须为 str 或字节串，而不是 {type(data).__name__}")
+
+
+def compute_za(curve, user_id: Union[str, bytes], public_key: Tuple[int, int]) -> bytes:
+    """GM/T 0003.2 的 ZA = SM3(ENTL || ID || a || b || Gx || Gy || xA || yA)，
+    ENTL 为 ID 的比特长度（2 字节），其余各项为定长 32 字节"""
+    uid = to_bytes(user_id)
+    entl = len(uid) * 8
+    if entl >= 1 << 16:
+        raise ValueError("用户标识过长")
+    return SM3(entl.to_bytes(2, "big") + uid + b"".join(
+        v.to_bytes(COORD, "big")
+        for v in (curve.a, curve.b, curve.Gx, curve.Gy, public_key[0], public_key[1])
+    )).digest()
+
+
+def compute_e(curve, user_id: Union[str, bytes], public_key: Tuple[int, int],
+              message: Union[str, bytes]) -> int:
+    """不使用缓存的 e = SM3(ZA || M)，作为整数返回（未模 n）"""
+    h = SM3(compute_za(curve, user_id, public_key))
+    h.update(to_bytes(message))
+    return int.from_bytes(h.digest(), "big")
+
+
+class ZACache:
+    """(user_id, 公钥) -> 已吸收 ZA 的 SM3 状态 的 LRU 缓存。
+
+    ZA 只与身份有关，命中时省去 ZA 本身的 4 次压缩，
+    每次签名 / 验签只需复制状态后吸收消息。"""
+
+    def __init__(self, curve, max_entries: int = 4096):
+        self.curve = curve
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _lookup(self, user_id, public_key) -> Tuple[bytes, SM3]:
+        key = (to_bytes(user_id), tuple(public_key))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        za = compute_za(self.curve, key[0], key[1])
+        entry = self._entries[key] = (za, SM3(za))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def za(self, user_id, public_key) -> bytes:
+        return self._lookup(user_id, public_key)[0]
+
+    def hasher(self, user_id, public_key) -> SM3:
+        """已吸收 ZA 的 SM3 对象副本，继续 update(消息) 即可"""
+        return self._lookup(user_id, public_key)[1].copy()
+
+    def e(self, user_id, public_key, message) -> int:
+        h = self.hasher(user_id, public_key)
+        h.update(to_bytes(message))
+        return int.from_bytes(h.digest(), "big")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,198 @@
+# sm2/sm2_jacobian.py
+from typing import List, Tuple
+
+JacobianPoint = Tuple[int, int, int]
+
+# Jacobian 坐标 (X, Y, Z) 表示仿射点 (X/Z², Y/Z³)，Z = 0 为无穷远点
+INFINITY = (1, 1, 0)
+
+
+def wnaf(k: int, w: int) -> List[int]:
+    """k 的宽度为 w 的 NAF 表示（低位在前），非零位均为奇数且 |d| < 2^(w-1)"""
+    digits = []
+    half, full = 1 << (w - 1), 1 << w
+    while k:
+        if k & 1:
+            d = k & (full - 1)
+            if d >= half:
+                d -= full
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+def batch_inverse(values: List[int], p: int) -> List[int]:
+    """Montgomery 技巧：一次模逆 + 3(N-1) 次乘法求出 N 个数的逆。values 中不能有 0"""
+    if not values:
+        return []
+    prefix = [values[0] % p]
+    for v in values[1:]:
+        prefix.append(prefix[-1] * v % p)
+    inv = pow(prefix[-1], -1, p)
+    out = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        out[i] = inv * prefix[i - 1] % p
+        inv = inv * values[i] % p
+    out[0] = inv
+    return out
+
+
+class JacobianEngine:
+    """SM2 曲线上的 Jacobian 坐标点运算。
+    点加、倍点都不做模逆，整个标量乘法只在最后转换回仿射坐标时做一次模逆。"""
+
+    def __init__(self, curve, window: int = 5):
+        self.p = curve.p
+        self.a = curve.a
+        self.n = curve.n
+        self.window = window
+
+    def to_jacobian(self, P: Tuple[int, int]) -> JacobianPoint:
+        if P == (0, 0):
+            return INFINITY
+        return (P[0], P[1], 1)
+
+    def to_affine(self, P: JacobianPoint) -> Tuple[int, int]:
+        X, Y, Z = P
+        if Z == 0:
+            return (0, 0)
+        p = self.p
+        z_inv = pow(Z, -1, p)
+        z2 = z_inv * z_inv % p
+        return (X * z2 % p, Y * z2 * z_inv % p)
+
+    def batch_to_affine(self, points: List[JacobianPoint]) -> List[Tuple[int, int]]:
+        """批量转换为仿射坐标，N 个点只做一次模逆；无穷远点转换为 (0, 0)"""
+        p = self.p
+        finite = [i for i, P in enumerate(points) if P[2] != 0]
+        out = [(0, 0)] * len(points)
+        z_invs = batch_inverse([points[i][2] for i in finite], p)
+        for i, z_inv in zip(finite, z_invs):
+            X, Y, _ = points[i]
+            z2 = z_inv * z_inv % p
+            out[i] = (X * z2 % p, Y * z2 * z_inv % p)
+        return out
+
+    def neg(self, P: JacobianPoint) -> JacobianPoint:
+        return (P[0], (-P[1]) % self.p, P[2])
+
+    def double(self, P: JacobianPoint) -> JacobianPoint:
+        """倍点：M = 3X² + aZ⁴, S = 4XY², X' = M² - 2S, Y' = M(S - X') - 8Y⁴, Z' = 2YZ"""
+        X, Y, Z = P
+        if Z == 0 or Y == 0:
+            return INFINITY
+        p = self.p
+        YY = Y * Y % p
+        S = 4 * X * YY % p
+        ZZ = Z * Z % p
+        M = (3 * X * X + self.a * ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y * Z % p
+        return (X3, Y3, Z3)
+
+    def add(self, P: JacobianPoint, Q: JacobianPoint) -> JacobianPoint:
+        """一般点加；P == Q 时退化为倍点"""
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        if Z1 == 0:
+            return Q
+        if Z2 == 0:
+            return P
+        p = self.p
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        H = (U2 - U1) % p
+        R = (S2 - S1) % p
+        if H == 0:
+            return self.double(P) if R == 0 else INFINITY
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+
+    def add_mixed(self, P: JacobianPoint, Q: Tuple[int, int]) -> JacobianPoint:
+        """P 为 Jacobian 点、Q 为仿射点（Z2 = 1）时的点加，省去 Z2 相关的乘法"""
+        X1, Y1, Z1 = P
+        if Q == (0, 0):
+            return P
+        if Z1 == 0:
+            return (Q[0], Q[1], 1)
+        p = self.p
+        Z1Z1 = Z1 * Z1 % p
+        U2 = Q[0] * Z1Z1 % p
+        S2 = Q[1] * Z1 * Z1Z1 % p
+        H = (U2 - X1) % p
+        R = (S2 - Y1) % p
+        if H == 0:
+            return self.double(P) if R == 0 else INFINITY
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return (X3, Y3, Z3)
+
+    def odd_multiples(self, P: JacobianPoint, w: int) -> List[JacobianPoint]:
+        """[P, 3P, 5P, ..., (2^(w-1) - 1)P]，供 wNAF 查表"""
+        table = [P]
+        P2 = self.double(P)
+        for _ in range((1 << (w - 2)) - 1):
+            table.append(self.add(table[-1], P2))
+        return table
+
+    def odd_multiples_affine(self, P: Tuple[int, int], w: int) -> List[Tuple[int, int]]:
+        """仿射坐标的奇数倍点表，查表时可以用更便宜的混合点加"""
+        return self.batch_to_affine(self.odd_multiples(self.to_jacobian(P), w))
+
+    def mult_jacobian(self, k: int, P: JacobianPoint, w: int = None) -> JacobianPoint:
+        """wNAF 标量乘法，结果保持 Jacobian 坐标"""
+        w = w or self.window
+        if k == 0 or P[2] == 0:
+            return INFINITY
+        table = self.odd_multiples(P, w)
+        R = INFINITY
+        for d in reversed(wnaf(k, w)):
+            R = self.double(R)
+            if d > 0:
+                R = self.add(R, table[d >> 1])
+            elif d < 0:
+                R = self.add(R, self.neg(table[(-d) >> 1]))
+        return R
+
+    def scalar_mult(self, k: int, P: Tuple[int, int]) -> Tuple[int, int]:
+        """仿射输入、仿射输出的 wNAF 标量乘法，只做一次模逆"""
+        return self.to_affine(self.mult_jacobian(k, self.to_jacobian(P)))
+
+    def joint_mult(self, terms) -> JacobianPoint:
+        """Straus 交错法计算 Σ k_i·P_i，所有标量共用同一串倍点。
+        terms 为 (k, w, table) 列表，table 为 P 的仿射奇数倍点表 odd_multiples_affine(P, w)"""
+        p = self.p
+        # 先把各标量的 wNAF 展开成"第 i 位要加的点"列表，主循环里只剩倍点和混合点加
+        digits = [(wnaf(k, w), table) for k, w, table in terms]
+        adds = [[] for _ in range(max(len(d) for d, _ in digits))]
+        for d, table in digits:
+            for i, di in enumerate(d):
+                if di > 0:
+                    adds[i].append(table[di >> 1])
+                elif di < 0:
+                    x, y = table[(-di) >> 1]
+                    adds[i].append((x, p - y))
+        double, add_mixed = self.double, self.add_mixed
+        R = INFINITY
+        for points in reversed(adds):
+            R = double(R)
+            for Q in points:
+                R = add_mixed(R, Q)
+        return R
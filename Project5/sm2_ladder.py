@@ -0,0 +1,101 @@
+# sm2/sm2_ladder.py
+from typing import Tuple
+
+ProjectivePoint = Tuple[int, int, int]
+
+# 齐次射影坐标 (X : Y : Z) 表示仿射点 (X/Z, Y/Z)，无穷远点为 (0 : 1 : 0)
+INFINITY = (0, 1, 0)
+
+
+class LadderEngine:
+    """常数时间风格的 Montgomery 阶梯标量乘法。
+
+    - 点加使用 Renes–Costello–Batina 的完备加法公式（一般 a），
+      P + Q、P + P、P + O 都走同一串运算，没有特殊情况分支；
+    - 标量先变为 k + 2n（对 SM2 的 n 恒为 257 比特），循环次数固定；
+    - 每一位用掩码做条件交换，不按比特分支；
+    - 最后用费马小定理 Z^(p-2) 求逆，指数固定。
+
+    注意：Python 大整数运算本身的耗时与数值有关，这里只消除算法层面
+    （分支、循环次数、提前返回）的时间差异，不能替代真正的常数时间实现。"""
+
+    def __init__(self, curve):
+        self.p = curve.p
+        self.a = curve.a
+        self.b3 = 3 * curve.b % curve.p
+        self.n = curve.n
+        self.bits = (3 * curve.n - 1).bit_length()  # k + 2n 的固定比特数
+
+    def complete_add(self, P: ProjectivePoint, Q: ProjectivePoint) -> ProjectivePoint:
+        """RCB 2016 算法 1：任意 a 的完备点加（12M + 3m_a + 2m_3b + 23a）"""
+        p, a, b3 = self.p, self.a, self.b3
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        t0 = X1 * X2 % p
+        t1 = Y1 * Y2 % p
+        t2 = Z1 * Z2 % p
+        t3 = (X1 + Y1) * (X2 + Y2) % p
+        t4 = (t0 + t1) % p
+        t3 = (t3 - t4) % p
+        t4 = (X1 + Z1) * (X2 + Z2) % p
+        t5 = (t0 + t2) % p
+        t4 = (t4 - t5) % p
+        t5 = (Y1 + Z1) * (Y2 + Z2) % p
+        X3 = (t1 + t2) % p
+        t5 = (t5 - X3) % p
+        Z3 = a * t4 % p
+        X3 = b3 * t2 % p
+        Z3 = (X3 + Z3) % p
+        X3 = (t1 - Z3) % p
+        Z3 = (t1 + Z3) % p
+        Y3 = X3 * Z3 % p
+        t1 = 3 * t0 % p
+        t2 = a * t2 % p
+        t4 = b3 * t4 % p
+        t1 = (t1 + t2) % p
+        t2 = (t0 - t2) % p
+        t2 = a * t2 % p
+        t4 = (t4 + t2) % p
+        t0 = t1 * t4 % p
+        Y3 = (Y3 + t0) % p
+        t0 = t5 * t4 % p
+        X3 = t3 * X3 % p
+        X3 = (X3 - t0) % p
+        t0 = t3 * t1 % p
+        Z3 = t5 * Z3 % p
+        Z3 = (Z3 + t0) % p
+        return (X3, Y3, Z3)
+
+    @staticmethod
+    def cswap(bit: int, P: ProjectivePoint, Q: ProjectivePoint):
+        """bit 为 1 时交换 P、Q；用掩码异或实现，不按 bit 分支"""
+        mask = -bit
+        out_p, out_q = [], []
+        for u, v in zip(P, Q):
+            d = mask & (u ^ v)
+            out_p.append(u ^ d)
+            out_q.append(v ^ d)
+        return tuple(out_p), tuple(out_q)
+
+    def mult_projective(self, k: int, P: Tuple[int, int]) -> ProjectivePoint:
+        k = k % self.n + 2 * self.n
+        R0, R1 = INFINITY, (P[0], P[1], 1)
+        add, cswap = self.complete_add, self.cswap
+        for i in range(self.bits - 1, -1, -1):
+            bit = (k >> i) & 1
+            R0, R1 = cswap(bit, R0, R1)
+            R1 = add(R0, R1)
+            R0 = add(R0, R0)
+            R0, R1 = cswap(bit, R0, R1)
+        return R0
+
+    def to_affine(self, P: ProjectivePoint) -> Tuple[int, int]:
+        X, Y, Z = P
+        if Z == 0:
+            return (0, 0)
+        z_inv = pow(Z, self.p - 2, self.p)
+        return (X * z_inv % self.p, Y * z_inv % self.p)
+
+    def scalar_mult(self, k: int, P: Tuple[int, int]) -> Tuple[int, int]:
+        """k·P，P 须为曲线上的有限点"""
+        return self.to_affine(self.mult_projective(k, P))
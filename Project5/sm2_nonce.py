@@ -0,0 +1,193 @@
+# sm2/sm2_nonce.py
+import multiprocessing
+import queue
+import secrets
+import threading
+from collections import deque
+from typing import Iterator, Tuple
+
+from sm2_core import SM2, SM2Curve
+from sm2_hash import DEFAULT_USER_ID
+from sm3_hmac import HMAC_SM3
+
+
+# ========================
+# Part 1: 预计算 (k, x1) 池（离线 / 在线签名）
+# ========================
+
+def _fill(out, stop, curve, batch: int, constant_time):
+    """后台循环：每批生成 batch 个随机 k 并计算 k·G，整批放入队列（队列满时阻塞）。
+    curve 为 SM2Curve 对象（线程）或后端名（进程中重新构建曲线与基点表）"""
+    if isinstance(curve, str):
+        curve = SM2Curve(curve)
+    n = curve.n
+    while not stop.is_set():
+        ks = [secrets.randbelow(n - 1) + 1 for _ in range(batch)]
+        if curve._constant_time(constant_time) or curve.backend == "affine":
+            xs = [curve.base_mult(k, constant_time)[0] for k in ks]
+        else:
+            table = curve.base_table
+            xs = [x for x, _ in curve.jacobian.batch_to_affine([table.mult_jacobian(k) for k in ks])]
+        pairs = list(zip(ks, xs))
+        while not stop.is_set():
+            try:
+                out.put(pairs, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class NoncePool:
+    """有界的 (k, x1) 预计算池，后台线程或进程持续补充。
+
+    在线签名时 sm2.sign(..., nonces=pool.get) 只需几次模乘；池被取空时
+    get() 现场计算一个（记为 misses），不会阻塞。每个 k 只会被取出一次。
+    线程模式与签名线程共享 GIL，补充时会拖慢在线签名；进程模式没有这个问题。"""
+
+    def __init__(self, sm2: SM2, size: int = 1024, batch: int = 32,
+                 use_process: bool = False, constant_time: bool = None):
+        self.curve = sm2.curve
+        self.constant_time = constant_time
+        self._ready = deque()
+        self.hits = self.misses = 0
+        maxsize = max(1, size // batch)
+        if use_process:
+            ctx = multiprocessing.get_context()
+            self._queue = ctx.Queue(maxsize)
+            self._stop = ctx.Event()
+            self._worker = ctx.Process(
+                target=_fill, args=(self._queue, self._stop, self.curve.backend, batch, constant_time),
+                daemon=True)
+        else:
+            self._queue = queue.Queue(maxsize)
+            self._stop = threading.Event()
+            self._worker = threading.Thread(
+                target=_fill, args=(self._queue, self._stop, self.curve, batch, constant_time),
+                daemon=True)
+        self._worker.start()
+
+    def get(self) -> Tuple[int, int]:
+        if not self._ready:
+            try:
+                self._ready.extend(self._queue.get_nowait())
+            except queue.Empty:
+                self.misses += 1
+                k = secrets.randbelow(self.curve.n - 1) + 1
+                return k, self.curve.base_mult(k, self.constant_time)[0]
+        self.hits += 1
+        return self._ready.popleft()
+
+    def close(self):
+        self._stop.set()
+        try:  # 取走队列内容，让阻塞在 put 上的进程退出
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._worker.join(timeout=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ========================
+# Part 2: 确定性随机数（RFC 6979 风格，HMAC-SM3）
+# ========================
+
+def rfc6979_nonces(private_key: int, e: int, n: int) -> Iterator[int]:
+    """按 RFC 6979 第 3.2 节的 HMAC-DRBG 由 (私钥, e) 派生 k，HMAC 使用 HMAC-SM3。
+    依次产生候选值，调用方在 r = 0 等情况下继续取下一个"""
+    qlen = n.bit_length()
+    rlen = (qlen + 7) // 8
+
+    def bits2int(b: bytes) -> int:
+        v = int.from_bytes(b, "big")
+        return v >> (len(b) * 8 - qlen) if len(b) * 8 > qlen else v
+
+    x = private_key.to_bytes(rlen, "big")
+    h = (e % n).to_bytes(rlen, "big")
+    V = b"\x01" * 32
+    K = b"\x00" * 32
+    K = HMAC_SM3(K).mac(V + b"\x00" + x + h)
+    V = HMAC_SM3(K).mac(V)
+    K = HMAC_SM3(K).mac(V + b"\x01" + x + h)
+    mac = HMAC_SM3(K)
+    V = mac.mac(V)
+    while True:
+        T = b""
+        while len(T) < rlen:
+            V = mac.mac(V)
+            T += V
+        k = bits2int(T[:rlen])
+        if 1 <= k < n:
+            yield k
+        K = mac.mac(V + b"\x00")
+        mac = HMAC_SM3(K)
+        V = mac.mac(V)
+
+
+def sign_deterministic(sm2: SM2, private_key: int, message, user_id=DEFAULT_USER_ID,
+                       public_key: Tuple[int, int] = None, constant_time: bool = None) -> Tuple[int, int]:
+    """不依赖随机数发生器的签名：k 由私钥与 e 确定，同一消息总得到同一签名"""
+    if public_key is None:
+        public_key = sm2.public_key_of(private_key, constant_time)
+    e = sm2._hash_e(user_id, public_key, message)
+    candidates = rfc6979_nonces(private_key, e, sm2.curve.n)
+
+    def nonces():
+        k = next(candidates)
+        return k, sm2.curve.base_mult(k, constant_time)[0]
+
+    return sm2.sign(private_key, message, user_id, constant_time, public_key, nonces)
+
+
+# ========================
+# 测试示例 + 延迟测试
+# ========================
+if __name__ == "__main__":
+    import argparse
+    import statistics
+    import time
+
+    parser = argparse.ArgumentParser(description="SM2 在线签名延迟：现场计算 / 确定性 k / 预计算池")
+    parser.add_argument("--requests", type=int, default=300, help="签名请求数")
+    parser.add_argument("--gap-ms", type=float, default=3.0, help="相邻请求之间的空闲时间 (ms)")
+    parser.add_argument("--pool-size", type=int, default=256)
+    args = parser.parse_args()
+
+    sm2 = SM2()
+    d, P = sm2.generate_keypair()
+    msg = "offline/online signing"
+
+    s1 = sign_deterministic(sm2, d, msg, public_key=P)
+    s2 = sign_deterministic(sm2, d, msg, public_key=P)
+    print("[确定性签名] 两次相同:", s1 == s2, " 验证:", sm2.verify(P, msg, s1))
+
+    def run(sign_once):
+        latencies = []
+        for _ in range(args.requests):
+            time.sleep(args.gap_ms / 1e3)
+            t0 = time.perf_counter_ns()
+            sig = sign_once()
+            latencies.append((time.perf_counter_ns() - t0) / 1e3)
+        assert sm2.verify(P, msg, sig)
+        q = statistics.quantiles(latencies, n=100)
+        return statistics.median(latencies), q[98]
+
+    modes = {
+        "现场计算 k·G": lambda: sm2.sign(d, msg, public_key=P),
+        "确定性 k": lambda: sign_deterministic(sm2, d, msg, public_key=P),
+    }
+    print(f"{'模式':16s} {'p50 us':>10s} {'p99 us':>10s}  池命中/未命中")
+    for name, fn in modes.items():
+        p50, p99 = run(fn)
+        print(f"{name:16s} {p50:10.1f} {p99:10.1f}")
+    for use_process in (False, True):
+        with NoncePool(sm2, args.pool_size, use_process=use_process) as pool:
+            time.sleep(1.0)  # 预热
+            p50, p99 = run(lambda: sm2.sign(d, msg, public_key=P, nonces=pool.get))
+            name = "预计算池（进程）" if use_process else "预计算池（线程）"
+            print(f"{name:16s} {p50:10.1f} {p99:10.1f}  {pool.hits}/{pool.misses}")
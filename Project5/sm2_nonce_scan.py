@@ -0,0 +1,265 @@
+# sm2/sm2_nonce_scan.py
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from sm2_encoding import COMPRESSED_SIZE, encode_point
+from sm2_hash import COORD, DEFAULT_USER_ID
+from sm2_jacobian import batch_inverse
+
+# 语料文件由定长记录连续组成：压缩公钥 (33) || e (32) || r (32) || s (32)
+RECORD_SIZE = COMPRESSED_SIZE + 3 * COORD
+_E, _R, _S = COMPRESSED_SIZE, COMPRESSED_SIZE + COORD, COMPRESSED_SIZE + 2 * COORD
+CHUNK_RECORDS = 8192  # 每次从文件读入的记录数
+
+Record = Tuple[bytes, int, int, int]  # (压缩公钥, e, r, s)
+
+
+# ========================
+# Part 1: 语料格式
+# ========================
+
+def encode_record(public_key: Tuple[int, int], e: int, signature: Tuple[int, int]) -> bytes:
+    r, s = signature
+    return encode_point(public_key) + e.to_bytes(COORD, "big") + r.to_bytes(COORD, "big") + s.to_bytes(COORD, "big")
+
+
+def decode_record(data) -> Record:
+    return (bytes(data[:_E]), int.from_bytes(data[_E:_R], "big"),
+            int.from_bytes(data[_R:_S], "big"), int.from_bytes(data[_S:RECORD_SIZE], "big"))
+
+
+def corpus_record(sm2, public_key: Tuple[int, int], message, signature: Tuple[int, int],
+                  user_id=DEFAULT_USER_ID) -> bytes:
+    """由签名日志中的 (公钥, 消息, 签名) 生成一条记录，e 在写入时算好，扫描时不再哈希"""
+    return encode_record(public_key, sm2._hash_e(user_id, public_key, message), signature)
+
+
+def write_corpus(path: str, records: Iterable[bytes]):
+    with open(path, "wb") as f:
+        for record in records:
+            f.write(record)
+
+
+def iter_chunks(path: str, chunk_records: int = CHUNK_RECORDS) -> Iterator[memoryview]:
+    """按块流式读取语料，每块为若干条完整记录"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(RECORD_SIZE * chunk_records)
+            if not chunk:
+                return
+            if len(chunk) % RECORD_SIZE:
+                raise ValueError(f"{path} 的长度不是 {RECORD_SIZE} 的整数倍")
+            yield memoryview(chunk)
+
+
+# ========================
+# Part 2: 单遍查找重复的 k
+# ========================
+#
+# 同一个 k（或 n − k）得到同一个 x1 = (r − e) mod n，与公钥、消息无关。
+# 以 x1 为键建哈希表，一遍扫描即可找出所有共用随机数的签名。
+
+def _x1_of(view: memoryview, i: int, n: int) -> int:
+    return (int.from_bytes(view[i + _R:i + _S], "big") - int.from_bytes(view[i + _E:i + _R], "big")) % n
+
+
+def find_collisions(chunks: Iterable[memoryview], n: int) -> Tuple[int, List[List[Record]]]:
+    """返回 (记录数, 碰撞组列表)。每个碰撞组为 x1 相同、内容不同的 ≥ 2 条记录"""
+    first = {}       # x1 -> 第一次出现的记录（原始字节）
+    groups = {}      # x1 -> 碰撞组
+    count = 0
+    for view in chunks:
+        for i in range(0, len(view), RECORD_SIZE):
+            count += 1
+            x1 = _x1_of(view, i, n)
+            raw = view[i:i + RECORD_SIZE]
+            seen = first.get(x1)
+            if seen is None:
+                first[x1] = raw.tobytes()
+            elif seen != raw:
+                group = groups.get(x1)
+                if group is None:
+                    group = groups[x1] = {seen: decode_record(seen)}
+                group.setdefault(raw.tobytes(), decode_record(raw))
+    return count, [list(g.values()) for g in groups.values()]
+
+
+def partition_corpus(path: str, directory: str, partitions: int, n: int,
+                     chunk_records: int = CHUNK_RECORDS) -> List[str]:
+    """按 x1 mod partitions 把语料拆成若干磁盘分区，同一 x1 的记录必落在同一分区"""
+    paths = [os.path.join(directory, f"part{i:04d}.bin") for i in range(partitions)]
+    files = [open(p, "wb") for p in paths]
+    try:
+        for view in iter_chunks(path, chunk_records):
+            buffers = [bytearray() for _ in range(partitions)]
+            for i in range(0, len(view), RECORD_SIZE):
+                buffers[_x1_of(view, i, n) % partitions] += view[i:i + RECORD_SIZE]
+            for f, buf in zip(files, buffers):
+                f.write(buf)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+# ========================
+# Part 3: 批量恢复私钥
+# ========================
+#
+# 同一私钥、同一 k：s_i(1 + d) = k − r_i·d，两式相减得 d = (s2 − s1) / (s1 + r1 − s2 − r2)；
+# 同一私钥、k 与 n − k：两式相加得 d = −(s1 + s2) / (s1 + s2 + r1 + r2)。
+# 已知某把私钥后，该组的 k = s(1 + d) + r·d，组内其他公钥的私钥 d' = (±k − s') / (r' + s')。
+# 每一轮的所有分母用 Montgomery 技巧一次求逆，候选私钥批量计算 d·G 与公钥比对。
+
+def _confirm(curve, candidates: List[Tuple[bytes, int]], known: Dict[bytes, int]) -> int:
+    """批量验证 (压缩公钥, 候选私钥)，通过的写入 known，返回新增数量"""
+    candidates = [(pub, d) for pub, d in candidates if pub not in known and d]
+    if not candidates:
+        return 0
+    table = curve.base_table
+    points = curve.jacobian.batch_to_affine([table.mult_jacobian(d) for _, d in candidates])
+    added = 0
+    for (pub, d), P in zip(candidates, points):
+        if pub not in known and encode_point(P) == pub:
+            known[pub] = d
+            added += 1
+    return added
+
+
+def _solve(curve, equations: List[Tuple[bytes, int, int]], known: Dict[bytes, int]) -> int:
+    """equations 为 (压缩公钥, 分子, 分母)，分母为 0 的跳过"""
+    n = curve.n
+    equations = [(pub, num, den % n) for pub, num, den in equations if den % n]
+    invs = batch_inverse([den for _, _, den in equations], n)
+    return _confirm(curve, [(pub, num * inv % n) for (pub, num, _), inv in zip(equations, invs)], known)
+
+
+def recover_keys(curve, groups: List[List[Record]]) -> Dict[bytes, int]:
+    """由碰撞组恢复私钥，返回 压缩公钥 -> 私钥"""
+    n = curve.n
+    known = {}
+    equations = []
+    for group in groups:
+        by_key = {}
+        for pub, _, r, s in group:
+            by_key.setdefault(pub, []).append((r, s))
+        for pub, sigs in by_key.items():
+            if len(sigs) < 2:
+                continue
+            (r1, s1), (r2, s2) = sigs[:2]
+            equations.append((pub, s2 - s1, s1 + r1 - s2 - r2))
+            equations.append((pub, -(s1 + s2), s1 + s2 + r1 + r2))
+    _solve(curve, equations, known)
+
+    # 已知私钥在碰撞组内传播，直到没有新的私钥
+    pending = groups
+    while pending:
+        equations, rest = [], []
+        for group in pending:
+            k = next(((s * (1 + known[pub]) + r * known[pub]) % n
+                      for pub, _, r, s in group if pub in known), None)
+            if k is None:
+                rest.append(group)
+                continue
+            for pub, _, r, s in group:
+                if pub not in known:
+                    equations.append((pub, k - s, r + s))
+                    equations.append((pub, -k - s, r + s))
+        if not equations or not _solve(curve, equations, known):
+            break
+        pending = rest
+    return known
+
+
+# ========================
+# Part 4: 扫描入口
+# ========================
+
+class ScanResult:
+    def __init__(self, records: int, groups: List[List[Record]], keys: Dict[bytes, int]):
+        self.records = records
+        self.groups = groups  # 共用随机数的碰撞组
+        self.keys = keys      # 恢复出的 压缩公钥 -> 私钥
+
+    @property
+    def reused_signatures(self) -> int:
+        return sum(len(g) for g in self.groups)
+
+    def __repr__(self):
+        return (f"ScanResult(records={self.records}, collision_groups={len(self.groups)}, "
+                f"reused_signatures={self.reused_signatures}, recovered_keys={len(self.keys)})")
+
+
+def scan_file(curve, path: str, partitions: int = 1, directory: str = None,
+              chunk_records: int = CHUNK_RECORDS) -> ScanResult:
+    """扫描语料文件，查找重复随机数并恢复私钥。
+
+    partitions 为 1 时直接单遍扫描，哈希表大小与语料成正比；语料超过内存时取 partitions > 1，
+    先按 x1 拆分到 directory（缺省为临时目录）下的分区文件，再逐个分区建表。
+    只有碰撞组会留在内存中，分区文件用完即删除。"""
+    n = curve.n
+    if partitions <= 1:
+        records, groups = find_collisions(iter_chunks(path, chunk_records), n)
+        return ScanResult(records, groups, recover_keys(curve, groups))
+
+    records, groups = 0, []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for part in partition_corpus(path, tmp, partitions, n, chunk_records):
+            count, found = find_collisions(iter_chunks(part, chunk_records), n)
+            os.remove(part)
+            records += count
+            groups += found
+    return ScanResult(records, groups, recover_keys(curve, groups))
+
+
+# ========================
+# 测试示例 + 性能测试
+# ========================
+if __name__ == "__main__":
+    import argparse
+    import secrets
+    import time
+
+    from sm2_core import SM2
+
+    parser = argparse.ArgumentParser(description="在签名语料中批量查找重复随机数并恢复私钥")
+    parser.add_argument("--signatures", type=int, default=20000, help="语料中的签名数")
+    parser.add_argument("--keys", type=int, default=200, help="签名者数量")
+    parser.add_argument("--weak", type=int, default=20, help="注入的重复随机数对数")
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    sm2 = SM2()
+    curve, n = sm2.curve, sm2.curve.n
+    keys = sm2.generate_keypairs(args.keys)
+    ks = [secrets.randbelow(n - 1) + 1 for _ in range(args.signatures)]
+    owners = [i % args.keys for i in range(args.signatures)]
+    # 注入 weak 对共用随机数的签名：偶数对为同一签名者重复使用 k；
+    # 奇数对为上一对的签名者与新签名者分别使用 k 与 n − k，只能靠已恢复的私钥传播求出
+    for j in range(args.weak):
+        ks[2 * j + 1] = ks[2 * j] if j % 2 == 0 else n - ks[2 * j]
+        owners[2 * j] = (j if j % 2 == 0 else j - 1) % args.keys
+        owners[2 * j + 1] = j % args.keys
+    x1s = curve.jacobian.batch_to_affine([curve.base_table.mult_jacobian(k) for k in ks])
+
+    t0 = time.perf_counter()
+    records = []
+    for owner, k, (x1, _) in zip(owners, ks, x1s):
+        d, P = keys[owner]
+        e = secrets.randbits(256) % n  # 以随机 e 代替 SM3(ZA || M)，只影响生成速度
+        r = (e + x1) % n
+        s = pow(1 + d, -1, n) * (k - r * d) % n
+        records.append(encode_record(P, e, (r, s)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.bin")
+        write_corpus(path, records)
+        print(f"[语料] {args.signatures} 条签名, {os.path.getsize(path)} 字节, "
+              f"生成 {time.perf_counter() - t0:.1f} 秒")
+        for partitions in args.partitions:
+            t0 = time.perf_counter()
+            result = scan_file(curve, path, partitions)
+            elapsed = time.perf_counter() - t0
+            correct = sum(keys[i][0] == result.keys.get(encode_point(keys[i][1])) for i in range(args.keys))
+            print(f"[分区 {partitions:3d}] {result}, 正确 {correct}, 耗时 {elapsed:.2f} 秒, "
+                  f"{result.records / elapsed:.0f} 条/秒")
@@ -12,6 +12,18 @@ def print_debug(title, *values):
         print(f"  {i}. {val}")
 
 
+def recover_key_from_k(n, k, signature):
+    """已知随机数 k 时由一个签名恢复私钥：d = (k - s) / (r + s) mod n"""
+    r, s = signature
+    return (k - s) * pow(r + s, -1, n) % n
+
+
+def recover_key_from_reused_k(n, sig1, sig2):
+    """同一私钥用同一个 k 签了两条消息：d = (s2 - s1) / (s1 + r1 - s2 - r2) mod n"""
+    (r1, s1), (r2, s2) = sig1, sig2
+    return (s2 - s1) * pow(s1 + r1 - s2 - r2, -1, n) % n
+
+
 def demonstrate_k_reuse():
     """k 重用攻击：一个 k 签两条不同消息"""
     sm2 = SM2()
@@ -31,13 +43,13 @@ def demonstrate_k_reuse():
 
     # 使用相同 k 给消息2 签名
     e2 = compute_sm2_e(sm2, user_id, PA, msg2.encode())
-    x1, _ = sm2.curve.scalar_mult(k, (sm2.curve.Gx, sm2.curve.Gy))
+    x1, _ = sm2.curve.base_mult(k)
     r2 = (e2 + x1) % sm2.curve.n
     s2 = (pow(1 + dB, -1, sm2.curve.n) * (k - r2 * dB)) % sm2.curve.n
 
     # 恢复私钥
-    recovered_dA = (k - s1) * pow(r1 + s1, -1, sm2.curve.n) % sm2.curve.n
-    recovered_dB = (k - s2) * pow(r2 + s2, -1, sm2.curve.n) % sm2.curve.n
+    recovered_dA = recover_key_from_k(sm2.curve.n, k, (r1, s1))
+    recovered_dB = recover_key_from_k(sm2.curve.n, k, (r2, s2))
 
     print("k重用攻击结果:")
     print(f"原始dA: {dA}, 恢复dA: {recovered_dA}, {'成功' if dA == recovered_dA else '失败'}")
@@ -55,7 +67,7 @@ def demonstrate_same_d_k():
 
     # 2. 随机 k
     k = secrets.randbelow(sm2.curve.n - 1) + 1
-    x1, _ = sm2.curve.scalar_mult(k, (sm2.curve.Gx, sm2.curve.Gy))
+    x1, _ = sm2.curve.base_mult(k)
 
     # 3. ECDSA 签名（标准公式）
     r_ecdsa = x1 % sm2.curve.n
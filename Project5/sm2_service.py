@@ -0,0 +1,330 @@
+# sm2/sm2_service.py
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from sm2_core import SM2
+from sm2_hash import DEFAULT_USER_ID
+
+
+# ========================
+# Part 1: 工作进程
+# ========================
+#
+# 每个工作进程持有自己的 SM2 实例：基点表、公钥预计算表、ZA 缓存都只在本进程内构建。
+# 前端按密钥把请求固定分配给某个进程，同一密钥的缓存总在同一个进程里命中。
+
+_sm2 = None
+
+
+def _init_worker(backend: str, table_path: str):
+    global _sm2
+    _sm2 = SM2(backend, table_path)
+    _sm2.curve.base_table  # 启动时就构建（或读取）基点表
+
+
+def _ping():
+    return os.getpid()
+
+
+def _one_by_one(fn, items):
+    """逐项调用 fn，出错的项返回异常对象本身，不影响同批其他项"""
+    results = []
+    for item in items:
+        try:
+            results.append(fn(*item))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+def _sign_batch(items):
+    """items 为 (私钥, 消息, user_id) 列表；同一 (私钥, user_id) 的消息合并为一次 sign_batch。
+    某组整批签名出错时改为逐项签名，只有出错的请求得到异常"""
+    groups = {}
+    for i, (d, message, user_id) in enumerate(items):
+        groups.setdefault((d, user_id), []).append(i)
+    results = [None] * len(items)
+    for (d, user_id), idx in groups.items():
+        try:
+            sigs = _sm2.sign_batch(d, [items[i][1] for i in idx], user_id)
+        except Exception:
+            sigs = _one_by_one(_sm2.sign, [items[i] for i in idx])
+        for i, sig in zip(idx, sigs):
+            results[i] = sig
+    return results
+
+
+def _verify_batch(items):
+    """items 为 (公钥, 消息, 签名, user_id) 列表；整批出错时改为逐项验签"""
+    try:
+        return _sm2.verify_batch(items)
+    except Exception:
+        return _one_by_one(_sm2.verify, items)
+
+
+WORKER_OPS = {"sign": _sign_batch, "verify": _verify_batch}
+
+
+class ServiceClosedError(RuntimeError):
+    """服务关闭时仍在排队或处理中的请求得到此异常"""
+
+
+# ========================
+# Part 2: 指标
+# ========================
+
+LATENCY_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+BATCH_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """固定分桶直方图：counts[i] 为落在 (bounds[i-1], bounds[i]] 的数量，最后一桶为超出上限"""
+
+    def __init__(self, bounds=LATENCY_BOUNDS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """按分桶估计分位数（返回所在桶的上界，超出上限时返回最大值）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, c in zip(self.bounds, self.counts):
+            seen += c
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.latency_ms = {op: Histogram() for op in WORKER_OPS}
+        self.batch_size = {op: Histogram(BATCH_BOUNDS) for op in WORKER_OPS}
+        self.errors = {op: 0 for op in WORKER_OPS}
+        self.max_queue_depth = 0
+
+    def snapshot(self, queue_depth: int) -> dict:
+        return {
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'latency_ms': {op: h.snapshot() for op, h in self.latency_ms.items()},
+            'batch_size': {op: h.snapshot() for op, h in self.batch_size.items()},
+            'errors': dict(self.errors),
+        }
+
+
+# ========================
+# Part 3: asyncio 前端
+# ========================
+
+def _fail(requests, exc):
+    """以 exc 结束 requests 中尚未完成的请求"""
+    for _, _, future, _ in requests:
+        if not future.done():
+            future.set_exception(exc)
+
+
+class SM2Service:
+    """本地 SM2 签名 / 验签服务。
+
+    每个分片是一个单进程的 ProcessPoolExecutor 加一个请求队列；批处理协程从队列中
+    最多取 max_batch 个请求（或等待 max_delay_ms），整批交给该进程，结果再逐个交还调用方。
+    签名按私钥、验签按公钥选择分片。"""
+
+    def __init__(self, workers: int = None, max_batch: int = 64, max_delay_ms: float = 2.0,
+                 backend: str = "wnaf", table_path: str = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1e3
+        self.backend = backend
+        self.table_path = table_path
+        self.metrics = ServiceMetrics()
+        self._executors = []
+        self._queues = []
+        self._tasks = []
+        self._in_flight = 0
+        self._closed = False
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            executor = ProcessPoolExecutor(1, initializer=_init_worker,
+                                           initargs=(self.backend, self.table_path))
+            self._executors.append(executor)
+            self._queues.append(asyncio.Queue())
+        # 等所有进程完成初始化，避免第一批请求承担建表时间
+        await asyncio.gather(*(loop.run_in_executor(ex, _ping) for ex in self._executors))
+        self._tasks = [asyncio.create_task(self._batcher(i)) for i in range(self.workers)]
+        return self
+
+    async def close(self):
+        """停止批处理协程；仍在队列中或已派发未返回的请求以 ServiceClosedError 结束"""
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for queue in self._queues:
+            while not queue.empty():
+                _fail([queue.get_nowait()], ServiceClosedError("服务已关闭"))
+        for executor in self._executors:
+            executor.shutdown()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def queue_depth(self) -> int:
+        """排队中 + 已交给工作进程但尚未返回的请求数"""
+        return sum(q.qsize() for q in self._queues) + self._in_flight
+
+    def snapshot(self) -> dict:
+        return self.metrics.snapshot(self.queue_depth())
+
+    async def sign(self, private_key: int, message, user_id=DEFAULT_USER_ID) -> Tuple[int, int]:
+        return await self._submit("sign", private_key, (private_key, message, user_id))
+
+    async def verify(self, public_key: Tuple[int, int], message, signature: Tuple[int, int],
+                     user_id=DEFAULT_USER_ID) -> bool:
+        return await self._submit("verify", public_key, (public_key, message, signature, user_id))
+
+    async def _submit(self, op, shard_key, item):
+        if self._closed:
+            raise ServiceClosedError("服务已关闭")
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[hash(shard_key) % self.workers]
+        queue.put_nowait((op, item, future, time.perf_counter()))
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queue_depth())
+        return await future
+
+    async def _collect(self, queue):
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            if queue.empty():
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(queue.get_nowait())
+        return batch
+
+    async def _batcher(self, shard: int):
+        loop = asyncio.get_running_loop()
+        executor, queue = self._executors[shard], self._queues[shard]
+        while True:
+            batch = await self._collect(queue)
+            self._in_flight += len(batch)
+            try:
+                for op in WORKER_OPS:
+                    requests = [r for r in batch if r[0] == op]
+                    if requests:
+                        await self._run(loop, executor, op, requests)
+            except asyncio.CancelledError:
+                _fail(batch, ServiceClosedError("服务已关闭"))
+                raise
+            finally:
+                self._in_flight -= len(batch)
+
+    async def _run(self, loop, executor, op, requests):
+        self.metrics.batch_size[op].observe(len(requests))
+        try:
+            results = await loop.run_in_executor(executor, WORKER_OPS[op], [r[1] for r in requests])
+        except Exception as exc:  # 工作进程本身出错（如 BrokenProcessPool），整批失败
+            self.metrics.errors[op] += len(requests)
+            _fail(requests, exc)
+            return
+        now = time.perf_counter()
+        for (_, _, future, t0), result in zip(requests, results):
+            self.metrics.latency_ms[op].observe((now - t0) * 1e3)
+            if isinstance(result, Exception):  # 单个请求出错，只影响这一项
+                self.metrics.errors[op] += 1
+                _fail([(None, None, future, t0)], result)
+            elif not future.done():
+                future.set_result(result)
+
+
+# ========================
+# Part 4: 本地客户端驱动
+# ========================
+
+async def drive(service: SM2Service, keys, clients: int, requests: int):
+    """clients 个并发客户端，每个依次发出 requests 次 "签名后验签"，返回 (成功验签数, 耗时秒)"""
+    async def client(c):
+        ok = 0
+        for i in range(requests):
+            d, P = keys[(c + i) % len(keys)]
+            msg = f"client {c} request {i}"
+            sig = await service.sign(d, msg)
+            ok += await service.verify(P, msg, sig)
+        return ok
+
+    t0 = time.perf_counter()
+    oks = await asyncio.gather(*(client(c) for c in range(clients)))
+    return sum(oks), time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="本地多进程 SM2 签名 / 验签服务压测")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认 CPU 核数")
+    parser.add_argument("--clients", type=int, default=64, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=10, help="每个客户端的 签名+验签 次数")
+    parser.add_argument("--keys", type=int, default=8, help="密钥对数量")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--json", help="指标写入 JSON 文件")
+    args = parser.parse_args()
+
+    async def main():
+        keys = SM2().generate_keypairs(args.keys)
+        async with SM2Service(args.workers, args.max_batch, args.max_delay_ms) as service:
+            ok, elapsed = await drive(service, keys, args.clients, args.requests)
+            total = args.clients * args.requests
+            print(f"[服务] {service.workers} 个工作进程, {args.clients} 个客户端")
+            print(f"[结果] {total} 次签名 + {total} 次验签, 验签通过 {ok}, 耗时 {elapsed:.2f} 秒, "
+                  f"{2 * total / elapsed:.1f} 次操作/秒")
+            snap = service.snapshot()
+            for op in WORKER_OPS:
+                lat, bs = snap['latency_ms'][op], snap['batch_size'][op]
+                print(f"  {op:6s} 延迟 p50 {lat['p50']} ms, p99 {lat['p99']} ms, 最大 {lat['max']:.1f} ms; "
+                      f"批大小 平均 {bs['mean']:.1f}, 最大 {bs['max']:.0f}")
+            print(f"  最大队列深度 {snap['max_queue_depth']}")
+            if args.json:
+                with open(args.json, 'w') as f:
+                    json.dump(snap, f, indent=1)
+                print("[指标已保存]", args.json)
+
+    asyncio.run(main())
@@ -0,0 +1,439 @@
+import asyncio
+import json
+import os
+import secrets
+import tempfile
+import bench_sm2
+from sm2_core import SM2, SCALAR_MULT_BACKENDS
+from sm2_hash import compute_za
+from sm2_encoding import (PublicKeyStore, canonical_mask, decode_point, decode_public_keys, decode_signatures,
+                          encode_point, encode_public_keys, encode_signatures, signature_from_der,
+                          signature_from_raw, signature_to_der, signature_to_raw)
+from sm2_fixed_base import HEADER, FixedBaseTable
+from sm2_jacobian import batch_inverse
+from sm2_ladder import INFINITY
+from sm2_encrypt import _encrypt_with_k, decrypt, encrypt
+from sm2_nonce import NoncePool, sign_deterministic
+from sm2_nonce_scan import corpus_record, scan_file, write_corpus
+from sm2_service import ServiceClosedError, SM2Service, drive
+
+# GM/T 0003.5 附录 A 示例（Fp-256 测试曲线，即本项目使用的曲线）
+USER_ID = "ALICE123@YAHOO.COM"
+MESSAGE = "message digest"
+D_A = 0x128B2FA8BD433C6C068C8D803DFF79792A519A55171B1B650C23661D15897263
+K = 0x6CB28D99385C175C94F94E934817663FC176D925DD72B727260DBAAE1FB2F96F
+P_A = (0x0AE4C7798AA0F119471BEE11825BE46202BB79E2A5844495E97C04FF4DF2548A,
+       0x7C0240F88F1CD4E16352A73C17B7F16F07353E53A176D684A9FE0C6BB798E857)
+ZA = "f4a38489e32b45b6f876e3ac2168ca392362dc8f23459c1d1146fc3dbfb7bc9a"
+E = 0xB524F552CD82B8B028476E005C377FB19A87E6FC682D48BB5D42E3D9B9EFFE76
+R = 0x40F1EC59F793D9F49E09DCEF49130D4194F79FB1EED2CAA55BACDB49C4E755D1
+S = 0x6FC6DAC32C5D5CF10C77DFB20F7C2EB667A457872FB09EC56327A67EC7DEEBE7
+
+
+def test_vectors():
+    """每个标量乘法后端都能复现 GM/T 0003.5 的公钥与签名，并验证通过"""
+    for backend in SCALAR_MULT_BACKENDS:
+        sm2 = SM2(backend)
+        curve, n = sm2.curve, sm2.curve.n
+        assert curve.base_mult(D_A) == P_A, backend
+        assert compute_za(curve, USER_ID, P_A).hex() == ZA
+        assert sm2.compute_ZA(USER_ID, P_A).hex() == ZA
+        e = sm2._hash_e(USER_ID, P_A, MESSAGE)
+        assert e == E % n
+        x1, _ = curve.base_mult(K)
+        r = (e + x1) % n
+        s = pow(1 + D_A, -1, n) * (K - r * D_A) % n
+        assert (r, s) == (R, S), backend
+        assert sm2.sign(D_A, MESSAGE, USER_ID, nonces=lambda: (K, x1)) == (R, S), backend
+        assert sm2.verify(P_A, MESSAGE, (R, S), USER_ID), backend
+        assert not sm2.verify(P_A, MESSAGE, (R, S))  # 默认用户标识不同
+        assert not sm2.verify(P_A, MESSAGE, (R, S - 1), USER_ID)
+
+# GM/T 0003.5 附录 C 加密示例
+ENC_D_B = 0x1649AB77A00637BD5E2EFE283FBF353534AA7F7CB89463F208DDBC2920BB0DA0
+ENC_K = 0x4C62EEFD6ECFC2B95B92FD6C3D9575148AFA17425546D49018E5388D49DD7B4F
+ENC_MESSAGE = b"encryption standard"
+ENC_C1_X = "245c26fb68b1ddddb12c4b6bf9f2b6d5fe60a383b0d18d1c4144abf17f6252e7"
+ENC_C3 = "9c3d7360c30156fab7c80a0276712da9d8094a634b766d3a285e07480653426d"
+ENC_C2 = "650053a89b41c418b0c3aad00d886c00286467"
+
+
+def test_encrypt_vector():
+    sm2 = SM2()
+    P = sm2.curve.base_mult(ENC_D_B)
+    c = _encrypt_with_k(sm2.curve, P, ENC_MESSAGE, ENC_K)
+    assert c[1:33].hex() == ENC_C1_X
+    assert c[65:97].hex() == ENC_C3
+    assert c[97:].hex() == ENC_C2
+    assert decrypt(sm2, ENC_D_B, c) == ENC_MESSAGE
+
+
+def test_encrypt_roundtrip():
+    sm2 = SM2()
+    d, P = sm2.generate_keypair()
+    for size in (0, 1, 31, 32, 33, 1000, 40000):
+        m = secrets.token_bytes(size)
+        c = encrypt(sm2, P, m)
+        assert len(c) == 97 + size
+        assert decrypt(sm2, d, c) == m
+    bad = bytearray(encrypt(sm2, P, b"hello"))
+    bad[-1] ^= 1
+    try:
+        decrypt(sm2, d, bytes(bad))
+        assert False, "篡改的密文应被拒绝"
+    except ValueError:
+        pass
+
+
+def test_scalar_mult_backends():
+    """各标量乘法实现结果一致"""
+    curve = SM2().curve
+    G = (curve.Gx, curve.Gy)
+    for k in [1, 2, curve.n - 1] + [secrets.randbelow(curve.n) for _ in range(5)]:
+        expected = curve.scalar_mult_affine(k, G)
+        assert curve.jacobian.scalar_mult(k, G) == expected
+        assert curve.base_table.mult(k) == expected
+        assert curve.ladder.scalar_mult(k, G) == expected
+
+    # 每个后端的 scalar_mult 与仿射 double-and-add 一致：任意点，含 0、n 及 wNAF 的长进位串
+    n = curve.n
+    scalars = [0, 1, 2, 3, n - 2, n - 1, n, n + 1, (1 << 255) - 1, 0x5555 << 200] + \
+              [secrets.randbelow(n) for _ in range(4)]
+    points = [G, P_A, curve.scalar_mult_affine(secrets.randbelow(n - 1) + 1, G)]
+    expected = {(k, Q): curve.scalar_mult_affine(k, Q) for k in scalars for Q in points}
+    for backend in SCALAR_MULT_BACKENDS:
+        c = SM2(backend).curve
+        for (k, Q), R_ in expected.items():
+            assert c.scalar_mult(k, Q) == R_, (backend, k)
+
+
+def test_fixed_base():
+    """每个后端的 base_mult 与仿射结果一致；基点表可写入文件再读回，损坏的文件会被重建"""
+    curve = SM2().curve
+    G, n = (curve.Gx, curve.Gy), curve.n
+    # 含每个 4 比特窗口取满 / 取 0 的标量
+    scalars = [0, 1, 15, 16, n - 1, n, int("f" * 63, 16) % n, int("10" * 32, 16) % n,
+               secrets.randbelow(n)]
+    expected = [curve.scalar_mult_affine(k, G) for k in scalars]
+    for backend in SCALAR_MULT_BACKENDS:
+        c = SM2(backend).curve
+        assert [c.base_mult(k) for k in scalars] == expected, backend
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "g.table")
+        built = SM2(table_path=path).curve.base_table
+        assert os.path.exists(path)
+        loaded = FixedBaseTable.load(curve, path)
+        assert loaded.table == built.table
+        assert [SM2(table_path=path).curve.base_mult(k) for k in scalars] == expected
+        with open(path, "rb") as f:
+            good = f.read()
+        # 中间某行某点翻转一个字节（点离开曲线）；交换同一行的两个点（仍在曲线上，但结构错误）；截断
+        middle = HEADER.size + (30 * 15 + 7) * 64
+        flipped = bytearray(good)
+        flipped[middle + 5] ^= 1
+        swapped = bytearray(good)
+        swapped[middle:middle + 128] = good[middle + 64:middle + 128] + good[middle:middle + 64]
+        for bad in (bytes(flipped), bytes(swapped), good[:-1]):
+            with open(path, "wb") as f:
+                f.write(bad)
+            try:
+                FixedBaseTable.load(curve, path)
+                assert False, "损坏的基点表应被拒绝"
+            except ValueError:
+                pass
+            assert [SM2(table_path=path).curve.base_mult(k) for k in scalars] == expected
+            with open(path, "rb") as f:
+                assert f.read() == good  # load_or_build 已重建并写回
+
+
+def test_ladder():
+    """完备加法公式覆盖 P + Q、P + P、P + (−P)、P + O；constant_time 可在任一后端按次启用"""
+    curve = SM2().curve
+    L = curve.ladder
+    G = (curve.Gx, curve.Gy)
+    G2 = curve.point_add(G, G)
+    proj = lambda P_, z=7: (P_[0] * z % curve.p, P_[1] * z % curve.p, z)  # 非 1 的 Z 分量
+    neg_G = (G[0], curve.p - G[1])
+    assert L.to_affine(L.complete_add(proj(G), proj(G2, 3))) == curve.point_add(G, G2)
+    assert L.to_affine(L.complete_add(proj(G), proj(G, 5))) == G2
+    assert L.to_affine(L.complete_add(proj(G), proj(neg_G))) == (0, 0)
+    assert L.to_affine(L.complete_add(proj(G), INFINITY)) == G
+    assert L.to_affine(L.complete_add(INFINITY, INFINITY)) == (0, 0)
+    a_, b_ = L.cswap(1, (1, 2, 3), (4, 5, 6))
+    assert (a_, b_) == ((4, 5, 6), (1, 2, 3)) and L.cswap(0, a_, b_) == (a_, b_)
+
+    k = secrets.randbelow(curve.n)
+    expected = curve.scalar_mult_affine(k, P_A)
+    for backend in SCALAR_MULT_BACKENDS:
+        sm2 = SM2(backend)
+        c = sm2.curve
+        assert c.scalar_mult(k, P_A, constant_time=True) == expected, backend
+        assert c.base_mult(D_A, constant_time=True) == P_A, backend
+        d, P = sm2.generate_keypair(constant_time=True)
+        assert c.base_mult(d, constant_time=False) == P, backend
+        sig = sm2.sign(d, "ct", constant_time=True)
+        assert sm2.verify(P, "ct", sig), backend
+        assert c._constant_time(None) == (backend == "ladder")
+
+
+def test_sign_verify():
+    for backend in SCALAR_MULT_BACKENDS:
+        sm2 = SM2(backend)
+        d, P = sm2.generate_keypair()
+        for user_id in ("1234567812345678", "alice", b"\x00bob"):
+            sig = sm2.sign(d, "hello", user_id)
+            assert sm2.verify(P, "hello", sig, user_id)
+            assert sm2.verify(P, b"hello", sig, user_id)
+            assert not sm2.verify(P, "hello!", sig, user_id)
+        assert sm2.verify(P, bytearray(b"hello"), sm2.sign(d, memoryview(b"hello")))
+        for bad in (123, None, [1, 2]):
+            try:
+                sm2.sign(d, bad)
+                assert False, "非字节消息应被拒绝"
+            except TypeError:
+                pass
+
+
+def test_verify_backends():
+    """s·G + t·Q 与仿射结果一致；任一后端的签名在所有后端都能验证；公钥表缓存按 LRU 工作"""
+    curve = SM2("affine").curve
+    n = curve.n
+    Q = curve.base_mult(secrets.randbelow(n - 1) + 1)
+    cases = [(0, 1), (1, 0), (1, n - 1), (n - 1, n - 1)] + \
+            [(secrets.randbelow(n), secrets.randbelow(n)) for _ in range(3)]
+    expected = [curve.base_mult_add(s, t, Q) for s, t in cases]
+    instances = {backend: SM2(backend) for backend in SCALAR_MULT_BACKENDS}
+    for backend, sm2 in instances.items():
+        assert [sm2.curve.base_mult_add(s, t, Q) for s, t in cases] == expected, backend
+        assert sm2.curve.base_mult_add(3, n - 3, (curve.Gx, curve.Gy)) == (0, 0)  # 3G − 3G = O
+
+    d, P = instances["affine"].generate_keypair()
+    for signer in instances.values():
+        sig = signer.sign(d, "cross")
+        for backend, verifier in instances.items():
+            assert verifier.verify(P, "cross", sig), backend
+            assert not verifier.verify(P, "cross!", sig), backend
+
+    c = SM2().curve
+    c.key_tables.max_keys = 2
+    keys = [c.base_mult(k) for k in (11, 12, 13)]
+    for P_ in keys[:2] + keys[:1]:
+        c.base_mult_add(1, 1, P_)
+    assert (c.key_tables.misses, c.key_tables.hits, len(c.key_tables)) == (2, 1, 2)
+    c.base_mult_add(1, 1, keys[2])   # 淘汰最久未用的 keys[1]
+    c.base_mult_add(1, 1, keys[0])
+    c.base_mult_add(1, 1, keys[1])
+    assert (c.key_tables.misses, c.key_tables.hits) == (4, 2)
+
+
+def test_batch_apis():
+    for backend in SCALAR_MULT_BACKENDS:
+        sm2 = SM2(backend)
+        (d, P), (d2, P2) = sm2.generate_keypairs(2)
+        assert sm2.curve.base_mult(d) == P and sm2.curve.is_on_curve(P2), backend
+        msgs = [f"m{i}" for i in range(10)]
+        items = [(P, m, sig) for m, sig in zip(msgs, sm2.sign_batch(d, msgs))]
+        items.append((P2, "x", sm2.sign(d2, "y")))
+        items.append((P2, "x", (0, 1)))
+        assert sm2.verify_batch(items) == [True] * 10 + [False, False], backend
+        assert sm2.sign_batch(d, []) == [] and sm2.generate_keypairs(0) == []
+
+    # 批量转换为仿射坐标与逐个转换一致，无穷远点（Z = 0）不影响同批其他点
+    curve = SM2().curve
+    J = curve.jacobian
+    points = [J.mult_jacobian(k, J.to_jacobian((curve.Gx, curve.Gy))) for k in (1, 2, 0, 7, curve.n, 99)]
+    assert J.batch_to_affine(points) == [J.to_affine(P_) for P_ in points]
+    assert J.batch_to_affine(points)[2] == (0, 0) and J.batch_to_affine([]) == []
+    values = [secrets.randbelow(curve.p - 1) + 1 for _ in range(5)]
+    assert batch_inverse(values, curve.p) == [pow(v, -1, curve.p) for v in values]
+
+
+def test_verify_batch_backends():
+    """每个后端的 verify_batch 与逐个 verify 结果一致，含多公钥、自定义 user_id 与各类无效签名"""
+    n = SM2().curve.n
+    keys = SM2().generate_keypairs(3)
+    d, P = keys[0]
+    # s·G + t·P 为无穷远点的签名：s + (r + s)·d ≡ 0，即 s = −r·d / (1 + d)
+    r0 = 12345
+    s0 = -r0 * d * pow(1 + d, -1, n) % n
+    for backend in SCALAR_MULT_BACKENDS:
+        sm2 = SM2(backend)
+        items = [(P_, f"m{i}", sm2.sign(d_, f"m{i}")) for i, (d_, P_) in enumerate(keys * 2)]
+        items.append((P_A, MESSAGE, (R, S), USER_ID))
+        items.append((keys[1][1], "m0", items[0][2]))             # 公钥不符
+        items.append((P, "m0!", items[0][2]))                     # 消息不符
+        items += [(P, "m0", (0, 1)), (P, "m0", (1, n)), (P, "m0", (n - 1, 1))]  # 越界、t = 0
+        items.append((P, "m0", (r0, s0)))                         # 结果为无穷远点
+        expected = [sm2.verify(*item) for item in items]
+        assert expected == [True] * 7 + [False] * 6, backend
+        assert sm2.verify_batch(items) == expected, backend
+        assert sm2.verify_batch(items[::-1]) == expected[::-1], backend
+        assert sm2.verify_batch([]) == []
+
+
+def test_nonces():
+    sm2 = SM2()
+    d, P = sm2.generate_keypair()
+    sig = sign_deterministic(sm2, d, "hello")
+    assert sig == sign_deterministic(sm2, d, "hello", public_key=P)
+    assert sig != sign_deterministic(sm2, d, "hello!")
+    assert sm2.verify(P, "hello", sig)
+    with NoncePool(sm2, size=64, batch=8) as pool:
+        sigs = [sm2.sign(d, f"m{i}", nonces=pool.get) for i in range(20)]
+    assert len({r for r, _ in sigs}) == 20
+    assert all(sm2.verify(P, f"m{i}", sig) for i, sig in enumerate(sigs))
+
+
+def test_encoding():
+    sm2 = SM2()
+    curve = sm2.curve
+    assert encode_point(P_A).hex() == "03" + "%064x" % P_A[0]  # y 为奇数
+    assert decode_point(curve, encode_point(P_A)) == P_A
+    assert decode_point(curve, encode_point(P_A, compressed=False)) == P_A
+    for sig in ((R, S), (1, curve.n - 1), (0x80, 0x7F)):
+        assert signature_from_raw(signature_to_raw(sig)) == sig
+        assert signature_from_der(signature_to_der(sig)) == sig
+    der = signature_to_der((R, S))
+    for bad in (der + b"\x00", der[:-1], b"\x30" + bytes([len(der) - 1]) + der[2:] + b"\x00",
+                bytes.fromhex("3008020200010202ffff")):
+        try:
+            signature_from_der(bad)
+            assert False, "非法 DER 应被拒绝"
+        except ValueError:
+            pass
+    bad_x = next(x for x in range(1, 100) if pow(x ** 3 + curve.a * x + curve.b, (curve.p - 1) // 2, curve.p) != 1)
+    try:
+        decode_point(curve, b"\x02" + bad_x.to_bytes(32, "big"))
+        assert False, "不在曲线上的 x 应被拒绝"
+    except ValueError:
+        pass
+
+    points = [P for _, P in sm2.generate_keypairs(20)]
+    sigs = [(secrets.randbelow(curve.n), secrets.randbelow(curve.n)) for _ in range(20)]
+    assert decode_public_keys(curve, encode_public_keys(points)) == points
+    assert decode_public_keys(curve, encode_public_keys(points, False), compressed=False) == points
+    assert decode_signatures(bytearray(encode_signatures(sigs))) == sigs
+    store = PublicKeyStore.from_points(curve, points, max_cached=4)
+    assert len(store) == 20 and list(store) == points and store[-1] == points[-1]
+    assert store.x(3) == points[3][0] and len(store.tobytes()) == 20 * 33
+
+
+def test_canonical():
+    sm2 = SM2()
+    n = sm2.curve.n
+    d, P = sm2.generate_keypair()
+    sigs = [sm2.sign(d, f"m{i}", canonical=True) for i in range(8)]
+    sigs += sm2.sign_batch(d, [f"m{i}" for i in range(8, 40)], canonical=True)
+    assert all(s <= n // 2 for _, s in sigs)
+    items = [(P, f"m{i}", sig) for i, sig in enumerate(sigs)]
+    assert sm2.verify_batch(items, strict=True) == [True] * 40
+    # 把 low-s 签名的 s 换成 n − s：strict 模式直接按 s > n/2 拒绝
+    r, s = sm2.sign(d, "h", canonical=True)
+    flipped = (r, n - s)
+    assert not sm2.verify(P, "h", flipped, strict=True)
+    assert sm2.verify_batch([(P, "h", flipped)], strict=True) == [False]
+    # 合法的 high-s 签名：固定私钥，依次取 k = 1, 2, 3, ... 直到 s > n/2
+    d, P = 0x1234, sm2.curve.base_mult(0x1234)
+    for k in range(1, 64):
+        high = sm2.sign(d, "h", nonces=lambda: (k, sm2.curve.base_mult(k)[0]))
+        if high[1] > n // 2:
+            break
+    assert sm2.verify(P, "h", high) and not sm2.verify(P, "h", high, strict=True)
+    assert sm2.verify_batch([(P, "h", high)], strict=True) == [False]
+    mask = canonical_mask(encode_signatures(sigs + [flipped, (0, 1), (n, 1), (1, n // 2), (1, n // 2 + 1)]), n)
+    assert list(mask) == [True] * 40 + [False, False, False, True, False]
+
+
+def test_nonce_scan():
+    sm2 = SM2()
+    n = sm2.curve.n
+    (d1, P1), (d2, P2), (d3, P3) = sm2.generate_keypairs(3)
+    k = secrets.randbelow(n - 1) + 1
+    x1 = sm2.curve.base_mult(k)[0]
+    fixed = lambda: (k, x1)
+    negated = lambda: (n - k, x1)
+    records = [corpus_record(sm2, P3, f"m{i}", sm2.sign(d3, f"m{i}", public_key=P3), "u")
+               for i in range(50)]
+    records += [corpus_record(sm2, P1, "a", sm2.sign(d1, "a", nonces=fixed)),
+                corpus_record(sm2, P2, "c", sm2.sign(d2, "c", nonces=negated)),
+                corpus_record(sm2, P1, "b", sm2.sign(d1, "b", nonces=fixed))]
+    records.append(records[0])  # 完全相同的记录不算重复随机数
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.bin")
+        write_corpus(path, records)
+        for partitions in (1, 3):
+            result = scan_file(sm2.curve, path, partitions, chunk_records=7)
+            assert result.records == 54 and len(result.groups) == 1 and result.reused_signatures == 3
+            assert sorted(result.keys.values()) == sorted([d1, d2])
+
+
+def test_service():
+    async def run():
+        keys = SM2().generate_keypairs(3)
+        async with SM2Service(workers=2, max_batch=8) as service:
+            ok, _ = await drive(service, keys, clients=6, requests=3)
+            d, P = keys[0]
+            sig = await service.sign(d, "x")
+            assert not await service.verify(P, "y", sig)
+            snap = service.snapshot()
+            # 同一批中的错误请求只让自己失败
+            results = await asyncio.gather(service.verify(P, "x", sig), service.verify(P, "x", (1, 2, 3)),
+                                           service.sign(d, "z"), service.sign(d, 123),
+                                           return_exceptions=True)
+            assert results[0] is True and isinstance(results[1], ValueError)
+            assert isinstance(results[2], tuple) and isinstance(results[3], TypeError)
+            assert service.snapshot()['errors'] == {'sign': 1, 'verify': 1}
+            return ok, snap
+
+    ok, snap = asyncio.run(run())
+    assert ok == 18
+    assert snap['latency_ms']['sign']['count'] == 19
+    assert snap['latency_ms']['verify']['count'] == 19
+    assert snap['queue_depth'] == 0 and snap['errors'] == {'sign': 0, 'verify': 0}
+
+    async def close_with_pending():
+        d, _ = SM2().generate_keypair()
+        service = await SM2Service(workers=1, max_batch=2).start()
+        pending = [asyncio.ensure_future(service.sign(d, f"m{i}")) for i in range(6)]
+        await asyncio.sleep(0)
+        await service.close()
+        results = await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 5)
+        assert any(isinstance(r, ServiceClosedError) for r in results)
+        try:
+            await service.sign(d, "late")
+            assert False, "关闭后的请求应被拒绝"
+        except ServiceClosedError:
+            pass
+
+    asyncio.run(close_with_pending())
+
+
+def test_bench_suite():
+    """性能测试套件的冒烟测试：计时结果字段齐全，私钥恢复的内部断言通过，两次结果可逐项对比"""
+    m = bench_sm2.measure(lambda: None, 0.001, per_call=10)
+    assert m['calls'] >= 3 and m['ops_per_sec'] > 0 and m['p50_us'] <= m['p99_us']
+    backend = bench_sm2.bench_backend("wnaf", 0.001)
+    assert set(backend) == {'keygen', 'sign', 'verify', 'keygen_bulk', 'sign_bulk'}
+    assert all(r['calls'] >= 3 and r['ops_per_sec'] > 0 for r in backend.values())
+    recovery = bench_sm2.bench_recovery(0.001, pairs=8)
+    assert set(recovery) == {'known_k', 'reused_k_pair', 'reused_k_batch'}
+
+    # 经 JSON 往返后对比：只列出两次都有的项，比值为 新 / 旧
+    old = json.loads(json.dumps({'meta': {'python': "3"}, 'backends': {'wnaf': backend}, 'recovery': recovery}))
+    new = json.loads(json.dumps(old))
+    new['backends']['wnaf']['sign']['ops_per_sec'] *= 2
+    del new['recovery']
+    new['verify_batch'] = {'wnaf': {'8': {'ops_per_sec': 1.0}}}
+    rows = {path: ratio for path, _, _, ratio in bench_sm2.compare(old, new)}
+    assert set(rows) == {f"backends/wnaf/{op}" for op in backend}
+    assert abs(rows['backends/wnaf/sign'] - 2) < 1e-9 and rows['backends/wnaf/verify'] == 1
+    assert bench_sm2.flatten_rates(new)['verify_batch/wnaf/8'] == 1.0
+
+
+if __name__ == "__main__":
+    for test in (test_vectors, test_encrypt_vector, test_encrypt_roundtrip,
+                 test_scalar_mult_backends, test_fixed_base, test_ladder, test_sign_verify,
+                 test_verify_backends, test_verify_batch_backends, test_batch_apis, test_nonces,
+                 test_encoding, test_canonical, test_nonce_scan, test_service, test_bench_suite):
+        test()
+        print(f"[{test.__name__}] 通过")
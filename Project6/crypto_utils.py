@@ -2,7 +2,7 @@
 import hashlib
 import random
 from ecdsa import SECP256k1
-from paillier import generate_paillier_keypair
+from paillier import RnPool, generate_paillier_keypair
 
 class CryptoUtils:
     def __init__(self):
@@ -27,12 +27,16 @@ class CryptoUtils:
     def paillier_keygen(self):
         return generate_paillier_keypair()
 
-    def paillier_encrypt(self, pk, plaintext):
-        return pk.encrypt(plaintext)
+    def paillier_encrypt(self, pk, plaintext, rn=None):
+        return pk.encrypt(plaintext, rn)
 
     def paillier_decrypt(self, sk, ciphertext):
         return sk.decrypt(ciphertext)
 
+    def paillier_rn_pool(self, key, size):
+        """后台预计算 r^n 的池，key 为私钥时走 CRT"""
+        return RnPool(key, size)
+
     def paillier_add(self, ciphertexts, n2):
         total = 1
         for ct in ciphertexts:
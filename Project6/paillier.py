@@ -1,6 +1,10 @@
 # paillier.py
-import random
 import math
+import multiprocessing
+import queue
+import random
+import threading
+from collections import deque
 
 def lcm(a, b):
     return abs(a * b) // math.gcd(a, b)
@@ -24,25 +28,56 @@ class PaillierPublicKey:
         self.n2 = n * n
         self.g = g
 
-    def encrypt(self, m):
-        """Paillier 加密: Enc(m) = g^m * r^n mod n^2"""
+    def random_rn(self):
+        """随机 r ∈ Z_n^*，返回 r^n mod n^2（加密中唯一的大模幂，与明文无关，可提前计算）"""
         r = random.randrange(1, self.n)
         while math.gcd(r, self.n) != 1:
             r = random.randrange(1, self.n)
-        return pow(self.g, m, self.n2) * pow(r, self.n, self.n2) % self.n2
+        return pow(r, self.n, self.n2)
+
+    def encrypt(self, m, rn=None):
+        """Paillier 加密: Enc(m) = g^m * r^n mod n^2
+        g = n + 1 时 g^m ≡ 1 + m·n (mod n^2)，不需要模幂；
+        rn 为预先算好的 r^n mod n^2（如 RnPool.get()），缺省时现场计算"""
+        if rn is None:
+            rn = self.random_rn()
+        if self.g == self.n + 1:
+            gm = 1 + m % self.n * self.n
+        else:
+            gm = pow(self.g, m, self.n2)
+        return gm * rn % self.n2
 
-    def rerandomize(self, c):
+    def rerandomize(self, c, rn=None):
         """刷新密文：c * Enc(0)"""
-        r = random.randrange(1, self.n)
-        while math.gcd(r, self.n) != 1:
-            r = random.randrange(1, self.n)
-        return (c * pow(r, self.n, self.n2)) % self.n2
+        if rn is None:
+            rn = self.random_rn()
+        return (c * rn) % self.n2
 
 class PaillierPrivateKey:
-    def __init__(self, public_key, lam, mu):
+    def __init__(self, public_key, lam, mu, p=None, q=None):
         self.public_key = public_key
         self.lam = lam
         self.mu = mu
+        self.p = p
+        self.q = q
+        if p is not None and q is not None:
+            self.p2, self.q2 = p * p, q * q
+            # 模 p^2 时指数可约化到 φ(p^2) = p(p - 1)
+            self.exp_p = public_key.n % (p * (p - 1))
+            self.exp_q = public_key.n % (q * (q - 1))
+            self.q2_inv = pow(self.q2, -1, self.p2)
+
+    def random_rn(self):
+        """与 PaillierPublicKey.random_rn 相同，已知 p、q 时分别模 p^2、q^2 计算再用 CRT 合并（约快一倍）"""
+        if self.p is None or self.q is None:
+            return self.public_key.random_rn()
+        n = self.public_key.n
+        r = random.randrange(1, n)
+        while math.gcd(r, n) != 1:
+            r = random.randrange(1, n)
+        xp = pow(r % self.p2, self.exp_p, self.p2)
+        xq = pow(r % self.q2, self.exp_q, self.q2)
+        return xq + self.q2 * ((xp - xq) * self.q2_inv % self.p2)
 
     def decrypt(self, c):
         u = pow(c, self.lam, self.public_key.n2)
@@ -60,9 +95,72 @@ def generate_paillier_keypair(bits=512):
     lam = lcm(p - 1, q - 1)
     mu = invmod((pow(g, lam, n * n) - 1) // n, n)
     pk = PaillierPublicKey(n, g)
-    sk = PaillierPrivateKey(pk, lam, mu)
+    sk = PaillierPrivateKey(pk, lam, mu, p, q)
     return pk, sk
 
+
+def _fill_rn(out, stop, key, batch):
+    """后台循环：每批计算 batch 个 r^n mod n^2 放入队列（队列满时阻塞）"""
+    while not stop.is_set():
+        values = [key.random_rn() for _ in range(batch)]
+        while not stop.is_set():
+            try:
+                out.put(values, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class RnPool:
+    """有界的 r^n mod n^2 预计算池，后台线程或进程持续补充。
+
+    key 为公钥，或持有 p、q 的私钥（补充时走 CRT）。在线加密 pk.encrypt(m, pool.get())
+    只剩一次模乘；池被取空时 get() 现场计算一个（记为 misses），不会阻塞。每个值只会被取出一次。
+    线程模式与加密线程共享 GIL，只能利用空闲时间补充；进程模式可以真正并行。"""
+
+    def __init__(self, key, size=64, batch=4, use_process=False):
+        self.key = key
+        self._ready = deque()
+        self.hits = self.misses = 0
+        maxsize = max(1, -(-size // batch))
+        if use_process:
+            ctx = multiprocessing.get_context()
+            self._queue = ctx.Queue(maxsize)
+            self._stop = ctx.Event()
+            self._worker = ctx.Process(target=_fill_rn, args=(self._queue, self._stop, key, batch),
+                                       daemon=True)
+        else:
+            self._queue = queue.Queue(maxsize)
+            self._stop = threading.Event()
+            self._worker = threading.Thread(target=_fill_rn, args=(self._queue, self._stop, key, batch),
+                                            daemon=True)
+        self._worker.start()
+
+    def get(self):
+        if not self._ready:
+            try:
+                self._ready.extend(self._queue.get_nowait())
+            except queue.Empty:
+                self.misses += 1
+                return self.key.random_rn()
+        self.hits += 1
+        return self._ready.popleft()
+
+    def close(self):
+        self._stop.set()
+        try:  # 取走队列内容，让阻塞在 put 上的进程退出
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._worker.join(timeout=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 def random_prime(bits):
     while True:
         num = random.getrandbits(bits)
@@ -93,3 +191,54 @@ def is_prime(n, k=5):
         else:
             return False
     return True
+
+
+# ========================
+# 测试示例 + 性能测试
+# ========================
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Paillier 加密：g^m 闭式、r^n 预计算池的每秒加密次数")
+    parser.add_argument("--bits", type=int, default=2048, help="n 的比特数")
+    parser.add_argument("--count", type=int, default=20, help="每种方式的加密次数")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    pk, sk = generate_paillier_keypair(args.bits)
+    print(f"[密钥生成] {args.bits} 位, {time.perf_counter() - t0:.1f} 秒")
+    small = [random.randrange(1000) for _ in range(args.count)]
+    full = [random.randrange(pk.n) for _ in range(args.count)]
+
+    def original(m):  # 原实现：g^m 与 r^n 各一次模幂
+        r = random.randrange(1, pk.n)
+        return pow(pk.g, m, pk.n2) * pow(r, pk.n, pk.n2) % pk.n2
+
+    def rate(fn, ms):
+        t0 = time.perf_counter()
+        cts = [fn(m) for m in ms]
+        elapsed = time.perf_counter() - t0
+        assert all(sk.decrypt(c) == m for c, m in zip(cts, ms))
+        return len(ms) / elapsed
+
+    rns = [sk.random_rn() for _ in range(2 * args.count)]  # 离线准备好的 r^n
+    online = iter(rns)
+    rows = [
+        ("原实现, 小明文", lambda: rate(original, small)),
+        ("原实现, 满长明文", lambda: rate(original, full)),
+        ("g^m 闭式, 现场 r^n（公钥）", lambda: rate(pk.encrypt, full)),
+        ("g^m 闭式, 现场 r^n（CRT）", lambda: rate(lambda m: pk.encrypt(m, sk.random_rn()), full)),
+        ("g^m 闭式, 预计算 r^n（在线部分）", lambda: rate(lambda m: pk.encrypt(m, next(online)), full)),
+    ]
+    print(f"{'方式':32s} {'次/秒':>10s} {'ms/次':>10s}")
+    for name, fn in rows:
+        per_sec = fn()
+        print(f"{name:32s} {per_sec:10.1f} {1e3 / per_sec:10.3f}")
+
+    for use_process in (False, True):
+        with RnPool(sk, size=args.count, use_process=use_process) as pool:
+            time.sleep(0.5)
+            per_sec = rate(lambda m: pk.encrypt(m, pool.get()), full)
+            name = "RnPool（进程）" if use_process else "RnPool（线程）"
+            print(f"{name:32s} {per_sec:10.1f} {1e3 / per_sec:10.3f}  命中/未命中 {pool.hits}/{pool.misses}")
@@ -37,6 +37,18 @@ class Party2:
         self.crypto = CryptoUtils()
         self.k2 = self.crypto.random_scalar()
         self.paillier_pk, self.paillier_sk = self.crypto.paillier_keygen()
+        # 密钥生成后立即在后台为 Round 2 的每个加密准备 r^n，池一直保留到 close()
+        self.rn_pool = self.crypto.paillier_rn_pool(self.paillier_sk, len(self.W))
+
+    def close(self):
+        """停止后台补充 r^n 的线程；可重复调用"""
+        self.rn_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def get_public_key(self):
         return self.paillier_pk
@@ -47,7 +59,7 @@ class Party2:
         for w, t in self.W:
             point_k2 = self.crypto.point_multiply(
                 self.crypto.hash_to_point(w), self.k2)
-            enc_t = self.crypto.paillier_encrypt(self.paillier_pk, t)
+            enc_t = self.crypto.paillier_encrypt(self.paillier_pk, t, self.rn_pool.get())
             enc_pairs.append((point_k2, enc_t))
         return Z, enc_pairs
 
@@ -18,21 +18,21 @@ def simulate_protocol():
     print(f"Expected intersection size: {len(common_users)}")
 
     p1 = Party1(p1_data)
-    p2 = Party2(p2_data)
+    # 退出 with 时关闭 P2 的 r^n 预计算池
+    with Party2(p2_data) as p2:
+        p1.set_public_key(p2.get_public_key())
 
-    p1.set_public_key(p2.get_public_key())
+        # Round 1
+        hashed_from_p1 = p1.round1()
 
-    # Round 1
-    hashed_from_p1 = p1.round1()
+        # Round 2
+        Z, enc_pairs = p2.round2(hashed_from_p1)
 
-    # Round 2
-    Z, enc_pairs = p2.round2(hashed_from_p1)
+        # Round 3
+        sum_ct, indices = p1.round3(Z, enc_pairs)
 
-    # Round 3
-    sum_ct, indices = p1.round3(Z, enc_pairs)
-
-    # Output
-    result_sum = p2.decrypt_result(sum_ct)
+        # Output
+        result_sum = p2.decrypt_result(sum_ct)
     expected_sum = sum(t for u, t in p2_data if u in common_users)
 
     print("\n=== Results ===")
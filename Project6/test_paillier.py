@@ -0,0 +1,80 @@
+import random
+import time
+
+from paillier import PaillierPublicKey, RnPool, generate_paillier_keypair
+
+BITS = 256  # 测试用小密钥，只检查正确性
+
+PK, SK = generate_paillier_keypair(BITS)
+
+
+def test_encrypt_decrypt():
+    """闭式 g^m 加密可正确解密，明文按模 n 约化；传入与不传入 r^n 结果一致"""
+    n, n2 = PK.n, PK.n2
+    rn = SK.random_rn()
+    for m in (0, 1, 12345, n - 1, -1, -5, n + 3):
+        assert SK.decrypt(PK.encrypt(m)) == m % n, m
+        c = PK.encrypt(m, rn)
+        assert SK.decrypt(c) == m % n, m
+        assert c == pow(n + 1, m % n, n2) * rn % n2  # 闭式与模幂一致
+    # g ≠ n + 1 时走通用模幂
+    g = pow(n + 1, 3, n2) * pow(7, n, n2) % n2
+    other = PaillierPublicKey(n, g)
+    assert other.encrypt(5, rn) == pow(g, 5, n2) * rn % n2
+
+
+def test_homomorphic_and_rerandomize():
+    a, b = 1000, PK.n - 1
+    c = PK.encrypt(a) * PK.encrypt(b) % PK.n2
+    assert SK.decrypt(c) == (a + b) % PK.n
+    fresh = PK.rerandomize(c)
+    assert fresh != c and SK.decrypt(fresh) == SK.decrypt(c)
+    rn = SK.random_rn()
+    assert PK.rerandomize(c, rn) == c * rn % PK.n2
+
+
+def test_crt_random_rn():
+    """CRT 版 random_rn 与公钥版（同一个 r）结果相同，且是 n 次剩余：解密为 0"""
+    for seed in range(5):
+        random.seed(seed)
+        crt = SK.random_rn()
+        random.seed(seed)
+        assert crt == PK.random_rn()
+        assert SK.decrypt(crt) == 0
+
+
+def _check_values(values):
+    assert len(set(values)) == len(values), "r^n 不能重复取出"
+    assert all(SK.decrypt(v) == 0 for v in values)
+
+
+def test_rn_pool():
+    """线程 / 进程两种模式：取出的值互不相同；队列取空、关闭后 get() 现场计算"""
+    for use_process in (False, True):
+        pool = RnPool(SK, size=8, batch=2, use_process=use_process)
+        try:
+            deadline = time.time() + 10
+            while pool._queue.empty() and time.time() < deadline:
+                time.sleep(0.01)
+            values = [pool.get() for _ in range(20)]
+            assert pool.hits > 0 and pool.hits + pool.misses == 20, use_process
+        finally:
+            pool.close()
+        pool.close()  # 可重复关闭
+        assert not pool._worker.is_alive()
+        misses = pool.misses
+        while pool._ready:
+            values.append(pool.get())
+        values += [pool.get() for _ in range(5)]
+        assert pool.misses >= misses + 5
+        _check_values(values)
+        assert SK.decrypt(PK.encrypt(42, pool.get())) == 42
+
+    with RnPool(PK, size=2) as pool:  # 公钥模式
+        _check_values([pool.get() for _ in range(6)])
+
+
+if __name__ == "__main__":
+    for test in (test_encrypt_decrypt, test_homomorphic_and_rerandomize, test_crt_random_rn, test_rn_pool):
+        test()
+        print(f"[{test.__name__}] 通过")